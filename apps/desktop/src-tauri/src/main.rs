@@ -1,9 +1,11 @@
 #![cfg_attr(not(debug_assertions), windows_subsystem = "windows")]
 
 use serde::{Serialize, Deserialize};
-use std::process::{Command, Stdio};
-use std::io::{BufRead, BufReader};
+use std::process::{Child, ChildStdin, Command, Stdio};
+use std::io::{BufRead, BufReader, Write};
+use std::sync::Mutex;
 use std::thread;
+use std::time::{SystemTime, UNIX_EPOCH};
 use tauri::Emitter;
 use std::path::{Path, PathBuf};
 use std::env;
@@ -35,6 +37,17 @@ struct EventLine {
     line: String,
 }
 
+/// 常驻 sidecar（`--serve`）：只启动一次，之后的任务通过 stdin 逐行下发
+#[derive(Default)]
+struct SidecarServer {
+    inner: Mutex<Option<ServerHandle>>,
+}
+
+struct ServerHandle {
+    child: Child,
+    stdin: ChildStdin,
+}
+
 fn get_sidecar_command(app_handle: &tauri::AppHandle) -> Result<PathBuf, String> {
     // 在开发模式下，使用 Python 解释器运行
     #[cfg(debug_assertions)]
@@ -266,32 +279,71 @@ async fn delete_api_key() -> Result<(), String> {
     Ok(())
 }
 
-#[tauri::command]
-async fn start_jobs(app_handle: tauri::AppHandle, window: tauri::Window, inputs: Vec<String>, output_dir: Option<String>) -> Result<(), String> {
-    if inputs.is_empty() {
-        return Err("No inputs provided".to_string());
-    }
-    
-    let mut cmd = create_sidecar_command(&app_handle, false, inputs, output_dir)?;
-    cmd.stdout(Stdio::piped()).stderr(Stdio::piped());
+fn spawn_sidecar_server(app_handle: &tauri::AppHandle) -> Result<ServerHandle, String> {
+    let mut cmd = create_sidecar_command(app_handle, false, Vec::new(), None)?;
+    cmd.arg("--serve");
+    // stderr 不读取时管道写满会阻塞常驻进程，直接继承
+    cmd.stdin(Stdio::piped()).stdout(Stdio::piped()).stderr(Stdio::inherit());
 
     let mut child = cmd.spawn().map_err(|e| format!("Failed to start sidecar: {}", e))?;
+    let stdin = child.stdin.take().ok_or("Failed to get stdin")?;
     let stdout = child.stdout.take().ok_or("Failed to get stdout")?;
-    
+
+    let app = app_handle.clone();
     thread::spawn(move || {
         let reader = BufReader::new(stdout);
         for line in reader.lines() {
             if let Ok(l) = line {
-                let _ = window.emit("sidecar-event", l);
+                let _ = app.emit("sidecar-event", l);
             }
         }
     });
-    
+
+    Ok(ServerHandle { child, stdin })
+}
+
+#[tauri::command]
+async fn start_jobs(app_handle: tauri::AppHandle, server: tauri::State<'_, SidecarServer>, inputs: Vec<String>, output_dir: Option<String>) -> Result<(), String> {
+    if inputs.is_empty() {
+        return Err("No inputs provided".to_string());
+    }
+
+    let mut guard = server.inner.lock().map_err(|_| "Sidecar state poisoned".to_string())?;
+    // 首次调用或进程已退出时（重新）启动常驻 sidecar
+    let alive = match guard.as_mut() {
+        Some(handle) => matches!(handle.child.try_wait(), Ok(None)),
+        None => false,
+    };
+    if !alive {
+        *guard = Some(spawn_sidecar_server(&app_handle)?);
+    }
+    let handle = guard.as_mut().ok_or("Sidecar not running")?;
+
+    let batch = SystemTime::now().duration_since(UNIX_EPOCH).map(|d| d.as_millis()).unwrap_or(0);
+    for (i, input) in inputs.iter().enumerate() {
+        let file_id = format!("job-{}-{}", batch, i);
+        let output = output_dir.as_ref().map(|dir| {
+            let stem = Path::new(input).file_stem().map(|s| s.to_string_lossy().to_string()).unwrap_or_default();
+            Path::new(dir).join(format!("{}.xlsx", stem)).to_string_lossy().to_string()
+        });
+        let request = serde_json::json!({
+            "id": file_id,
+            "method": "run",
+            "params": { "input": input, "fileId": file_id, "output": output },
+        });
+        let written = writeln!(handle.stdin, "{}", request).and_then(|_| handle.stdin.flush());
+        if let Err(e) = written {
+            *guard = None;
+            return Err(format!("Failed to send job to sidecar: {}", e));
+        }
+    }
+
     Ok(())
 }
 
 fn main() {
     tauri::Builder::default()
+        .manage(SidecarServer::default())
         .invoke_handler(tauri::generate_handler![
             start_mock, 
             start_jobs, 
@@ -19,6 +19,7 @@ type EventPayload = {
   fileId: string
   message?: string | null
   percent?: number | null
+  data?: Record<string, number | string | null> | null
 }
 
 export function App() {
@@ -44,6 +44,70 @@ class Config:
             'model': os.getenv('OPENAI_MODEL_NAME', os.getenv('OPENAI_MODEL', 'gpt-4o'))
         }
     
+    @staticmethod
+    def get_rate_limit_config() -> dict:
+        """
+        获取OpenAI限流配置（每分钟请求数与token数，0 表示不限制）
+        
+        Returns:
+            包含 rpm/tpm 的字典
+        """
+        load_env_file()
+        
+        def _read_float(name: str) -> float:
+            try:
+                return float(os.getenv(name, '0') or 0)
+            except ValueError:
+                return 0.0
+        
+        return {
+            'rpm': _read_float('OPENAI_RPM'),
+            'tpm': _read_float('OPENAI_TPM')
+        }
+    
+    @staticmethod
+    def get_cache_config() -> dict:
+        """
+        获取LLM响应缓存配置
+        
+        Returns:
+            包含 enabled/cache_dir/max_bytes 的字典
+        """
+        load_env_file()
+        
+        try:
+            max_mb = float(os.getenv('LLM_CACHE_MAX_MB', '512') or 512)
+        except ValueError:
+            max_mb = 512.0
+        
+        return {
+            'enabled': os.getenv('LLM_CACHE', '1').strip().lower() not in ('0', 'false', 'no', 'off'),
+            'cache_dir': os.getenv('LLM_CACHE_DIR', '.llm_cache'),
+            'max_bytes': int(max_mb * 1024 * 1024)
+        }
+    
+    @staticmethod
+    def get_pdf_config() -> dict:
+        """
+        获取PDF文本提取配置
+        
+        Returns:
+            包含 workers（提取进程数，1 为串行）、section_grammar（题型标题语法JSON路径，可空）
+            与 work_format（拆分结果的存放方式：markdown 每题一个文件（默认）/ store 打包存储）的字典
+        """
+        load_env_file()
+        
+        try:
+            workers = int(os.getenv('PDF_WORKERS', '1') or 1)
+        except ValueError:
+            workers = 1
+        
+        return {
+            'workers': max(1, workers),
+            'section_grammar': os.getenv('SECTION_GRAMMAR') or None,
+            'work_format': (os.getenv('WORK_FORMAT') or 'markdown').strip().lower()
+        }
+    
     @staticmethod
     def get_gemini_config() -> dict:
         """
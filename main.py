@@ -11,7 +11,9 @@
 
 import os
 import sys
+import time
 import argparse
+from datetime import datetime
 from config import Config
 from single_choice_standardizer import SingleChoiceStandardizer
 from multiple_choice_standardizer import MultipleChoiceStandardizer
@@ -19,6 +21,14 @@ from judgment_standardizer import JudgmentStandardizer
 from short_answer_standardizer import ShortAnswerStandardizer
 from essay_standardizer import EssayStandardizer
 from case_analysis_standardizer import CaseAnalysisStandardizer
+from utils.batch_mode import LocalBatchBackend, OpenAIBatchBackend, make_sync_responder, run_batch_standardization
+from utils.chunk_runner import DEFAULT_GLOBAL_WORKERS, run_standardization_for_types
+from utils.metrics import RUN_METRICS_FILE, RunMetrics, get_llm_stats
+from utils.question_reconciler import fill_question_gaps
+from utils.response_cache import configure_response_cache
+from utils.tabular_export import EXPORT_FORMATS, export_questions
+from utils.work_store import WORK_STORE_FILE, WorkStore, export_markdown
+from utils.workbook_export import LAYOUT_COMBINED, LAYOUT_SHEETS, export_question_workbook
 
 
 def main():
@@ -27,16 +37,41 @@ def main():
     parser.add_argument('--type', choices=['single', 'multiple', 'judgment', 'short', 'essay', 'case', 'all'], default='all',
                        help='处理题型：single/multiple/judgment/short/essay/case/all (默认: all)')
     parser.add_argument('--base-dir', default=None, help='题型markdown所在的question_types目录（默认自动检测）')
+    parser.add_argument('--no-cache', action='store_true', help='禁用LLM响应缓存（既不读取也不写入）')
+    parser.add_argument('--refresh', action='store_true', help='忽略已有缓存重新请求，并用新响应刷新缓存')
+    parser.add_argument('--no-resume', action='store_true', help='忽略 checkpoint.json，重新处理全部chunk')
+    parser.add_argument('--extraction-mode', choices=['verbatim', 'offsets'], default=None,
+                        help='抽取模式：verbatim 由模型逐字输出题目；offsets 模型只返回行号范围，原文本地截取（输出token更少）')
+    parser.add_argument('--stream', action='store_true', help='流式读取模型响应，每道题目到达即解析（更快看到首批结果）')
+    parser.add_argument('--batch', action='store_true', help='离线批量模式：所有chunk请求写入一个批量文件提交到 Batch API，完成后写回结果（成本更低，适合夜间重跑）')
+    parser.add_argument('--batch-local', metavar='DIR', default=None,
+                        help='配合 --batch 使用本地文件替身：在DIR中模拟批次，逐条调用同步接口应答（用于离线测试或不支持批量接口的服务）')
+    parser.add_argument('--batch-poll', type=float, default=60.0, help='批量模式的轮询间隔（秒，默认60）')
+    parser.add_argument('--no-reconcile', dest='reconcile', action='store_false',
+                        help='不做题号对账（默认在标准化后按源题号对账，只补跑缺失题目所在的行区间）')
+    # 对账已默认开启，保留旧参数以兼容已有脚本
+    parser.add_argument('--reconcile', dest='reconcile', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--workbook', choices=[LAYOUT_SHEETS, LAYOUT_COMBINED], default=None,
+                        help='所有题型一次写入同一个工作簿：sheets 每个题型一个工作表；combined 按模板合并为一个工作表（替代逐题型xlsx）')
+    parser.add_argument('--template', default=None, help='配合 --workbook：从模板xlsx读取表头（combined 模式沿用其工作表名）')
+    parser.add_argument('--workbook-output', default=None, help='汇总工作簿路径（默认写在题型目录的上一级）')
+    parser.add_argument('--formats', nargs='+', choices=EXPORT_FORMATS, default=None,
+                        help='除Excel外额外导出的格式（同列结构）：csv / jsonl / parquet（parquet 需要安装 pyarrow）')
+    parser.add_argument('--export-markdown', metavar='DIR', default=None,
+                        help='把工作目录的打包存储（work_store.sqlite3）一次性导出为原有的markdown目录结构后退出')
+    parser.add_argument('--workers', type=int, default=None, help='同时请求的chunk数：单题型时为该题型并发数，多题型时为全局并发上限（1为顺序执行）')
     
     args = parser.parse_args()
     
     print("=== 数据安全管理员题库处理工具（OpenAI） ===\n")
     # 加载 OpenAI 配置（各标准化器内部会自行读取 .env）
     openai_cfg = Config.get_openai_config()
-    if not openai_cfg.get('api_key'):
+    if not openai_cfg.get('api_key') and not args.export_markdown:
         print('❌ 未检测到 OPENAI_API_KEY，请在 .env 中配置。')
         return 1
     
+    configure_response_cache(enabled=False if args.no_cache else None, refresh=args.refresh)
+
     # 定位 question_types 目录
     base_dir = args.base_dir
     if not base_dir:
@@ -54,6 +89,16 @@ def main():
         return 1
 
     print(f'📁 题型目录: {base_dir}')
+    work_store_path = os.path.join(os.path.dirname(os.path.abspath(base_dir)), WORK_STORE_FILE)
+
+    if args.export_markdown:
+        if not os.path.exists(work_store_path):
+            print(f'❌ 未找到打包存储: {work_store_path}')
+            return 1
+        with WorkStore(work_store_path) as store:
+            exported = export_markdown(store, args.export_markdown)
+        print(f"📝 已导出markdown到 {args.export_markdown}: " + "，".join(f"{k} {v} 道" for k, v in exported.items()))
+        return 0
 
     type_to_file = {
         'single': os.path.join(base_dir, 'single_choice.md'),
@@ -75,6 +120,7 @@ def main():
 
     to_process = list(type_to_file.keys()) if args.type == 'all' else [args.type]
 
+    type_inputs = {}
     for t in to_process:
         input_file = type_to_file[t]
         if not os.path.exists(input_file):
@@ -82,22 +128,105 @@ def main():
             continue
 
         handler = type_to_handler[t]
-        print(f"\n🚀 开始标准化：{t} -> {input_file}")
-        try:
-            result = handler.standardize_file(input_file)
-            print(f"✅ 标准化完成: {result}")
+        if args.workers is not None:
+            handler.config["max_workers"] = max(1, args.workers)
+        if args.no_resume:
+            handler.config["resume"] = False
+        if args.stream:
+            handler.config["stream"] = True
+        if args.extraction_mode:
+            handler.config["extraction_mode"] = args.extraction_mode
+        type_inputs[t] = (handler, input_file)
+
+    metrics = RunMetrics()
+    standardize_started = time.perf_counter()
+    if args.batch and type_inputs:
+        # 批量模式：所有题型的chunk请求合并为一个批次
+        client = next(iter(type_inputs.values()))[0].client
+        if args.batch_local:
+            backend = LocalBatchBackend(args.batch_local, make_sync_responder(client))
+        else:
+            backend = OpenAIBatchBackend(client)
+        print(f"\n📦 批量标准化：{', '.join(type_inputs.keys())}")
+        results = run_batch_standardization(
+            type_inputs, backend, os.path.join(base_dir, 'batch'), poll_interval=max(1.0, args.batch_poll)
+        )
+    elif len(type_inputs) > 1:
+        # 多题型：所有chunk汇入同一队列，按题型轮转、共享全局并发上限
+        global_workers = max(1, args.workers) if args.workers is not None else DEFAULT_GLOBAL_WORKERS
+        print(f"\n🚀 开始全局标准化：{', '.join(type_inputs.keys())}")
+        results = run_standardization_for_types(type_inputs, max_workers=global_workers)
+    else:
+        results = {}
+        for t, (handler, input_file) in type_inputs.items():
+            print(f"\n🚀 开始标准化：{t} -> {input_file}")
+            try:
+                results[t] = handler.standardize_file(input_file)
+            except Exception as e:
+                print(f"❌ 处理 {t} 时出错: {e}")
+                results[t] = {"error": str(e)}
+    metrics.record(
+        "standardize",
+        wall_s=time.perf_counter() - standardize_started,
+        questions=sum(r.get("total_questions", 0) for r in results.values()),
+    )
 
+    workbook_questions = {}
+    for t, (handler, input_file) in type_inputs.items():
+        result = results.get(t, {})
+        if "error" in result:
+            continue
+        print(f"✅ {t} 标准化完成: {result}")
+        try:
+            if args.reconcile:
+                report = fill_question_gaps(handler, input_file)
+                if report.missing:
+                    print(f"⚠️  {t} 仍缺失题号: {', '.join(report.missing[:20])}")
             standardized_dir = os.path.join(
                 os.path.dirname(input_file),
                 f"{handler.get_question_type_name()}_standardized"
             )
-            if os.path.exists(standardized_dir):
-                excel_path = handler.process_standardized_to_excel(standardized_dir)
+            if not os.path.exists(standardized_dir):
+                continue
+            if os.path.exists(work_store_path):
+                # 标准化结果一并收入打包存储，可按 (题型, chunk) 随机读取
+                with WorkStore(work_store_path) as store:
+                    store.import_chunk_results(handler.get_question_type_name(), standardized_dir)
+            if args.workbook:
+                questions = handler.extract_questions_from_standardized_files(standardized_dir)
+                if questions:
+                    workbook_questions[handler.get_question_type_name()] = questions
+            else:
+                excel_path = handler.process_standardized_to_excel(standardized_dir, formats=args.formats)
                 if excel_path:
                     print(f"📊 Excel 已生成: {excel_path}")
         except Exception as e:
             print(f"❌ 处理 {t} 时出错: {e}")
 
+    if workbook_questions:
+        # 已解析的题目记录直接复用，所有题型一次写入同一个工作簿
+        workbook_path = args.workbook_output or os.path.join(
+            os.path.dirname(os.path.abspath(base_dir)),
+            f"题库汇总_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        )
+        try:
+            export_question_workbook(workbook_questions, workbook_path, layout=args.workbook, template_path=args.template)
+            if args.formats:
+                all_questions = [q for questions in workbook_questions.values() for q in questions]
+                export_questions(all_questions, workbook_path, args.formats)
+        except Exception as e:
+            print(f"❌ 汇总工作簿导出失败: {e}")
+
+    if type_inputs:
+        # 运行汇总：标准化耗时与吞吐、LLM 延迟分位数、token 用量、重试与 RSS 峰值
+        metrics_path = os.path.join(os.path.dirname(os.path.abspath(base_dir)), RUN_METRICS_FILE)
+        report = metrics.write(metrics_path, get_llm_stats())
+        summary = report["summary"]
+        print(f"📈 运行指标: 耗时 {summary['wall_s']}s, LLM调用 {summary.get('llm_calls', 0)} 次"
+              f"（p50 {summary.get('llm_latency_p50_s')}s / p90 {summary.get('llm_latency_p90_s')}s）, "
+              f"token {summary.get('tokens_in', 0)}/{summary.get('tokens_out', 0)}, "
+              f"重试 {summary.get('llm_retries', 0)} 次, RSS峰值 {summary['rss_peak_mb']}MB -> {metrics_path}")
+
     print("\n🎉 全部处理完成。")
     return 0
 
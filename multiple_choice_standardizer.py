@@ -8,19 +8,24 @@ import os
 import json
 import re
 import openai
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict
 from datetime import datetime
 from config import Config
 from utils.standardization_utils import (
-    chunk_file_by_lines,
+    chunk_type_file,
+    NO_NEXT_SLICE,
     call_openai_with_retries,
     split_questions_by_separator,
     save_markdown_chunk_result,
     save_original_chunk_file,
     list_standardized_chunk_files,
     extract_codeblocks_from_markdown,
+    merge_chunk_questions,
     write_excel,
 )
+from utils.chunk_runner import run_standardization
+from utils.tabular_export import export_questions
+from utils.workbook_export import QUESTION_HEADERS, question_row
 
 
 class MultipleChoiceStandardizer:
@@ -42,16 +47,40 @@ class MultipleChoiceStandardizer:
             api_base = api_base or config.get('api_base', 'https://api.openai.com/v1')
             model = model or config.get('model', 'gpt-4o')
             
-        self.client = openai.OpenAI(api_key=api_key, base_url=api_base)
+        # OpenAI 客户端首次调用模型时才创建，只解析或导出已有结果时不需要API密钥
+        self._client = None
+        self._client_args = {"api_key": api_key, "base_url": api_base}
         self.model = model
         self.config = self.get_default_config()
+
+    @property
+    def client(self) -> openai.OpenAI:
+        """OpenAI 客户端（首次访问时创建）"""
+        if self._client is None:
+            # SDK 内置重试关闭，限流与退避统一由 call_openai_with_retries 处理
+            self._client = openai.OpenAI(max_retries=0, **self._client_args)
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
     
     def get_default_config(self) -> Dict:
         """获取默认配置"""
         return {
-            "lines_per_chunk": 100,     # 每块行数
+            "lines_per_chunk": 100,     # 每块行数上限（questions / lines 策略）
+            "chunk_strategy": "tokens", # 切分策略：tokens 按token预算 / questions 按题目行数 / lines 按行+前瞻块
+            "max_input_tokens": 3000,   # 每块切片的估算token上限
+            "max_output_tokens": 8000,  # 单次响应的token上限
+            "output_token_ratio": 1.6,  # 标准化结果约为输入的倍数（用于按输出上限收紧切片）
             "overlap_lines": 10,        # 重叠行数（用于防止题目被截断）
             "max_retries": 3,           # API调用重试次数
+            "max_workers": 4,           # 并发请求的chunk数（1为顺序执行）
+            "stream": False,            # 流式读取响应，每道题目到达即交给解析与回调
+            "repair_missing": True,     # 对漏掉或残缺的题目定向补问
+            "extraction_mode": "verbatim",  # 抽取模式：verbatim 模型逐字输出 / offsets 模型只标注行号范围
+            "fast_path": True,          # 版式规整的题目由本地规则解析，不调用AI
+            "resume": True,             # 断点续跑：跳过已完成且输入未变化的chunk
             "preserve_original": True,  # 是否保留原文件
             "output_format": "markdown" # 输出格式
         }
@@ -88,13 +117,13 @@ class MultipleChoiceStandardizer:
     
     def chunk_file(self, file_path: str) -> List[tuple]:
         """将文件按行数切分"""
-        return chunk_file_by_lines(file_path, self.config["lines_per_chunk"])
+        return chunk_type_file(file_path, self.config)
     
     def create_standardization_prompt(self, chunk1: List[str], chunk2: Optional[List[str]] = None) -> str:
         """创建高保真多选题标准化prompt，严格按照prompt.md要求"""
         
         current_slice = ''.join(chunk1)
-        next_slice = ''.join(chunk2) if chunk2 else ""
+        next_slice = ''.join(chunk2) if chunk2 else NO_NEXT_SLICE
         
         prompt = f"""**角色**: 你是一个高精度的文本流处理引擎，核心任务是在分块数据流中，以**绝对保真**的方式，识别、重组和格式化文本单元。你的任何操作都不能改变原文的措辞和结构。
 
@@ -197,7 +226,7 @@ class MultipleChoiceStandardizer:
 
         return prompt
     
-    def call_ai_standardization(self, prompt: str) -> Optional[str]:
+    def call_ai_standardization(self, prompt: str, on_question: Optional[Callable[[str], None]] = None) -> Optional[str]:
         """调用OpenAI进行标准化（带重试）"""
         return call_openai_with_retries(
             client=self.client,
@@ -205,6 +234,8 @@ class MultipleChoiceStandardizer:
             prompt=prompt,
             max_retries=self.config["max_retries"],
             temperature=0.1,
+            stream=self.config.get("stream", False),
+            on_question=on_question,
         )
     
     def parse_standardized_result(self, ai_response: str) -> List[str]:
@@ -239,77 +270,11 @@ class MultipleChoiceStandardizer:
         Returns:
             处理结果统计
         """
-        if output_dir is None:
-            base_dir = os.path.dirname(input_file)
-            output_dir = os.path.join(base_dir, f"{self.get_question_type_name()}_standardized")
-        
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        
-        print(f"🚀 开始标准化 {self.get_question_type_name()}")
-        print(f"📁 输入文件: {input_file}")
-        print(f"📁 输出目录: {output_dir}")
-        
-        # 备份原文件
-        if self.config["preserve_original"]:
-            backup_file = os.path.join(output_dir, "original_backup.md")
-            os.system(f'cp "{input_file}" "{backup_file}"')
-            print(f"💾 原文件已备份到: {backup_file}")
-        
-        # 切分文件
-        print(f"🔪 正在切分文件...")
-        chunks = self.chunk_file(input_file)
-        print(f"📝 文件已切分为 {len(chunks)} 个块")
-        
-        # 保存原始分块文件（用于对比）
-        if self.config["preserve_original"]:
-            print(f"💾 正在保存原始分块文件...")
-            for i, (chunk1, chunk2) in enumerate(chunks, 1):
-                self.save_original_chunk(i, chunk1, chunk2, output_dir)
-        
-        # 标准化每个chunk
-        total_questions = 0
-        for i, (chunk1, chunk2) in enumerate(chunks, 1):
-            print(f"\n🔄 处理 Chunk {i}/{len(chunks)}")
-            
-            # 创建标准化prompt
-            prompt = self.create_standardization_prompt(chunk1, chunk2)
-            
-            # 调用AI标准化
-            ai_response = self.call_ai_standardization(prompt)
-            if ai_response is None:
-                print(f"❌ Chunk {i} AI调用失败，跳过")
-                continue
-            
-            # 解析结果
-            questions = self.parse_standardized_result(ai_response)
-            
-            # 保存结果
-            self.save_chunk_results(i, questions, output_dir)
-            total_questions += len(questions)
-        
-        # 保存质量统计
-        quality_stats = {
-            "question_type": self.get_question_type_name(),
-            "total_chunks": len(chunks),
-            "total_questions": total_questions,
-            "processing_time": datetime.now().isoformat(),
-            "config": self.config
-        }
-        
-        stats_file = os.path.join(output_dir, "quality_stats.json")
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            json.dump(quality_stats, f, ensure_ascii=False, indent=2)
-        
-        print(f"\n🎉 {self.get_question_type_name()} 标准化完成！")
-        print(f"📊 总计处理: {len(chunks)} 个块, {total_questions} 道题目")
-        print(f"📁 结果保存在: {output_dir}")
-        
-        return quality_stats
+        return run_standardization(self, input_file, output_dir)
 
     def extract_questions_from_standardized_files(self, standardized_dir: str) -> List[Dict]:
         """从标准化文件中提取多选题数据"""
-        questions: List[Dict] = []
+        chunks: List[List[Dict]] = []
         chunk_files = list_standardized_chunk_files(standardized_dir)
         print(f"🔍 找到 {len(chunk_files)} 个标准化文件")
 
@@ -319,11 +284,15 @@ class MultipleChoiceStandardizer:
                 content = f.read()
 
             blocks = extract_codeblocks_from_markdown(content)
+            chunk_questions: List[Dict] = []
             for block in blocks:
                 question_data = self.parse_question_block(block)
                 if question_data:
-                    questions.append(question_data)
+                    chunk_questions.append(question_data)
+            chunks.append(chunk_questions)
 
+        # lines 策略下相邻chunk可能在交界处重复输出同一道题，合并时保留更完整的一份
+        questions = merge_chunk_questions(chunks, self.config)
         print(f"✅ 总共提取 {len(questions)} 道题目")
         return questions
 
@@ -371,32 +340,10 @@ class MultipleChoiceStandardizer:
 
     def create_excel_file(self, questions: List[Dict], output_path: str):
         """创建Excel并写入多选题数据"""
-        headers = [
-            '代码', '题型', '难度', '题干',
-            '选择项A', '选择项B', '选择项C', '选择项D', '选择项E',
-            '答案', '分数', '题目一致性'
-        ]
-
-        rows: List[List[str]] = []
-        for q in questions:
-            rows.append([
-                q.get('code', ''),
-                q.get('question_type', ''),
-                q.get('difficulty', ''),
-                q.get('question_stem', ''),
-                q.get('option_A', ''),
-                q.get('option_B', ''),
-                q.get('option_C', ''),
-                q.get('option_D', ''),
-                q.get('option_E', ''),
-                q.get('answer', ''),
-                q.get('score', ''),
-                q.get('consistency', ''),
-            ])
-
-        write_excel(headers=headers, rows=rows, sheet_title="多选题", output_path=output_path)
-
-    def process_standardized_to_excel(self, standardized_dir: str, output_dir: str = None) -> Optional[str]:
+        rows = [question_row(q) for q in questions]
+        write_excel(headers=QUESTION_HEADERS, rows=rows, sheet_title="多选题", output_path=output_path)
+
+    def process_standardized_to_excel(self, standardized_dir: str, output_dir: str = None, formats: Optional[List[str]] = None) -> Optional[str]:
         """处理标准化文件并生成多选题Excel"""
         if output_dir is None:
             output_dir = standardized_dir
@@ -418,11 +365,13 @@ class MultipleChoiceStandardizer:
         excel_path = os.path.join(output_dir, excel_filename)
 
         self.create_excel_file(questions, excel_path)
+        export_files = export_questions(questions, excel_path, formats) if formats else {}
 
         stats = {
             "question_type": self.get_question_type_name(),
             "total_questions": len(questions),
             "excel_file": excel_path,
+            "export_files": export_files,
             "processing_time": datetime.now().isoformat(),
         }
         stats_file = os.path.join(output_dir, f"excel_generation_stats_{timestamp}.json")
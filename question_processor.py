@@ -3,8 +3,6 @@
 用于从PDF文档中提取题目并转换为结构化的Excel文件
 """
 
-import fitz  # PyMuPDF
-import openpyxl
 import openai  # 兼容测试对 question_processor.openai.OpenAI 的 monkeypatch
 import json
 import re
@@ -14,6 +12,15 @@ import datetime
 from typing import List, Dict, Optional, Tuple
 from tqdm import tqdm
 
+from config import Config
+from utils.excel_writer import append_rows_to_excel
+from utils.page_cache import PAGE_CACHE_FILE, PageCache, file_sha256, iter_cached_pdf_pages, write_source_record
+from utils.pdf_extraction import extract_pdf_text, iter_pdf_pages
+from utils.section_detector import load_section_grammar
+from utils.section_splitter import iter_lines, split_lines_by_question_types
+from utils.work_store import WORK_FORMAT_MARKDOWN, WORK_FORMAT_STORE, WORK_STORE_FILE, WorkStore, render_question_markdown
+from utils.question_boundaries import QUESTION_NUMBER_PATTERN
+
 
 class QuestionProcessor:
     """题库处理器主类（仅保留PDF解析与题型拆分工具方法，AI流程已移除）"""
@@ -28,28 +35,35 @@ class QuestionProcessor:
         "案例分析题": {"name": "case_analysis", "pattern": r"七、案例分析题：.*[（(](\d+).*题[）)]"}
     }
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, pdf_workers: Optional[int] = None,
+                 section_grammar: Optional[str] = None, work_format: Optional[str] = None,
+                 work_root: Optional[str] = None):
         """初始化（不再依赖 Gemini）
 
         兼容测试：允许传入 api_key 参数但不强制使用。
+        pdf_workers: PDF文本提取的进程数（默认读取 PDF_WORKERS，1 为串行）
+        section_grammar: 题型标题语法JSON路径（默认读取 SECTION_GRAMMAR，为空时使用 QUESTION_TYPE_MAPPING）
+        work_format: 独立题目的存放方式（默认读取 WORK_FORMAT，未设置时为 markdown）：markdown 每道题一个
+            question_NNNN.md；store 打包存入 work_store.sqlite3
+        work_root: 工作目录 question_processing_* 的上级目录（默认当前目录）；显式给出时无需切换进程工作目录
         """
         self.api_key = api_key
+        self.work_root = work_root
+        pdf_config = Config.get_pdf_config()
+        self.pdf_workers = pdf_workers if pdf_workers is not None else pdf_config['workers']
+        grammar_path = section_grammar or pdf_config['section_grammar']
+        self.section_mapping = load_section_grammar(grammar_path) if grammar_path else self.QUESTION_TYPE_MAPPING
+        self.work_format = work_format or pdf_config['work_format']
+        if self.work_format not in (WORK_FORMAT_STORE, WORK_FORMAT_MARKDOWN):
+            raise ValueError(f"未知的工作目录格式: {self.work_format}")
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """从PDF文件中提取所有文本"""
+    def extract_text_from_pdf(self, pdf_path: str, workers: Optional[int] = None) -> str:
+        """从PDF文件中提取所有文本（workers > 1 时按页区间分片并行）"""
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF文件不存在: {pdf_path}")
         
         try:
-            doc = fitz.open(pdf_path)
-            full_text = ""
-            
-            for page in doc:
-                full_text += page.get_text() + "\n"
-            
-            doc.close()
-            return full_text
-            
+            return extract_pdf_text(pdf_path, workers=workers or self.pdf_workers)
         except Exception as e:
             raise Exception(f"PDF处理错误: {e}") from e
     
@@ -64,71 +78,49 @@ class QuestionProcessor:
         Returns:
             Dict: 包含各题型信息的字典 {题型名: {"file_path": 路径, "text": 文本, "count": 预期题数}}
         """
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        splitter = split_lines_by_question_types(
+            text.split('\n'), self.section_mapping, output_dir, keep_text=True
+        )
+        return splitter.sections
+    
+    def split_pdf_by_question_types(
+        self,
+        pdf_path: str,
+        output_dir: str,
+        page_cache_path: Optional[str] = None,
+        doc_hash: Optional[str] = None,
+    ) -> Dict[str, Dict]:
+        """
+        逐页读取PDF并按题型流式拆分（不在内存中保留整份文本）
         
-        lines = text.split('\n')
-        question_type_sections = {}
-        
-        # 找到各题型的起始位置
-        section_positions = []
-        for i, line in enumerate(lines):
-            line = line.strip()
-            for type_name, type_info in self.QUESTION_TYPE_MAPPING.items():
-                if re.search(type_info["pattern"], line):
-                    # 提取预期题数
-                    count_match = re.search(r'[（(](\d+).*题[）)]', line)
-                    expected_count = int(count_match.group(1)) if count_match else 0
-                    
-                    section_positions.append({
-                        "type_name": type_name,
-                        "type_info": type_info,
-                        "line_index": i,
-                        "expected_count": expected_count,
-                        "section_line": line
-                    })
-                    print(f"找到题型: {type_name}，预期题数: {expected_count}")
-                    break
-        
-        # 按行号排序
-        section_positions.sort(key=lambda x: x["line_index"])
-        
-        # 提取各题型的文本内容
-        for i, section in enumerate(section_positions):
-            type_name = section["type_name"]
-            type_info = section["type_info"]
-            start_line = section["line_index"]
-            expected_count = section["expected_count"]
-            
-            # 确定结束位置（下一个题型的开始或文档结束）
-            if i + 1 < len(section_positions):
-                end_line = section_positions[i + 1]["line_index"]
-            else:
-                end_line = len(lines)
-            
-            # 提取该题型的文本
-            section_text = '\n'.join(lines[start_line:end_line])
-            
-            # 保存到markdown文件
-            filename = f"{type_info['name']}.md"
-            file_path = os.path.join(output_dir, filename)
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(f"# {type_name} ({expected_count}题)\n\n")
-                f.write(f"## 提取时间\n{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                f.write(f"## 预期题数\n{expected_count}\n\n")
-                f.write(f"## 原始文本\n\n```\n{section_text}\n```\n")
-            
-            question_type_sections[type_name] = {
-                "file_path": file_path,
-                "text": section_text,
-                "expected_count": expected_count,
-                "type_info": type_info
-            }
+        Args:
+            pdf_path: PDF文件路径
+            output_dir: 输出目录
+            page_cache_path: 按页文本缓存（SQLite）路径；为空时不使用缓存
+            doc_hash: PDF内容哈希（已计算时传入，避免重复读取文件）
             
-            print(f"✅ 保存 {type_name} 到: {file_path}")
+        Returns:
+            Dict: {题型名: {"file_path": 路径, "expected_count": 预期题数, "line_count": 行数, ...}}
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF文件不存在: {pdf_path}")
         
-        return question_type_sections
+        cache = PageCache(page_cache_path) if page_cache_path else None
+        try:
+            if cache:
+                pages = iter_cached_pdf_pages(pdf_path, cache, workers=self.pdf_workers, doc_hash=doc_hash)
+            else:
+                pages = iter_pdf_pages(pdf_path, workers=self.pdf_workers)
+            splitter = split_lines_by_question_types(iter_lines(pages), self.section_mapping, output_dir)
+        except Exception as e:
+            raise Exception(f"PDF处理错误: {e}") from e
+        finally:
+            if cache:
+                cache.close()
+        print(f"提取完成，共{splitter.char_count}字符")
+        if cache and cache.hits:
+            print(f"♻️  页缓存命中 {cache.hits} 页，新提取 {cache.misses} 页")
+        return splitter.sections
     
     def split_text_into_questions(self, text: str) -> List[str]:
         """将长文本分割成独立的题目块 - 改进版本支持多个section的重复编号"""
@@ -136,7 +128,7 @@ class QuestionProcessor:
             return []
         
         # 使用正则表达式找到所有题目编号位置
-        question_pattern = r'\n\s*(\d+)[.．、]\s*[（(]?'
+        question_pattern = r'\n' + QUESTION_NUMBER_PATTERN
         
         # 分割文本，但保留分割符
         parts = re.split(question_pattern, text)
@@ -248,21 +240,16 @@ class QuestionProcessor:
         
         return processed_questions
     
-    def split_questions_only(self, question_type_file: str, output_dir: str = None) -> int:
+    def read_question_type_file(self, question_type_file: str) -> Tuple[str, int, str]:
         """
-        仅将题型文件拆分为独立的题目文件，不进行AI处理
+        读取题型文件
         
-        Args:
-            question_type_file: 题型文件路径（markdown格式）
-            output_dir: 输出目录，如果不指定则使用默认目录
-            
         Returns:
-            int: 拆分出的题目数量
+            (题型名称, 预期题数, 原始文本)
         """
         if not os.path.exists(question_type_file):
             raise FileNotFoundError(f"题型文件不存在: {question_type_file}")
         
-        # 读取题型文件
         with open(question_type_file, 'r', encoding='utf-8') as f:
             content = f.read()
         
@@ -272,7 +259,6 @@ class QuestionProcessor:
         if "# " in content:
             type_line = content.split('\n')[0]
             type_name = type_line.replace('# ', '').split(' (')[0]
-            # 提取预期题数
             if '(' in type_line and '题)' in type_line:
                 count_part = type_line.split('(')[1].split('题)')[0]
                 try:
@@ -287,6 +273,40 @@ class QuestionProcessor:
             section_text = content[text_start:text_end]
         else:
             raise ValueError("无法从题型文件中提取原始文本")
+        return type_name, expected_count, section_text
+    
+    def split_questions_to_store(self, question_type_file: str, store: WorkStore) -> int:
+        """
+        将题型文件拆分为独立题目并写入打包存储（不生成逐题markdown文件）
+        
+        Args:
+            question_type_file: 题型文件路径（markdown格式）
+            store: 工作目录存储
+            
+        Returns:
+            int: 拆分出的题目数量
+        """
+        type_name, expected_count, section_text = self.read_question_type_file(question_type_file)
+        file_name = os.path.splitext(os.path.basename(question_type_file))[0]
+        store.put_section(type_name, file_name, expected_count, section_text)
+        
+        questions = self.split_text_into_questions(section_text)
+        count = store.replace_questions(type_name, questions)
+        print(f"✅ 从 {type_name} 中提取到 {count} 道题目 (预期: {expected_count})，已写入 {store.path}")
+        return count
+    
+    def split_questions_only(self, question_type_file: str, output_dir: str = None) -> int:
+        """
+        仅将题型文件拆分为独立的题目文件，不进行AI处理
+        
+        Args:
+            question_type_file: 题型文件路径（markdown格式）
+            output_dir: 输出目录，如果不指定则使用默认目录
+            
+        Returns:
+            int: 拆分出的题目数量
+        """
+        type_name, expected_count, section_text = self.read_question_type_file(question_type_file)
         
         print(f"开始拆分题型: {type_name}")
         print(f"预期题数: {expected_count}")
@@ -357,23 +377,7 @@ class QuestionProcessor:
         filename = f"question_{question_index:04d}.md"
         filepath = os.path.join(temp_dir, filename)
         
-        # 准备markdown内容
-        markdown_content = f"""# 题目 {question_index}
-
-## 原始文本
-
-```
-{question_text}
-```
-
-## 提取时间
-{__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-## 文本长度
-{len(question_text)} 字符
-
----
-"""
+        markdown_content = render_question_markdown(question_index, question_text)
         
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
@@ -444,81 +448,34 @@ class QuestionProcessor:
             # API调用或其他错误
             return None
     
+    # save_to_excel 的表头
+    EXCEL_HEADERS = ["序号", "题型", "难度", "题目", "选项A", "选项B", "选项C", "选项D", "选项E", "答案", "解析"]
+
+    @staticmethod
+    def _excel_row(index: int, question: Dict) -> List:
+        """单道题目对应的Excel行（选项最多支持A-E五个）。"""
+        options = list(question.get("options", []))[:5]
+        options += [""] * (5 - len(options))
+        return [
+            index,
+            question.get("question_type", ""),
+            question.get("difficulty", ""),
+            question.get("question_stem", ""),
+            *options,
+            question.get("answer", ""),
+            question.get("explanation", ""),
+        ]
+
     def save_to_excel(self, questions_data: List[Dict], output_path: str) -> None:
-        """将结构化数据保存到Excel文件"""
-        if not questions_data and not os.path.exists(output_path):
-            # 如果没有数据且不是基于现有模板，创建空的Excel文件
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "题库数据"
-            
-            # 设置表头
-            headers = ["序号", "题型", "难度", "题目", "选项A", "选项B", "选项C", "选项D", "选项E", "答案", "解析"]
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=1, column=col, value=header)
-            
-            try:
-                wb.save(output_path)
-            except Exception as e:
-                raise Exception(f"Excel文件保存失败: {e}") from e
-            return
-        
-        # 如果输出文件已存在，加载现有文件（作为模板）
-        if os.path.exists(output_path):
-            try:
-                wb = openpyxl.load_workbook(output_path)
-            except Exception as e:
-                # 如果加载失败，创建新的工作簿
-                wb = openpyxl.Workbook()
-        else:
-            wb = openpyxl.Workbook()
-        
-        ws = wb.active
-        if ws.title == "Sheet":
-            ws.title = "题库数据"
-        
-        # 设置表头（如果是新建的工作簿）
-        if ws.max_row == 1 and not ws.cell(row=1, column=1).value:
-            headers = ["序号", "题型", "难度", "题目", "选项A", "选项B", "选项C", "选项D", "选项E", "答案", "解析"]
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=1, column=col, value=header)
-        
-        # 找到数据开始行（表头后的第一个空行）
-        start_row = ws.max_row + 1 if ws.max_row > 1 else 2
-        
-        # 逐行写入题目数据
-        for idx, question in enumerate(questions_data):
-            row = start_row + idx
-            
-            # 序号
-            ws.cell(row=row, column=1, value=idx + 1)
-            
-            # 题型
-            ws.cell(row=row, column=2, value=question.get("question_type", ""))
-            
-            # 难度
-            ws.cell(row=row, column=3, value=question.get("difficulty", ""))
-            
-            # 题目
-            ws.cell(row=row, column=4, value=question.get("question_stem", ""))
-            
-            # 选项（最多支持5个选项A-E）
-            options = question.get("options", [])
-            for i in range(5):  # 选项A-E对应列5-9
-                if i < len(options):
-                    ws.cell(row=row, column=5+i, value=options[i])
-                else:
-                    ws.cell(row=row, column=5+i, value="")
-            
-            # 答案
-            ws.cell(row=row, column=10, value=question.get("answer", ""))
-            
-            # 解析
-            ws.cell(row=row, column=11, value=question.get("explanation", ""))
-        
-        # 保存文件
+        """
+        将结构化数据保存到Excel文件
+
+        新建文件时以流式（write-only）模式逐行写入；输出文件已存在时（如作为模板）载入后在其
+        活动工作表末尾追加，模板的格式保持不变。
+        """
+        rows = (self._excel_row(idx, question) for idx, question in enumerate(questions_data, 1))
         try:
-            wb.save(output_path)
+            append_rows_to_excel(output_path, self.EXCEL_HEADERS, rows, "题库数据")
         except Exception as e:
             raise Exception(f"Excel文件保存失败: {e}") from e
     
@@ -533,6 +490,8 @@ class QuestionProcessor:
         """
         base_name = os.path.splitext(os.path.basename(pdf_path))[0]
         work_dir = f"question_processing_{base_name}"
+        if self.work_root:
+            work_dir = os.path.join(self.work_root, work_dir)
         
         if not os.path.exists(work_dir):
             os.makedirs(work_dir)
@@ -547,12 +506,14 @@ class QuestionProcessor:
             print("步骤1: 提取PDF文本并按题型拆分")
             print("="*50)
             
-            full_text = self.extract_text_from_pdf(pdf_path)
-            print(f"提取完成，共{len(full_text)}字符")
-            
-            # 按题型拆分
+            # 逐页读取（按内容哈希复用已提取的页）、按行流式拆分题型
             type_sections_dir = os.path.join(work_dir, "question_types")
-            question_type_sections = self.split_text_by_question_types(full_text, type_sections_dir)
+            doc_hash = file_sha256(pdf_path)
+            question_type_sections = self.split_pdf_by_question_types(
+                pdf_path, type_sections_dir,
+                page_cache_path=os.path.join(work_dir, PAGE_CACHE_FILE), doc_hash=doc_hash
+            )
+            write_source_record(work_dir, doc_hash, os.path.basename(pdf_path))
             
             print(f"\n✅ 按题型拆分完成，共找到 {len(question_type_sections)} 个题型")
             for type_name, info in question_type_sections.items():
@@ -580,10 +541,14 @@ class QuestionProcessor:
             total_questions = 0
             split_summary = []
             
-            # 拆分每个题型文件
+            # 拆分每个题型文件（store 格式写入打包存储，markdown 格式每题一个文件）
+            store = WorkStore.for_work_dir(work_dir) if self.work_format == WORK_FORMAT_STORE else None
             for type_file in sorted(type_files):
                 try:
-                    question_count = self.split_questions_only(type_file)
+                    if store:
+                        question_count = self.split_questions_to_store(type_file, store)
+                    else:
+                        question_count = self.split_questions_only(type_file)
                     total_questions += question_count
                     
                     # 记录拆分信息
@@ -598,6 +563,8 @@ class QuestionProcessor:
                 except Exception as e:
                     print(f"❌ 拆分题型文件 {type_file} 时出错: {e}")
                     continue
+            if store:
+                store.close()
             
             print(f"\n✅ 所有题型拆分完成，共拆分出 {total_questions} 道独立题目")
             
@@ -615,21 +582,30 @@ class QuestionProcessor:
                     f.write(f"### {info['type']}\n")
                     f.write(f"- 文件: {info['file']}\n")
                     f.write(f"- 题目数: {info['count']} 道\n")
-                    f.write(f"- 目录: {info['type'].lower().replace(' ', '_')}_questions/\n\n")
+                    if store:
+                        f.write(f"- 存储: {WORK_STORE_FILE}\n\n")
+                    else:
+                        f.write(f"- 目录: {info['type'].lower().replace(' ', '_')}_questions/\n\n")
                 
                 f.write(f"## 目录结构\n")
                 f.write(f"```\n")
                 f.write(f"{work_dir}/\n")
                 f.write(f"├── question_types/          # 题型分类文件\n")
-                for info in split_summary:
-                    f.write(f"├── {info['type'].lower().replace(' ', '_')}_questions/  # {info['count']}个题目文件\n")
+                if store:
+                    f.write(f"├── {WORK_STORE_FILE}       # 全部题型的题目（共{total_questions}道）\n")
+                else:
+                    for info in split_summary:
+                        f.write(f"├── {info['type'].lower().replace(' ', '_')}_questions/  # {info['count']}个题目文件\n")
                 f.write(f"└── split_summary.md         # 本报告\n")
                 f.write(f"```\n")
             
             print(f"📊 总结报告已保存到: {summary_file}")
             print(f"\n📁 各题型题目详情:")
             for info in split_summary:
-                questions_dir = os.path.join(work_dir, f"{info['type'].lower().replace(' ', '_')}_questions")
+                if store:
+                    questions_dir = os.path.join(work_dir, WORK_STORE_FILE)
+                else:
+                    questions_dir = os.path.join(work_dir, f"{info['type'].lower().replace(' ', '_')}_questions")
                 print(f"  📂 {info['type']}: {info['count']} 道题目 -> {questions_dir}")
         
         if step in ["process", "full"]:
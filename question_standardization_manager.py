@@ -6,6 +6,7 @@
 import os
 from typing import Dict, List
 from config import Config
+from utils.question_reconciler import fill_question_gaps
 
 # 导入所有标准化器
 from single_choice_standardizer import SingleChoiceStandardizer
@@ -79,13 +80,14 @@ class QuestionStandardizationManager:
                 available.append(info["name"])
         return available
     
-    def standardize_single_type(self, type_file: str, custom_config: Dict = None) -> Dict:
+    def standardize_single_type(self, type_file: str, custom_config: Dict = None, reconcile: bool = True) -> Dict:
         """
         标准化单个题型文件
         
         Args:
             type_file: 题型文件路径
             custom_config: 自定义配置
+            reconcile: 标准化后按源题号对账，只补跑缺失题目所在的行区间
             
         Returns:
             处理结果统计
@@ -118,6 +120,12 @@ class QuestionStandardizationManager:
         print(f"🚀 开始标准化 {type_info['name']} (预期: {type_info['expected_count']} 题)")
         result = standardizer.standardize_file(type_file)
         
+        # 按源题号对账：预期数量只是参考，缺失/重复以源文本题号为准
+        if reconcile:
+            report = fill_question_gaps(standardizer, type_file)
+            result["total_questions"] += report.recovered
+            result["reconciliation"] = report.to_dict()
+        
         # 添加预期数量信息
         result["expected_count"] = type_info["expected_count"]
         result["extraction_rate"] = (result["total_questions"] / type_info["expected_count"] * 100) if type_info["expected_count"] > 0 else 0
@@ -172,6 +180,11 @@ class QuestionStandardizationManager:
                 total_chunks += result["total_chunks"]
                 
                 print(f"✅ {type_info['name']} 完成: {result['total_questions']}/{result['expected_count']} 题 ({result['extraction_rate']:.1f}%)")
+                reconciliation = result.get("reconciliation")
+                if reconciliation and reconciliation["missing"]:
+                    print(f"⚠️ {type_info['name']} 仍缺失题号: {', '.join(reconciliation['missing'][:20])}")
+                if reconciliation and reconciliation["duplicates"]:
+                    print(f"⚠️ {type_info['name']} 重复输出的题号: {', '.join(reconciliation['duplicates'])}")
                 
             except Exception as e:
                 print(f"❌ {type_info['name']} 处理失败: {e}")
@@ -254,11 +267,10 @@ def main():
         # 默认处理当前目录下的题型文件
         base_dir = "question_processing_《数据安全管理员题库》（客观题）-20250713（提交版）/question_types"
         if os.path.exists(base_dir):
-            # 设置一些自定义配置
+            # 按token预算切分：各题型的输出/输入比例已在标准化器默认配置中设置，
+            # 这里只按题目篇幅放宽主观题的单块输入上限
             custom_configs = {
-                "single_choice.md": {"lines_per_chunk": 80},  # 单选题用稍大的chunk
-                "case_analysis.md": {"lines_per_chunk": 200}, # 案例分析题用更大的chunk
-                "judgment.md": {"lines_per_chunk": 100}       # 判断题用中等的chunk
+                "case_analysis.md": {"max_input_tokens": 5000},  # 案例分析题单题较长
             }
             
             result = manager.standardize_all_types(base_dir, custom_configs)
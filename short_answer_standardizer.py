@@ -8,19 +8,24 @@ import os
 import json
 import re
 import openai
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict
 from datetime import datetime
 from config import Config
 from utils.standardization_utils import (
-    chunk_file_by_lines,
+    chunk_type_file,
+    NO_NEXT_SLICE,
     call_openai_with_retries,
     split_questions_by_separator,
     save_markdown_chunk_result,
     save_original_chunk_file,
     list_standardized_chunk_files,
     extract_codeblocks_from_markdown,
+    merge_chunk_questions,
     write_excel,
 )
+from utils.chunk_runner import run_standardization
+from utils.tabular_export import export_questions
+from utils.workbook_export import QUESTION_HEADERS, question_row
 
 
 class ShortAnswerStandardizer:
@@ -34,15 +39,38 @@ class ShortAnswerStandardizer:
             api_base = api_base or config.get('api_base', 'https://api.openai.com/v1')
             model = model or config.get('model', 'gpt-4o')
 
-        self.client = openai.OpenAI(api_key=api_key, base_url=api_base)
+        # OpenAI 客户端首次调用模型时才创建，只解析或导出已有结果时不需要API密钥
+        self._client = None
+        self._client_args = {"api_key": api_key, "base_url": api_base}
         self.model = model
         self.config = self.get_default_config()
 
+    @property
+    def client(self) -> openai.OpenAI:
+        """OpenAI 客户端（首次访问时创建）"""
+        if self._client is None:
+            # SDK 内置重试关闭，限流与退避统一由 call_openai_with_retries 处理
+            self._client = openai.OpenAI(max_retries=0, **self._client_args)
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+
     def get_default_config(self) -> Dict:
         return {
             "lines_per_chunk": 120,
+            "chunk_strategy": "tokens",
+            "max_input_tokens": 3000,
+            "max_output_tokens": 8000,
+            "output_token_ratio": 1.3,
             "overlap_lines": 10,
             "max_retries": 3,
+            "max_workers": 4,
+            "stream": False,
+            "repair_missing": True,
+            "extraction_mode": "verbatim",
+            "resume": True,
             "preserve_original": True,
             "output_format": "markdown",
         }
@@ -68,11 +96,11 @@ class ShortAnswerStandardizer:
 
     def chunk_file(self, file_path: str) -> List[tuple]:
         """将文件按行数切分"""
-        return chunk_file_by_lines(file_path, self.config["lines_per_chunk"])
+        return chunk_type_file(file_path, self.config)
 
     def create_standardization_prompt(self, chunk1: List[str], chunk2: Optional[List[str]] = None) -> str:
         current_slice = ''.join(chunk1)
-        next_slice = ''.join(chunk2) if chunk2 else ""
+        next_slice = ''.join(chunk2) if chunk2 else NO_NEXT_SLICE
 
         prompt = f"""**角色**: 你是一个高精度的文本流处理引擎，核心任务是在分块数据流中，以**绝对保真**的方式，识别、重组和格式化文本单元。你的任何操作都不能改变原文的措辞和结构。
 
@@ -164,13 +192,15 @@ class ShortAnswerStandardizer:
 
         return prompt
 
-    def call_ai_standardization(self, prompt: str) -> Optional[str]:
+    def call_ai_standardization(self, prompt: str, on_question: Optional[Callable[[str], None]] = None) -> Optional[str]:
         return call_openai_with_retries(
             client=self.client,
             model=self.model,
             prompt=prompt,
             max_retries=self.config["max_retries"],
             temperature=0.1,
+            stream=self.config.get("stream", False),
+            on_question=on_question,
         )
 
     def parse_standardized_result(self, ai_response: str) -> List[str]:
@@ -192,63 +222,10 @@ class ShortAnswerStandardizer:
         )
 
     def standardize_file(self, input_file: str, output_dir: str = None) -> Dict:
-        if output_dir is None:
-            base_dir = os.path.dirname(input_file)
-            output_dir = os.path.join(base_dir, f"{self.get_question_type_name()}_standardized")
-
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-
-        print(f"🚀 开始标准化 {self.get_question_type_name()}")
-        print(f"📁 输入文件: {input_file}")
-        print(f"📁 输出目录: {output_dir}")
-
-        if self.config["preserve_original"]:
-            backup_file = os.path.join(output_dir, "original_backup.md")
-            os.system(f'cp "{input_file}" "{backup_file}"')
-            print(f"💾 原文件已备份到: {backup_file}")
-
-        print(f"🔪 正在切分文件...")
-        chunks = self.chunk_file(input_file)
-        print(f"📝 文件已切分为 {len(chunks)} 个块")
-
-        if self.config["preserve_original"]:
-            print(f"💾 正在保存原始分块文件...")
-            for i, (chunk1, chunk2) in enumerate(chunks, 1):
-                self.save_original_chunk(i, chunk1, chunk2, output_dir)
-
-        total_questions = 0
-        for i, (chunk1, chunk2) in enumerate(chunks, 1):
-            print(f"\n🔄 处理 Chunk {i}/{len(chunks)}")
-            prompt = self.create_standardization_prompt(chunk1, chunk2)
-            ai_response = self.call_ai_standardization(prompt)
-            if ai_response is None:
-                print(f"❌ Chunk {i} AI调用失败，跳过")
-                continue
-            questions = self.parse_standardized_result(ai_response)
-            self.save_chunk_results(i, questions, output_dir)
-            total_questions += len(questions)
-
-        quality_stats = {
-            "question_type": self.get_question_type_name(),
-            "total_chunks": len(chunks),
-            "total_questions": total_questions,
-            "processing_time": datetime.now().isoformat(),
-            "config": self.config,
-        }
-
-        stats_file = os.path.join(output_dir, "quality_stats.json")
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            json.dump(quality_stats, f, ensure_ascii=False, indent=2)
-
-        print(f"\n🎉 {self.get_question_type_name()} 标准化完成！")
-        print(f"📊 总计处理: {len(chunks)} 个块, {total_questions} 道题目")
-        print(f"📁 结果保存在: {output_dir}")
-
-        return quality_stats
+        return run_standardization(self, input_file, output_dir)
 
     def extract_questions_from_standardized_files(self, standardized_dir: str) -> List[Dict]:
-        questions: List[Dict] = []
+        chunks: List[List[Dict]] = []
         chunk_files = list_standardized_chunk_files(standardized_dir)
         print(f"🔍 找到 {len(chunk_files)} 个标准化文件")
 
@@ -258,11 +235,15 @@ class ShortAnswerStandardizer:
                 content = f.read()
 
             blocks = extract_codeblocks_from_markdown(content)
+            chunk_questions: List[Dict] = []
             for block in blocks:
                 question_data = self.parse_question_block(block)
                 if question_data:
-                    questions.append(question_data)
+                    chunk_questions.append(question_data)
+            chunks.append(chunk_questions)
 
+        # lines 策略下相邻chunk可能在交界处重复输出同一道题，合并时保留更完整的一份
+        questions = merge_chunk_questions(chunks, self.config)
         print(f"✅ 总共提取 {len(questions)} 道题目")
         return questions
 
@@ -305,32 +286,10 @@ class ShortAnswerStandardizer:
             return None
 
     def create_excel_file(self, questions: List[Dict], output_path: str):
-        headers = [
-            '代码', '题型', '难度', '题干',
-            '选择项A', '选择项B', '选择项C', '选择项D', '选择项E',
-            '答案', '分数', '题目一致性'
-        ]
-
-        rows: List[List[str]] = []
-        for q in questions:
-            rows.append([
-                q.get('code', ''),
-                q.get('question_type', ''),
-                q.get('difficulty', ''),
-                q.get('question_stem', ''),
-                q.get('option_A', ''),
-                q.get('option_B', ''),
-                q.get('option_C', ''),
-                q.get('option_D', ''),
-                q.get('option_E', ''),
-                q.get('answer', ''),
-                q.get('score', ''),
-                q.get('consistency', ''),
-            ])
-
-        write_excel(headers=headers, rows=rows, sheet_title="简答题", output_path=output_path)
-
-    def process_standardized_to_excel(self, standardized_dir: str, output_dir: str = None) -> Optional[str]:
+        rows = [question_row(q) for q in questions]
+        write_excel(headers=QUESTION_HEADERS, rows=rows, sheet_title="简答题", output_path=output_path)
+
+    def process_standardized_to_excel(self, standardized_dir: str, output_dir: str = None, formats: Optional[List[str]] = None) -> Optional[str]:
         if output_dir is None:
             output_dir = standardized_dir
 
@@ -351,11 +310,13 @@ class ShortAnswerStandardizer:
         excel_path = os.path.join(output_dir, excel_filename)
 
         self.create_excel_file(questions, excel_path)
+        export_files = export_questions(questions, excel_path, formats) if formats else {}
 
         stats = {
             "question_type": self.get_question_type_name(),
             "total_questions": len(questions),
             "excel_file": excel_path,
+            "export_files": export_files,
             "processing_time": datetime.now().isoformat(),
         }
         stats_file = os.path.join(output_dir, f"excel_generation_stats_{timestamp}.json")
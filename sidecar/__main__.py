@@ -4,5 +4,9 @@ Sidecar 包的主入口点
 """
 
 if __name__ == "__main__":
+    import multiprocessing
+
+    # 打包后的可执行文件中，--jobs / PDF_WORKERS 的子进程需要由此接管
+    multiprocessing.freeze_support()
     from sidecar.main import main
     main()
\ No newline at end of file
@@ -11,6 +11,8 @@ class RunConfig:
     output: Path | None = None
     output_dir: Path | None = None
     mock: bool = False
+    formats: tuple[str, ...] = ()
+    jobs: int = 1
 
     @staticmethod
     def from_args(
@@ -19,6 +21,8 @@ class RunConfig:
         output: str | None,
         output_dir: str | None,
         mock: bool,
+        formats: Iterable[str] | None = None,
+        jobs: int | None = None,
     ) -> "RunConfig":
         input_paths: list[Path] = []
         if inputs:
@@ -31,6 +35,8 @@ class RunConfig:
             output=Path(output) if output else None,
             output_dir=Path(output_dir) if output_dir else None,
             mock=mock,
+            formats=tuple(dict.fromkeys(formats or ())),
+            jobs=max(1, jobs or 1),
         )
 
 
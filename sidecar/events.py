@@ -16,6 +16,8 @@ class SidecarEvent(BaseModel):
     fileId: str
     message: str | None = None
     percent: float | None = None
+    # metric 事件的指标（扁平的 名称→数值/字符串）
+    data: dict[str, float | int | str | None] | None = None
 
     @field_validator("percent")
     @classmethod
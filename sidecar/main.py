@@ -10,14 +10,19 @@ from pathlib import Path
 
 from .events import SidecarEvent
 from .config import RunConfig
-from .runner import run_split_and_split_questions
+from .runner import process_input, run_inputs_parallel
+from .server import JobRequest, serve
 
 
-def emit(event: SidecarEvent):
-    print(event.to_json())
+def write_line(line: str):
+    print(line)
     sys.stdout.flush()
 
 
+def emit(event: SidecarEvent):
+    write_line(event.to_json())
+
+
 def mock_pipeline(input_path: Path, output_path: Path, file_id: str):
     stages = [
         ("split", 0.15),
@@ -34,6 +39,14 @@ def mock_pipeline(input_path: Path, output_path: Path, file_id: str):
     emit(SidecarEvent(type="completed", stage="done", fileId=file_id, message=str(output_path)))
 
 
+def run_job(request: JobRequest) -> None:
+    """执行常驻模式中的一个 run 请求（工作目录建在当前目录下）。"""
+    if request.mock:
+        mock_pipeline(request.input, request.output or Path("/tmp/result.xlsx"), request.file_id)
+        return
+    process_input(request.input, Path.cwd(), emit, request.file_id, request.formats)
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="ExamParse sidecar")
     parser.add_argument("--input", type=str, required=False, help="单个输入文件")
@@ -41,9 +54,18 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument("--output", type=str, required=False, help="单个输出文件")
     parser.add_argument("--output-dir", type=str, required=False, help="输出目录（多输入时使用）")
     parser.add_argument("--mock", action="store_true", help="运行模拟流水线")
+    parser.add_argument("--formats", nargs="*", choices=["csv", "jsonl", "parquet"], default=None,
+                        help="额外导出格式：把已标准化的题目写出为 CSV / JSONL / Parquet（Parquet 需要 pyarrow）")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="多输入时并发处理的进程数（默认 1，逐个处理）")
+    parser.add_argument("--serve", action="store_true",
+                        help="常驻模式：从 stdin 逐行读取 JSON 任务请求，事件写到 stdout（见 sidecar/EVENTS.md）")
     args = parser.parse_args(argv)
 
-    cfg = RunConfig.from_args(args.inputs, args.input, args.output, args.output_dir, args.mock)
+    if args.serve:
+        return serve(sys.stdin, emit, run_job)
+
+    cfg = RunConfig.from_args(args.inputs, args.input, args.output, args.output_dir, args.mock, args.formats, args.jobs)
 
     # 校验输入
     if not cfg.inputs:
@@ -69,26 +91,20 @@ def main(argv: list[str] | None = None) -> int:
         return 0
 
     # 真实执行：当前仅打通 split + split-questions
+    work_parent = Path.cwd()
+    if cfg.jobs > 1 and len(cfg.inputs) > 1:
+        # 多进程：worker 的事件经队列回到主进程，由主进程逐行写出
+        results = run_inputs_parallel(
+            [(ip, uuid.uuid4().hex) for ip in cfg.inputs],
+            work_dir_parent=work_parent,
+            write_line=write_line,
+            jobs=cfg.jobs,
+            formats=cfg.formats,
+        )
+        return 2 if any(results.values()) else 0
     try:
-        if len(cfg.inputs) == 1:
-            file_id = uuid.uuid4().hex
-            work_parent = Path.cwd()
-            run_split_and_split_questions(
-                pdf_path=cfg.inputs[0],
-                work_dir_parent=work_parent,
-                emit=emit,
-                file_id=file_id,
-            )
-        else:
-            work_parent = Path.cwd()
-            for ip in cfg.inputs:
-                file_id = uuid.uuid4().hex
-                run_split_and_split_questions(
-                    pdf_path=ip,
-                    work_dir_parent=work_parent,
-                    emit=emit,
-                    file_id=file_id,
-                )
+        for ip in cfg.inputs:
+            process_input(ip, work_parent, emit, uuid.uuid4().hex, cfg.formats)
         return 0
     except Exception as exc:
         emit(SidecarEvent(type="error", stage="runtime", fileId="runtime", message=str(exc)))
@@ -1,22 +1,18 @@
 from __future__ import annotations
 
-import os
-from contextlib import contextmanager
+import multiprocessing
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
-from typing import Callable
+from queue import Empty
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
 import time
 
-from .events import SidecarEvent
-
+from utils.metrics import RUN_METRICS_FILE, RunMetrics, get_llm_stats
 
-@contextmanager
-def _temp_chdir(target: Path):
-    original = Path.cwd()
-    try:
-        os.chdir(target)
-        yield
-    finally:
-        os.chdir(original)
+from .events import SidecarEvent
 
 
 def run_split_and_split_questions(
@@ -24,56 +20,313 @@ def run_split_and_split_questions(
     work_dir_parent: Path,
     emit: Callable[[SidecarEvent], None],
     file_id: str,
+    metrics: RunMetrics | None = None,
 ) -> Path:
     """
     运行真实核心：先执行 split，再执行 split-questions。
 
-    返回工作目录路径（question_processing_{base}）。
+    所有路径都基于 work_dir_parent 显式给出，不切换进程工作目录，多个文件可以并发处理。
+    各阶段耗时与页数/题数计入 metrics；未传入时由本函数在结束前输出 metric 事件并写出 run_metrics.json。
+    返回工作目录路径（work_dir_parent/question_processing_{base}）。
     """
-    # 延迟导入避免 UI 端 import 时拉入重依赖
-    from question_processor import QuestionProcessor
+    owns_metrics = metrics is None
+    metrics = metrics or RunMetrics()
+    # 延迟导入避免 UI 端 import 时拉入重依赖（导入时的打印转到 stderr）
+    with redirect_stdout(sys.stderr):
+        from question_processor import QuestionProcessor
+        from utils.page_cache import file_sha256, find_work_dir_by_hash, read_source_record, write_source_record
 
+    work_dir_parent = work_dir_parent.resolve()
     work_dir_parent.mkdir(parents=True, exist_ok=True)
+    pdf_path = pdf_path.resolve()
+
+    base_name = pdf_path.stem
+    work_dir = work_dir_parent / f"question_processing_{base_name}"
 
-    with _temp_chdir(work_dir_parent):
-        base_name = pdf_path.stem
-        work_dir = Path(f"question_processing_{base_name}")
+    processor = QuestionProcessor(work_root=str(work_dir_parent))
 
-        processor = QuestionProcessor()
+    def run_step(step: str):
+        # 核心流程的打印转到 stderr，stdout 只保留事件流
+        with redirect_stdout(sys.stderr):
+            processor.process_questions(str(pdf_path), output_path=str(work_dir / "dummy.xlsx"), step=step)
 
-        # 全量缓存：若 split_summary.md 已存在，直接跳过两步
-        summary = work_dir / "split_summary.md"
-        if summary.exists():
+    # 按内容哈希识别：同名但内容已变化的PDF不复用旧产物；改名的相同文件直接复用
+    doc_hash = file_sha256(str(pdf_path))
+    record = read_source_record(str(work_dir))
+    summary = work_dir / "split_summary.md"
+    # 没有 source.json 的旧工作目录无法确认来自同一份PDF，同样视为过期重新提取
+    stale = work_dir.exists() and (record is None or record["sha256"] != doc_hash)
+    if stale:
+        reason = "source changed" if record is not None else "no source record"
+        emit(SidecarEvent(type="warning", stage="split", fileId=file_id, message=f"{reason}, re-extracting"))
+        summary.unlink(missing_ok=True)
+    elif not work_dir.exists():
+        twin = find_work_dir_by_hash(str(work_dir_parent), doc_hash)
+        if twin:
+            emit(SidecarEvent(type="stage", stage="split", fileId=file_id, message=f"reuse {Path(twin).name} (identical content)"))
+            shutil.copytree(twin, work_dir)
+
+    # 全量缓存：若 split_summary.md 已存在，直接跳过两步
+    if summary.exists():
+        emit(SidecarEvent(type="stage", stage="split", fileId=file_id, message="skip split (cache)"))
+        emit(SidecarEvent(type="progress", stage="split", fileId=file_id, percent=1.0))
+        emit(SidecarEvent(type="stage", stage="split-questions", fileId=file_id, message="skip split-questions (cache)"))
+        emit(SidecarEvent(type="progress", stage="split-questions", fileId=file_id, percent=1.0))
+    else:
+        # 缓存判断：若 question_types 已存在，则跳过 split
+        question_types_dir = work_dir / "question_types"
+        if question_types_dir.exists() and not stale:
             emit(SidecarEvent(type="stage", stage="split", fileId=file_id, message="skip split (cache)"))
             emit(SidecarEvent(type="progress", stage="split", fileId=file_id, percent=1.0))
-            emit(SidecarEvent(type="stage", stage="split-questions", fileId=file_id, message="skip split-questions (cache)"))
-            emit(SidecarEvent(type="progress", stage="split-questions", fileId=file_id, percent=1.0))
         else:
-            # 缓存判断：若 question_types 已存在，则跳过 split
-            question_types_dir = work_dir / "question_types"
-            if question_types_dir.exists():
-                emit(SidecarEvent(type="stage", stage="split", fileId=file_id, message="skip split (cache)"))
-                emit(SidecarEvent(type="progress", stage="split", fileId=file_id, percent=1.0))
+            emit(SidecarEvent(type="stage", stage="split", fileId=file_id, message="start split"))
+            emit(SidecarEvent(type="progress", stage="split", fileId=file_id, percent=0.05))
+            with metrics.stage("split"):
+                _run_with_retry(lambda: run_step("split"), emit, file_id, "split", metrics=metrics)
+            emit(SidecarEvent(type="progress", stage="split", fileId=file_id, percent=0.5))
+            emit(SidecarEvent(type="progress", stage="split", fileId=file_id, percent=1.0))
+
+        # 步骤2：split-questions（将题型文件拆为题目）
+        emit(SidecarEvent(type="stage", stage="split-questions", fileId=file_id, message="start split-questions"))
+        emit(SidecarEvent(type="progress", stage="split-questions", fileId=file_id, percent=0.1))
+        with metrics.stage("split-questions"):
+            _run_with_retry(lambda: run_step("split-questions"), emit, file_id, "split-questions", metrics=metrics)
+        emit(SidecarEvent(type="progress", stage="split-questions", fileId=file_id, percent=1.0))
+
+    write_source_record(str(work_dir), doc_hash, pdf_path.name)
+    pages = _count_pages(work_dir, doc_hash)
+    if pages is not None:
+        metrics.record("split", pages=pages)
+    questions = _count_questions(work_dir)
+    if questions is not None:
+        metrics.record("split-questions", questions=questions)
+    if owns_metrics:
+        emit_run_metrics(metrics, work_dir, emit, file_id)
+
+    # 完成事件，返回工作目录
+    emit(SidecarEvent(type="completed", stage="done", fileId=file_id, message=str(work_dir)))
+
+    return work_dir
+
+
+def process_input(
+    pdf_path: Path,
+    work_dir_parent: Path,
+    emit: Callable[[SidecarEvent], None],
+    file_id: str,
+    formats: Iterable[str] = (),
+) -> Path:
+    """处理单个输入：split + split-questions，给出 formats 时再导出已标准化的题目；最后一次性输出指标。"""
+    metrics = RunMetrics()
+    work_dir = run_split_and_split_questions(
+        pdf_path=pdf_path, work_dir_parent=work_dir_parent, emit=emit, file_id=file_id, metrics=metrics
+    )
+    formats = list(formats)
+    if formats:
+        with metrics.stage("export") as values:
+            values["files"] = len(export_standardized_questions(work_dir, formats, emit, file_id))
+    emit_run_metrics(metrics, work_dir, emit, file_id)
+    return work_dir
+
+
+def _count_pages(work_dir: Path, doc_hash: str) -> int | None:
+    """页数取自按页缓存（split 完成时记录）。"""
+    from utils.page_cache import PAGE_CACHE_FILE, PageCache
+
+    cache_path = work_dir / PAGE_CACHE_FILE
+    if not cache_path.exists():
+        return None
+    cache = PageCache(str(cache_path))
+    try:
+        return cache.page_count(doc_hash)
+    finally:
+        cache.close()
+
+
+def _count_questions(work_dir: Path) -> int | None:
+    """题数取自打包存储；沿用逐题 markdown 时统计 question_NNNN.md。"""
+    from utils.work_store import WORK_STORE_FILE, WorkStore
+
+    store_path = work_dir / WORK_STORE_FILE
+    if store_path.exists():
+        with WorkStore(str(store_path)) as store:
+            return store.question_count()
+    question_files = list((work_dir / "question_types").glob("*_questions/question_*.md"))
+    return len(question_files) if question_files else None
+
+
+def emit_run_metrics(
+    metrics: RunMetrics,
+    work_dir: Path,
+    emit: Callable[[SidecarEvent], None],
+    file_id: str,
+) -> Dict:
+    """
+    写出 work_dir/run_metrics.json，并批量输出 metric 事件：每个阶段一条，外加 stage="done" 的汇总
+    （总耗时、RSS 峰值，本进程有 LLM 调用时含延迟分位数、token 与重试数）。
+    """
+    report = metrics.write(str(work_dir / RUN_METRICS_FILE), get_llm_stats())
+    for stage, values in report["stages"].items():
+        emit(SidecarEvent(type="metric", stage=stage, fileId=file_id, data=values))
+    emit(SidecarEvent(type="metric", stage="done", fileId=file_id, data=report["summary"]))
+    return report
+
+
+# 进程池 worker 中的事件队列：事件序列化为 JSON 行交给主进程，由主进程统一写 stdout，
+# 多个 fileId 的事件按行交错而不会在行内混杂
+_EVENT_QUEUE = None
+_TASK_DONE = None
+
+
+def _init_worker(queue) -> None:
+    global _EVENT_QUEUE
+    _EVENT_QUEUE = queue
+    # worker 不直接写 stdout，任何打印都转到 stderr
+    sys.stdout = sys.stderr
+
+
+def _queue_emit(event: SidecarEvent) -> None:
+    _EVENT_QUEUE.put(event.to_json())
+
+
+def _process_group(
+    group: List[Tuple[Path, str]],
+    work_dir_parent: Path,
+    formats: Tuple[str, ...],
+) -> List[Tuple[str, str | None]]:
+    """worker：按顺序处理一组输入（同名文件共用工作目录，必须串行），返回 [(fileId, 错误信息)]。"""
+    results = []
+    try:
+        for pdf_path, file_id in group:
+            try:
+                process_input(pdf_path, work_dir_parent, _queue_emit, file_id, formats)
+                results.append((file_id, None))
+            except Exception as exc:  # noqa: BLE001
+                _queue_emit(SidecarEvent(type="error", stage="runtime", fileId=file_id, message=str(exc)))
+                results.append((file_id, str(exc)))
+    finally:
+        # 组结束标记：排在该 worker 的全部事件之后
+        _EVENT_QUEUE.put(_TASK_DONE)
+    return results
+
+
+def run_inputs_parallel(
+    inputs: Sequence[Tuple[Path, str]],
+    work_dir_parent: Path,
+    write_line: Callable[[str], None],
+    jobs: int,
+    formats: Iterable[str] = (),
+) -> Dict[str, str | None]:
+    """
+    把多个输入分发到进程池并发处理
+
+    Args:
+        inputs: [(PDF路径, fileId)]
+        work_dir_parent: 各工作目录的上级目录
+        write_line: 写出一行事件 JSON（仅在主进程调用）
+        jobs: 进程数上限
+        formats: 额外导出格式
+
+    Returns:
+        {fileId: 错误信息（成功为 None）}
+    """
+    groups: Dict[str, List[Tuple[Path, str]]] = {}
+    for pdf_path, file_id in inputs:
+        groups.setdefault(pdf_path.stem, []).append((pdf_path, file_id))
+    formats = tuple(formats)
+    results: Dict[str, str | None] = {}
+
+    queue = multiprocessing.Queue()
+    workers = max(1, min(jobs, len(groups)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(queue,)) as pool:
+        futures = [pool.submit(_process_group, group, work_dir_parent, formats) for group in groups.values()]
+        pending = len(futures)
+        while pending:
+            try:
+                line = queue.get(timeout=0.1)
+            except Empty:
+                # worker 异常退出时收不到结束标记，全部任务结束且队列已空即停止等待
+                if all(f.done() for f in futures):
+                    break
+                continue
+            if line is _TASK_DONE:
+                pending -= 1
             else:
-                emit(SidecarEvent(type="stage", stage="split", fileId=file_id, message="start split"))
-                emit(SidecarEvent(type="progress", stage="split", fileId=file_id, percent=0.05))
-                _run_with_retry(lambda: processor.process_questions(str(pdf_path), output_path=str(work_dir / "dummy.xlsx"), step="split"), emit, file_id, "split")
-                emit(SidecarEvent(type="progress", stage="split", fileId=file_id, percent=0.5))
-                emit(SidecarEvent(type="progress", stage="split", fileId=file_id, percent=1.0))
+                write_line(line)
+        for future, group in zip(futures, groups.values()):
+            try:
+                results.update(future.result())
+            except Exception as exc:  # noqa: BLE001
+                for _, file_id in group:
+                    write_line(SidecarEvent(type="error", stage="runtime", fileId=file_id, message=str(exc)).to_json())
+                    results[file_id] = str(exc)
+    queue.close()
+    return results
+
+
+# 标准化器实例（含按需创建的 OpenAI 客户端及其连接池）在进程内复用，常驻模式下后续任务无需重建
+_HANDLERS: list | None = None
+
 
-            # 步骤2：split-questions（将题型文件拆为题目）
-            emit(SidecarEvent(type="stage", stage="split-questions", fileId=file_id, message="start split-questions"))
-            emit(SidecarEvent(type="progress", stage="split-questions", fileId=file_id, percent=0.1))
-            _run_with_retry(lambda: processor.process_questions(str(pdf_path), output_path=str(work_dir / "dummy.xlsx"), step="split-questions"), emit, file_id, "split-questions")
-            emit(SidecarEvent(type="progress", stage="split-questions", fileId=file_id, percent=1.0))
+def _standardizer_handlers() -> list:
+    global _HANDLERS
+    if _HANDLERS is None:
+        # 延迟导入：标准化器会拉入 openai 依赖
+        from single_choice_standardizer import SingleChoiceStandardizer
+        from multiple_choice_standardizer import MultipleChoiceStandardizer
+        from judgment_standardizer import JudgmentStandardizer
+        from short_answer_standardizer import ShortAnswerStandardizer
+        from essay_standardizer import EssayStandardizer
+        from case_analysis_standardizer import CaseAnalysisStandardizer
 
-        # 完成事件，返回工作目录
-        emit(SidecarEvent(type="completed", stage="done", fileId=file_id, message=str(work_dir.resolve())))
+        _HANDLERS = [
+            SingleChoiceStandardizer(), MultipleChoiceStandardizer(), JudgmentStandardizer(),
+            ShortAnswerStandardizer(), EssayStandardizer(), CaseAnalysisStandardizer(),
+        ]
+    return _HANDLERS
+
+
+def export_standardized_questions(
+    work_dir: Path,
+    formats: Iterable[str],
+    emit: Callable[[SidecarEvent], None],
+    file_id: str,
+) -> Dict[str, str]:
+    """
+    把工作目录中已标准化的各题型导出为 CSV / JSONL / Parquet。
+
+    读取 question_types/{题型}_standardized 下的 chunk 结果，文件写入 work_dir/exports；
+    返回 {"{题型}.{格式}": 文件路径}。
+    """
+    from utils.tabular_export import export_questions
 
-        return work_dir.resolve()
+    formats = list(formats)
+    emit(SidecarEvent(type="stage", stage="export", fileId=file_id, message=f"start export ({', '.join(formats)})"))
+    question_types_dir = work_dir / "question_types"
+    export_dir = work_dir / "exports"
+    handlers = _standardizer_handlers()
+    written: Dict[str, str] = {}
+    for i, handler in enumerate(handlers, 1):
+        type_name = handler.get_question_type_name()
+        standardized_dir = question_types_dir / f"{type_name}_standardized"
+        if standardized_dir.exists():
+            # 标准化器的进度输出转到 stderr，stdout 只保留事件流
+            with redirect_stdout(sys.stderr):
+                questions = handler.extract_questions_from_standardized_files(str(standardized_dir))
+                exported = {}
+                if questions:
+                    export_dir.mkdir(parents=True, exist_ok=True)
+                    exported = export_questions(questions, str(export_dir / type_name), formats)
+            for fmt, path in exported.items():
+                written[f"{type_name}.{fmt}"] = path
+                emit(SidecarEvent(type="stage", stage="export", fileId=file_id, message=path))
+        emit(SidecarEvent(type="progress", stage="export", fileId=file_id, percent=i / len(handlers)))
+    if not written:
+        emit(SidecarEvent(type="warning", stage="export", fileId=file_id, message="no standardized questions to export"))
+    return written
 
 
-def _run_with_retry(fn: Callable[[], None], emit: Callable[[SidecarEvent], None], file_id: str, stage: str, max_attempts: int = 2, backoff_base: float = 0.1):
+def _run_with_retry(fn: Callable[[], None], emit: Callable[[SidecarEvent], None], file_id: str, stage: str, max_attempts: int = 2, backoff_base: float = 0.1, metrics: RunMetrics | None = None):
     attempt = 0
     last_exc: Exception | None = None
     while attempt < max_attempts:
@@ -85,6 +338,8 @@ def _run_with_retry(fn: Callable[[], None], emit: Callable[[SidecarEvent], None]
             attempt += 1
             if attempt < max_attempts:
                 delay = backoff_base * (2 ** (attempt - 1))
+                if metrics is not None:
+                    metrics.increment(stage, "retries")
                 emit(SidecarEvent(type="warning", stage=stage, fileId=file_id, message=f"retrying in {delay:.2f}s (attempt {attempt+1}/{max_attempts})"))
                 time.sleep(delay)
             else:
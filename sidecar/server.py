@@ -0,0 +1,153 @@
+"""
+常驻模式（``python -m sidecar.main --serve``）
+
+进程启动后预先导入 fitz / openpyxl / openai 与核心模块，然后从 stdin 逐行读取 JSON 请求，
+按顺序执行任务并把 SidecarEvent 写到 stdout（事件以请求中的 fileId 标记）。桌面端只需启动
+一次 sidecar，之后的任务不再付出解释器启动、PyInstaller 解包与重依赖导入的开销。
+
+请求格式（每行一个 JSON 对象）::
+
+    {"id": "r1", "method": "run", "params": {"input": "a.pdf", "fileId": "abc",
+                                             "formats": ["csv"], "mock": false}}
+    {"id": "r2", "method": "ping"}
+    {"id": "r3", "method": "shutdown"}
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import sys
+import uuid
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .events import SidecarEvent
+
+SERVE_STAGE = "serve"
+SERVE_FILE_ID = "serve"
+METHOD_RUN = "run"
+METHOD_PING = "ping"
+METHOD_SHUTDOWN = "shutdown"
+METHODS = (METHOD_RUN, METHOD_PING, METHOD_SHUTDOWN)
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+# 常驻进程启动时预先导入的模块（缺失的可选依赖忽略）
+WARM_MODULES = (
+    "fitz",
+    "openpyxl",
+    "openai",
+    "question_processor",
+    "utils.page_cache",
+    "utils.tabular_export",
+    "single_choice_standardizer",
+    "multiple_choice_standardizer",
+    "judgment_standardizer",
+    "short_answer_standardizer",
+    "essay_standardizer",
+    "case_analysis_standardizer",
+)
+
+
+@dataclass(frozen=True)
+class JobRequest:
+    id: str
+    method: str
+    file_id: str
+    input: Path | None = None
+    output: Path | None = None
+    formats: tuple[str, ...] = ()
+    mock: bool = False
+
+
+def parse_request(line: str) -> JobRequest:
+    """解析一行请求；格式不合法时抛出 ValueError。"""
+    try:
+        payload = json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"invalid json: {exc.msg}") from exc
+    if not isinstance(payload, dict):
+        raise ValueError("request must be a json object")
+
+    method = payload.get("method")
+    if method not in METHODS:
+        raise ValueError(f"unknown method: {method}")
+    request_id = str(payload.get("id") or uuid.uuid4().hex)
+    params = payload.get("params") or {}
+    if not isinstance(params, dict):
+        raise ValueError("params must be a json object")
+    if method != METHOD_RUN:
+        return JobRequest(id=request_id, method=method, file_id=request_id)
+
+    if not params.get("input"):
+        raise ValueError("run requires params.input")
+    formats = params.get("formats") or []
+    if not isinstance(formats, list) or any(fmt not in EXPORT_FORMATS for fmt in formats):
+        raise ValueError(f"formats must be a subset of {list(EXPORT_FORMATS)}")
+    return JobRequest(
+        id=request_id,
+        method=method,
+        file_id=str(params.get("fileId") or uuid.uuid4().hex),
+        input=Path(params["input"]),
+        output=Path(params["output"]) if params.get("output") else None,
+        formats=tuple(dict.fromkeys(formats)),
+        mock=bool(params.get("mock", False)),
+    )
+
+
+def warm_up(modules: Iterable[str] = WARM_MODULES) -> list[str]:
+    """预先导入重依赖，返回成功导入的模块名（导入时的打印转到 stderr）。"""
+    loaded = []
+    with redirect_stdout(sys.stderr):
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                continue
+            loaded.append(name)
+    return loaded
+
+
+def serve(
+    lines: Iterable[str],
+    emit: Callable[[SidecarEvent], None],
+    run_job: Callable[[JobRequest], None],
+    warm: bool = True,
+) -> int:
+    """
+    常驻循环：逐行读取请求并执行，直到 shutdown 或输入结束。
+
+    单个请求出错（格式错误、输入不存在、任务异常）只输出 error 事件，不会结束进程。
+    """
+    if warm:
+        loaded = warm_up()
+        emit(SidecarEvent(type="stage", stage=SERVE_STAGE, fileId=SERVE_FILE_ID, message=f"warmed {len(loaded)} modules"))
+    emit(SidecarEvent(type="stage", stage=SERVE_STAGE, fileId=SERVE_FILE_ID, message="ready"))
+
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            request = parse_request(line)
+        except ValueError as exc:
+            emit(SidecarEvent(type="error", stage="validate", fileId=SERVE_FILE_ID, message=str(exc)))
+            continue
+
+        if request.method == METHOD_SHUTDOWN:
+            break
+        if request.method == METHOD_PING:
+            emit(SidecarEvent(type="stage", stage=SERVE_STAGE, fileId=request.file_id, message="pong"))
+            continue
+
+        if not request.input.exists():
+            emit(SidecarEvent(type="error", stage="validate", fileId=request.file_id, message=f"input not found: {request.input}"))
+            continue
+        try:
+            run_job(request)
+        except Exception as exc:  # noqa: BLE001
+            emit(SidecarEvent(type="error", stage="runtime", fileId=request.file_id, message=str(exc)))
+
+    emit(SidecarEvent(type="stage", stage=SERVE_STAGE, fileId=SERVE_FILE_ID, message="shutdown"))
+    return 0
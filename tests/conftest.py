@@ -0,0 +1,11 @@
+import pytest
+
+from utils.response_cache import configure_response_cache
+
+
+@pytest.fixture(autouse=True)
+def _disable_shared_response_cache():
+    """测试默认不读写工作目录下的共享LLM响应缓存"""
+    configure_response_cache(enabled=False)
+    yield
+    configure_response_cache(enabled=False)
@@ -0,0 +1,146 @@
+"""
+批量（Batch API）模式的测试：使用本地文件替身离线走完提交、轮询与回写
+"""
+
+import json
+from pathlib import Path
+
+from essay_standardizer import EssayStandardizer
+from utils.batch_mode import LocalBatchBackend, parse_batch_output, run_batch_standardization
+
+
+def _write_essay_file(path: Path, count: int) -> None:
+    body = "\n".join(f"{i}. 论述第{i}题的要点。" for i in range(1, count + 1))
+    path.write_text(f"# 论述题 ({count}题)\n\n## 原始文本\n\n```\n{body}\n```\n", encoding="utf-8")
+
+
+def _make_standardizer() -> EssayStandardizer:
+    standardizer = EssayStandardizer(api_key="test-key", api_base="http://localhost", model="test-model")
+    standardizer.config["chunk_strategy"] = "questions"
+    standardizer.config["lines_per_chunk"] = 2
+
+    def must_not_call(prompt, on_question=None):
+        raise AssertionError("批量模式不应调用同步接口")
+
+    standardizer.call_ai_standardization = must_not_call
+    return standardizer
+
+
+def _responder(body):
+    prompt = body["messages"][0]["content"]
+    current = prompt.split("[current_slice]**:\n```\n", 1)[1].split("\n```", 1)[0]
+    blocks = []
+    for i, line in enumerate(current.splitlines(), 1):
+        stem = line.split(". ", 1)[1]
+        blocks.append(f"### 试题 {i}\n\n#### 题型\n论述I\n\n#### 难度\n未提供\n\n#### 题干\n{stem}\n\n#### 选择项\n无\n\n#### 答案\n略")
+    return "\n\n=== 题目分隔符 ===\n\n".join(blocks)
+
+
+def test_local_backend_round_trip_writes_standard_chunk_layout(tmp_path: Path):
+    input_file = tmp_path / "essay.md"
+    _write_essay_file(input_file, 5)
+    standardizer = _make_standardizer()
+    backend = LocalBatchBackend(str(tmp_path / "remote"), _responder, polls_until_done=3)
+    sleeps = []
+
+    results = run_batch_standardization(
+        {"essay": (standardizer, str(input_file))}, backend, str(tmp_path / "batch"), poll_interval=5, sleep=sleeps.append
+    )
+
+    assert sleeps == [5, 5]
+    stats = results["essay"]
+    assert stats["total_chunks"] == 3
+    assert stats["total_questions"] == 5
+    assert stats["failed_chunks"] == []
+
+    out_dir = tmp_path / "论述题_standardized"
+    assert sorted(p.name for p in out_dir.glob("standardized_chunk_*.md")) == [
+        "standardized_chunk_001.md", "standardized_chunk_002.md", "standardized_chunk_003.md"
+    ]
+    questions = standardizer.extract_questions_from_standardized_files(str(out_dir))
+    assert [q["question_stem"] for q in questions] == [f"论述第{i}题的要点。" for i in range(1, 6)]
+
+    requests = (tmp_path / "batch" / "batch_requests.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["custom_id"] for line in requests] == ["essay:1", "essay:2", "essay:3"]
+    assert json.loads(requests[0])["body"]["model"] == "test-model"
+
+
+def test_restart_resumes_polling_instead_of_resubmitting(tmp_path: Path):
+    input_file = tmp_path / "essay.md"
+    _write_essay_file(input_file, 4)
+    batch_dir = str(tmp_path / "batch")
+
+    class InterruptedBackend(LocalBatchBackend):
+        def poll(self, batch_id):
+            raise KeyboardInterrupt
+
+    first = InterruptedBackend(str(tmp_path / "remote"), _responder)
+    try:
+        run_batch_standardization({"essay": (_make_standardizer(), str(input_file))}, first, batch_dir, sleep=lambda s: None)
+    except KeyboardInterrupt:
+        pass
+    submitted = json.loads((tmp_path / "batch" / "batch_state.json").read_text(encoding="utf-8"))["batch_id"]
+
+    second = LocalBatchBackend(str(tmp_path / "remote"), _responder)
+    second.submit = lambda path: (_ for _ in ()).throw(AssertionError("不应重复提交"))
+    results = run_batch_standardization({"essay": (_make_standardizer(), str(input_file))}, second, batch_dir, sleep=lambda s: None)
+
+    assert results["essay"]["total_questions"] == 4
+    state = json.loads((tmp_path / "batch" / "batch_state.json").read_text(encoding="utf-8"))
+    assert state["batch_id"] == submitted
+    assert state["ingested"] is True
+
+    # 全部完成后再次运行：没有待处理chunk，不提交新批次
+    third = LocalBatchBackend(str(tmp_path / "remote"), _responder)
+    third.submit = second.submit
+    again = run_batch_standardization({"essay": (_make_standardizer(), str(input_file))}, third, batch_dir, sleep=lambda s: None)
+    assert again["essay"]["resumed_chunks"] == [1, 2]
+
+
+def test_failed_requests_become_failed_chunks(tmp_path: Path):
+    input_file = tmp_path / "essay.md"
+    _write_essay_file(input_file, 4)
+
+    def flaky(body):
+        if "3. 论述第3题" in body["messages"][0]["content"].split("[current_slice]", 1)[1]:
+            raise RuntimeError("rate limited")
+        return _responder(body)
+
+    backend = LocalBatchBackend(str(tmp_path / "remote"), flaky)
+    results = run_batch_standardization(
+        {"essay": (_make_standardizer(), str(input_file))}, backend, str(tmp_path / "batch"), sleep=lambda s: None
+    )
+
+    assert results["essay"]["failed_chunks"] == [2]
+    assert results["essay"]["total_questions"] == 2
+
+
+def test_missing_questions_are_reported_without_sync_repair(tmp_path: Path, capsys):
+    input_file = tmp_path / "essay.md"
+    _write_essay_file(input_file, 4)
+
+    def drops_last_question(body):
+        return _responder(body).rsplit("\n\n=== 题目分隔符 ===\n\n", 1)[0]
+
+    backend = LocalBatchBackend(str(tmp_path / "remote"), drops_last_question)
+    standardizer = _make_standardizer()
+    assert standardizer.config["repair_missing"] is True
+
+    # _make_standardizer 的同步接口一经调用即失败
+    results = run_batch_standardization(
+        {"essay": (standardizer, str(input_file))}, backend, str(tmp_path / "batch"), sleep=lambda s: None
+    )
+
+    assert results["essay"]["total_questions"] == 2
+    assert "批量模式下不做补问" in capsys.readouterr().out
+
+
+def test_parse_batch_output_maps_custom_ids_and_errors():
+    text = "\n".join([
+        json.dumps({"custom_id": "a:1", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "ok"}}]}}}),
+        json.dumps({"custom_id": "a:2", "response": {"status_code": 500, "body": {}}}),
+        json.dumps({"custom_id": "a:3", "response": None, "error": {"message": "x"}}),
+        "not json",
+    ])
+
+    assert parse_batch_output(text) == {"a:1": "ok", "a:2": None, "a:3": None}
@@ -0,0 +1,222 @@
+"""
+分块标准化执行器（并发模式）的测试
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+from single_choice_standardizer import SingleChoiceStandardizer
+
+
+def _write_type_file(path: Path, line_count: int) -> None:
+    body = "\n".join(f"{i}. 第{i}行题目内容" for i in range(1, line_count + 1))
+    path.write_text(f"# 单选题 ({line_count}题)\n\n## 原始文本\n\n```\n{body}\n```\n", encoding="utf-8")
+
+
+def _current_slice(prompt: str) -> str:
+    return prompt.split("[current_slice]**:\n```\n", 1)[1].split("\n```", 1)[0]
+
+
+def _fake_response(prompt: str) -> str:
+    first_line = _current_slice(prompt).split("\n", 1)[0]
+    return f"### 试题 1\n\n#### 题干\n{first_line}\n\n=== 题目分隔符 ===\n"
+
+
+def _make_standardizer(max_workers: int) -> SingleChoiceStandardizer:
+    standardizer = SingleChoiceStandardizer(api_key="test-key", api_base="http://localhost", model="test-model")
+    standardizer.config["chunk_strategy"] = "questions"
+    standardizer.config["lines_per_chunk"] = 2
+    standardizer.config["max_workers"] = max_workers
+    # 假响应每个chunk只返回一道不含答案的题目，这里只验证调度，不做缺题补问
+    standardizer.config["repair_missing"] = False
+    return standardizer
+
+
+def test_concurrent_mode_keeps_requests_in_flight_and_order(tmp_path: Path):
+    input_file = tmp_path / "single_choice.md"
+    _write_type_file(input_file, 12)
+    standardizer = _make_standardizer(max_workers=3)
+
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def fake_call(prompt):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.05)
+        with lock:
+            state["in_flight"] -= 1
+        return _fake_response(prompt)
+
+    standardizer.call_ai_standardization = fake_call
+    stats = standardizer.standardize_file(str(input_file), str(tmp_path / "out"))
+
+    assert state["peak"] == 3
+    assert stats["total_chunks"] == 6
+    assert stats["total_questions"] == 6
+    assert stats["failed_chunks"] == []
+
+    out_dir = tmp_path / "out"
+    chunk_files = sorted(out_dir.glob("standardized_chunk_*.md"))
+    assert [p.name for p in chunk_files] == [f"standardized_chunk_{i:03d}.md" for i in range(1, 7)]
+    # 每个chunk文件对应其自身的输入行，顺序不受完成先后影响
+    assert "1. 第1行题目内容" in chunk_files[0].read_text(encoding="utf-8")
+    assert "11. 第11行题目内容" in chunk_files[5].read_text(encoding="utf-8")
+
+    saved = json.loads((out_dir / "quality_stats.json").read_text(encoding="utf-8"))
+    assert saved["total_questions"] == 6
+    assert saved["config"]["max_workers"] == 3
+
+
+def test_failed_chunk_is_recorded_without_stopping_others(tmp_path: Path):
+    input_file = tmp_path / "single_choice.md"
+    _write_type_file(input_file, 6)
+    standardizer = _make_standardizer(max_workers=4)
+
+    def fake_call(prompt):
+        if "3. 第3行题目内容" in _current_slice(prompt):
+            return None
+        if "5. 第5行题目内容" in _current_slice(prompt):
+            raise RuntimeError("boom")
+        return _fake_response(prompt)
+
+    standardizer.call_ai_standardization = fake_call
+    stats = standardizer.standardize_file(str(input_file), str(tmp_path / "out"))
+
+    assert stats["total_chunks"] == 3
+    assert stats["failed_chunks"] == [2, 3]
+    assert stats["total_questions"] == 1
+
+
+def test_global_scheduler_interleaves_types_fairly(tmp_path: Path):
+    from judgment_standardizer import JudgmentStandardizer
+    from utils.chunk_runner import run_standardization_for_types
+
+    big_file = tmp_path / "single_choice.md"
+    small_file = tmp_path / "judgment.md"
+    _write_type_file(big_file, 8)
+    _write_type_file(small_file, 4)
+
+    single = _make_standardizer(max_workers=1)
+    judgment = JudgmentStandardizer(api_key="test-key", api_base="http://localhost", model="test-model")
+    judgment.config["chunk_strategy"] = "questions"
+    judgment.config["lines_per_chunk"] = 2
+    judgment.config["repair_missing"] = False
+
+    calls = []
+
+    def recording_call(label):
+        def fake_call(prompt):
+            calls.append((label, _current_slice(prompt).split("\n", 1)[0]))
+            return _fake_response(prompt)
+        return fake_call
+
+    single.call_ai_standardization = recording_call("single")
+    judgment.call_ai_standardization = recording_call("judgment")
+
+    results = run_standardization_for_types(
+        {"single": (single, str(big_file)), "judgment": (judgment, str(small_file))},
+        max_workers=1,
+    )
+
+    # 小题型的两个chunk穿插在大题型之间，而不是排在其全部chunk之后
+    assert [label for label, _ in calls] == ["single", "judgment", "single", "judgment", "single", "single"]
+    assert results["single"]["total_chunks"] == 4
+    assert results["judgment"]["total_questions"] == 2
+    assert (tmp_path / "判断题_standardized" / "quality_stats.json").exists()
+    assert (tmp_path / "单选题_standardized" / "standardized_chunk_004.md").exists()
+
+
+def test_global_scheduler_reports_unreadable_type(tmp_path: Path):
+    from utils.chunk_runner import run_standardization_for_types
+
+    good_file = tmp_path / "single_choice.md"
+    _write_type_file(good_file, 2)
+    bad_file = tmp_path / "broken.md"
+    bad_file.write_text("no fenced content", encoding="utf-8")
+
+    good = _make_standardizer(max_workers=1)
+    good.call_ai_standardization = _fake_response
+    bad = _make_standardizer(max_workers=1)
+
+    results = run_standardization_for_types(
+        {"good": (good, str(good_file)), "bad": (bad, str(bad_file))},
+        max_workers=2,
+    )
+
+    assert results["good"]["total_questions"] == 1
+    assert "error" in results["bad"]
+
+
+def test_resume_only_reprocesses_missing_or_failed_chunks(tmp_path: Path):
+    input_file = tmp_path / "single_choice.md"
+    _write_type_file(input_file, 8)
+    out_dir = tmp_path / "out"
+
+    first = _make_standardizer(max_workers=2)
+
+    def flaky_call(prompt):
+        if "5. 第5行题目内容" in _current_slice(prompt):
+            return None
+        return _fake_response(prompt)
+
+    first.call_ai_standardization = flaky_call
+    stats = first.standardize_file(str(input_file), str(out_dir))
+    assert stats["failed_chunks"] == [3]
+
+    checkpoint = json.loads((out_dir / "checkpoint.json").read_text(encoding="utf-8"))
+    assert checkpoint["chunks"]["1"]["status"] == "done"
+    assert checkpoint["chunks"]["3"]["status"] == "failed"
+
+    original_mtime = (out_dir / "original_chunk_001.md").stat().st_mtime_ns
+    backup_mtime = (out_dir / "original_backup.md").stat().st_mtime_ns
+
+    second = _make_standardizer(max_workers=2)
+    calls = []
+
+    def recording_call(prompt):
+        calls.append(_current_slice(prompt).split("\n", 1)[0])
+        return _fake_response(prompt)
+
+    second.call_ai_standardization = recording_call
+    stats = second.standardize_file(str(input_file), str(out_dir))
+
+    assert calls == ["5. 第5行题目内容"]
+    assert stats["total_questions"] == 4
+    assert stats["failed_chunks"] == []
+    assert stats["resumed_chunks"] == [1, 2, 4]
+    # 已完成的chunk不重写原始分块与备份
+    assert (out_dir / "original_chunk_001.md").stat().st_mtime_ns == original_mtime
+    assert (out_dir / "original_backup.md").stat().st_mtime_ns == backup_mtime
+
+
+def test_changed_chunk_input_or_disabled_resume_is_reprocessed(tmp_path: Path):
+    input_file = tmp_path / "single_choice.md"
+    _write_type_file(input_file, 6)
+    out_dir = tmp_path / "out"
+
+    standardizer = _make_standardizer(max_workers=1)
+    standardizer.call_ai_standardization = _fake_response
+    standardizer.standardize_file(str(input_file), str(out_dir))
+
+    # 修改第二个chunk的源文本：按题目边界切分没有前瞻块，只有第二个chunk需重新处理
+    text = input_file.read_text(encoding="utf-8").replace("4. 第4行题目内容", "4. 修改后的题目")
+    input_file.write_text(text, encoding="utf-8")
+
+    calls = []
+
+    def recording_call(prompt):
+        calls.append(_current_slice(prompt).split("\n", 1)[0])
+        return _fake_response(prompt)
+
+    standardizer.call_ai_standardization = recording_call
+    standardizer.standardize_file(str(input_file), str(out_dir))
+    assert calls == ["3. 第3行题目内容"]
+
+    calls.clear()
+    standardizer.config["resume"] = False
+    standardizer.standardize_file(str(input_file), str(out_dir))
+    assert len(calls) == 3
@@ -3,21 +3,29 @@ Excel写入功能的测试
 """
 
 import pytest
-import os
-import tempfile
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch
+
+import openpyxl
+
 from question_processor import QuestionProcessor
+from utils.excel_writer import MAX_COLUMN_WIDTH, append_rows_to_excel, write_rows_to_excel
+
+
+def _rows(path):
+    wb = openpyxl.load_workbook(path)
+    ws = wb.active
+    return ws, [list(row) for row in ws.iter_rows(values_only=True)]
 
 
 class TestExcelWriting:
     """Excel写入测试类"""
-    
+
     def setup_method(self):
         """测试前置设置"""
         with patch('question_processor.openai.OpenAI'):
             self.processor = QuestionProcessor(api_key="test_key")
-    
-    def test_save_to_excel_single_choice_questions(self):
+
+    def test_save_to_excel_single_choice_questions(self, tmp_path):
         """测试保存单选题到Excel"""
         questions_data = [
             {
@@ -29,7 +37,7 @@ class TestExcelWriting:
                 "explanation": ""
             },
             {
-                "question_type": "单选", 
+                "question_type": "单选",
                 "difficulty": "中3",
                 "question_stem": "以下哪项不是数据分类的常用方法？",
                 "options": ["按敏感度分类", "按来源分类", "按颜色分类", "按用途分类"],
@@ -37,124 +45,54 @@ class TestExcelWriting:
                 "explanation": "按颜色分类不是数据分类的常用方法"
             }
         ]
-        
-        with patch('openpyxl.Workbook') as mock_workbook, \
-             patch('os.path.exists', return_value=False):
-            
-            mock_wb = MagicMock()
-            mock_ws = MagicMock()
-            # 设置max_row属性为具体数值
-            mock_ws.max_row = 1
-            mock_ws.title = "Sheet"
-            # 设置cell方法的返回值
-            mock_cell = MagicMock()
-            mock_cell.value = None
-            mock_ws.cell.return_value = mock_cell
-            mock_wb.active = mock_ws
-            mock_workbook.return_value = mock_wb
-            
-            # 执行测试
-            self.processor.save_to_excel(questions_data, "output.xlsx")
-            
-            # 验证创建了工作簿
-            mock_workbook.assert_called_once()
-            # 验证保存了文件
-            mock_wb.save.assert_called_once_with("output.xlsx")
-    
-    def test_save_to_excel_multiple_question_types(self):
+        output = tmp_path / "output.xlsx"
+
+        self.processor.save_to_excel(questions_data, str(output))
+
+        ws, rows = _rows(output)
+        assert ws.title == "题库数据"
+        assert len(rows) == 3
+        assert rows[2][:4] == [2, "单选", "中3", "以下哪项不是数据分类的常用方法？"]
+        assert rows[2][9:] == ["C", "按颜色分类不是数据分类的常用方法"]
+
+    def test_save_to_excel_multiple_question_types(self, tmp_path):
         """测试保存多种题型到Excel"""
         questions_data = [
-            {
-                "question_type": "单选",
-                "difficulty": "",
-                "question_stem": "单选题测试",
-                "options": ["A选项", "B选项", "C选项", "D选项"],
-                "answer": "A",
-                "explanation": ""
-            },
-            {
-                "question_type": "多选",
-                "difficulty": "",
-                "question_stem": "多选题测试",
-                "options": ["A选项", "B选项", "C选项", "D选项"],
-                "answer": "ABC",
-                "explanation": ""
-            },
-            {
-                "question_type": "判断",
-                "difficulty": "",
-                "question_stem": "判断题测试",
-                "options": [],
-                "answer": "正确",
-                "explanation": ""
-            },
-            {
-                "question_type": "填空",
-                "difficulty": "",
-                "question_stem": "填空题测试_____",
-                "options": [],
-                "answer": "答案",
-                "explanation": ""
-            },
-            {
-                "question_type": "简答",
-                "difficulty": "",
-                "question_stem": "简答题测试",
-                "options": [],
-                "answer": "这是简答题答案",
-                "explanation": ""
-            }
+            {"question_type": t, "difficulty": "", "question_stem": f"{t}题测试", "options": opts, "answer": a, "explanation": ""}
+            for t, opts, a in [
+                ("单选", ["A选项", "B选项", "C选项", "D选项"], "A"),
+                ("多选", ["A选项", "B选项", "C选项", "D选项"], "ABC"),
+                ("判断", [], "正确"),
+                ("填空", [], "答案"),
+                ("简答", [], "这是简答题答案"),
+            ]
         ]
-        
-        with patch('openpyxl.Workbook') as mock_workbook, \
-             patch('os.path.exists', return_value=False):
-            
-            mock_wb = MagicMock()
-            mock_ws = MagicMock()
-            # 设置max_row属性为具体数值
-            mock_ws.max_row = 1
-            mock_ws.title = "Sheet"
-            # 设置cell方法的返回值
-            mock_cell = MagicMock()
-            mock_cell.value = None
-            mock_ws.cell.return_value = mock_cell
-            mock_wb.active = mock_ws
-            mock_workbook.return_value = mock_wb
-            
-            # 执行测试
-            self.processor.save_to_excel(questions_data, "output.xlsx")
-            
-            # 验证所有题型都被处理了
-            assert mock_ws.cell.call_count > 0  # 确保有数据写入
-            mock_wb.save.assert_called_once_with("output.xlsx")
-    
-    def test_save_to_excel_empty_data(self):
+        output = tmp_path / "output.xlsx"
+
+        self.processor.save_to_excel(questions_data, str(output))
+
+        _, rows = _rows(output)
+        assert [row[1] for row in rows[1:]] == ["单选", "多选", "判断", "填空", "简答"]
+
+    def test_save_to_excel_empty_data(self, tmp_path):
         """测试保存空数据到Excel"""
-        questions_data = []
-        
-        with patch('openpyxl.Workbook') as mock_workbook, \
-             patch('os.path.exists', return_value=False):
-            
-            mock_wb = MagicMock()
-            mock_ws = MagicMock()
-            # 设置max_row属性为具体数值
-            mock_ws.max_row = 1
-            mock_ws.title = "Sheet"
-            # 设置cell方法的返回值
-            mock_cell = MagicMock()
-            mock_cell.value = None
-            mock_ws.cell.return_value = mock_cell
-            mock_wb.active = mock_ws
-            mock_workbook.return_value = mock_wb
-            
-            # 执行测试
-            self.processor.save_to_excel(questions_data, "empty.xlsx")
-            
-            # 验证仍然创建了文件（即使数据为空）
-            mock_wb.save.assert_called_once_with("empty.xlsx")
-    
-    def test_save_to_excel_with_existing_template(self):
-        """测试基于现有模板保存Excel"""
+        output = tmp_path / "empty.xlsx"
+
+        self.processor.save_to_excel([], str(output))
+
+        # 仍然创建了文件（即使数据为空），只有表头
+        _, rows = _rows(output)
+        assert rows == [QuestionProcessor.EXCEL_HEADERS]
+
+    def test_save_to_excel_with_existing_template(self, tmp_path):
+        """测试基于现有模板保存Excel：载入模板后在末尾追加"""
+        template = tmp_path / "template.xlsx"
+        wb = openpyxl.Workbook()
+        wb.active.title = "题库数据"
+        wb.active.append(QuestionProcessor.EXCEL_HEADERS)
+        wb.active.append([1, "单选", "", "已有题目", "甲", "乙", "", "", "", "A", ""])
+        wb.create_sheet("说明").append(["模板说明"])
+        wb.save(template)
         questions_data = [
             {
                 "question_type": "单选",
@@ -165,26 +103,17 @@ class TestExcelWriting:
                 "explanation": ""
             }
         ]
-        
-        # 模拟模板文件存在
-        with patch('openpyxl.load_workbook') as mock_load, \
-             patch('os.path.exists', return_value=True):
-            
-            mock_wb = MagicMock()
-            mock_ws = MagicMock()
-            mock_ws.max_row = 2
-            mock_ws.title = "题库数据"
-            mock_wb.active = mock_ws
-            mock_load.return_value = mock_wb
-            
-            # 执行测试
-            self.processor.save_to_excel(questions_data, "template.xlsx")
-            
-            # 验证加载了现有模板而不是创建新工作簿
-            mock_load.assert_called_once_with("template.xlsx")
-            mock_wb.save.assert_called_once_with("template.xlsx")
-    
-    def test_save_to_excel_handles_write_error(self):
+
+        with patch('utils.excel_writer.load_workbook', wraps=openpyxl.load_workbook) as mock_load:
+            self.processor.save_to_excel(questions_data, str(template))
+
+        mock_load.assert_called_once_with(str(template))
+        ws, rows = _rows(template)
+        assert ws.title == "题库数据"
+        assert [row[3] for row in rows[1:]] == ["已有题目", "测试题目"]
+        assert openpyxl.load_workbook(template)["说明"]["A1"].value == "模板说明"
+
+    def test_save_to_excel_handles_write_error(self, tmp_path):
         """测试处理Excel写入错误"""
         questions_data = [
             {
@@ -196,28 +125,11 @@ class TestExcelWriting:
                 "explanation": ""
             }
         ]
-        
-        with patch('openpyxl.Workbook') as mock_workbook, \
-             patch('os.path.exists', return_value=False):
-            
-            mock_wb = MagicMock()
-            mock_ws = MagicMock()
-            # 设置max_row属性为具体数值
-            mock_ws.max_row = 1
-            mock_ws.title = "Sheet"
-            # 设置cell方法的返回值
-            mock_cell = MagicMock()
-            mock_cell.value = None
-            mock_ws.cell.return_value = mock_cell
-            mock_wb.active = mock_ws
-            mock_wb.save.side_effect = Exception("文件写入失败")
-            mock_workbook.return_value = mock_wb
-            
-            # 执行测试并验证异常处理
-            with pytest.raises(Exception, match="Excel文件保存失败"):
-                self.processor.save_to_excel(questions_data, "error.xlsx")
-    
-    def test_save_to_excel_creates_headers(self):
+
+        with pytest.raises(Exception, match="Excel文件保存失败"):
+            self.processor.save_to_excel(questions_data, str(tmp_path / "missing_dir" / "error.xlsx"))
+
+    def test_save_to_excel_creates_headers(self, tmp_path):
         """测试Excel文件包含正确的表头"""
         questions_data = [
             {
@@ -229,29 +141,15 @@ class TestExcelWriting:
                 "explanation": ""
             }
         ]
-        
-        with patch('openpyxl.Workbook') as mock_workbook, \
-             patch('os.path.exists', return_value=False):
-            
-            mock_wb = MagicMock()
-            mock_ws = MagicMock()
-            # 设置max_row属性为具体数值
-            mock_ws.max_row = 1
-            mock_ws.title = "Sheet"
-            # 设置cell方法的返回值
-            mock_cell = MagicMock()
-            mock_cell.value = None
-            mock_ws.cell.return_value = mock_cell
-            mock_wb.active = mock_ws
-            mock_workbook.return_value = mock_wb
-            
-            # 执行测试
-            self.processor.save_to_excel(questions_data, "headers.xlsx")
-            
-            # 验证设置了表头（检查是否有对cell的调用）
-            assert mock_ws.cell.call_count > 0  # 确保设置了表头和数据
-    
-    def test_save_to_excel_formats_options_correctly(self):
+        output = tmp_path / "headers.xlsx"
+
+        self.processor.save_to_excel(questions_data, str(output))
+
+        ws, rows = _rows(output)
+        assert rows[0] == QuestionProcessor.EXCEL_HEADERS
+        assert ws["A1"].font.bold
+
+    def test_save_to_excel_formats_options_correctly(self, tmp_path):
         """测试选项格式化正确"""
         questions_data = [
             {
@@ -271,29 +169,15 @@ class TestExcelWriting:
                 "explanation": ""
             }
         ]
-        
-        with patch('openpyxl.Workbook') as mock_workbook, \
-             patch('os.path.exists', return_value=False):
-            
-            mock_wb = MagicMock()
-            mock_ws = MagicMock()
-            # 设置max_row属性为具体数值
-            mock_ws.max_row = 1
-            mock_ws.title = "Sheet"
-            # 设置cell方法的返回值
-            mock_cell = MagicMock()
-            mock_cell.value = None
-            mock_ws.cell.return_value = mock_cell
-            mock_wb.active = mock_ws
-            mock_workbook.return_value = mock_wb
-            
-            # 执行测试
-            self.processor.save_to_excel(questions_data, "options.xlsx")
-            
-            # 验证正确处理了有选项和无选项的情况
-            mock_wb.save.assert_called_once_with("options.xlsx")
-    
-    def test_save_to_excel_handles_long_content(self):
+        output = tmp_path / "options.xlsx"
+
+        self.processor.save_to_excel(questions_data, str(output))
+
+        _, rows = _rows(output)
+        assert rows[1][4:9] == ["选项A", "选项B", "选项C", "选项D", None]
+        assert rows[2][4:9] == [None] * 5
+
+    def test_save_to_excel_handles_long_content(self, tmp_path):
         """测试处理长内容"""
         long_content = "这是一个非常长的题目内容，" * 50  # 创建很长的内容
         questions_data = [
@@ -306,24 +190,67 @@ class TestExcelWriting:
                 "explanation": long_content
             }
         ]
-        
-        with patch('openpyxl.Workbook') as mock_workbook, \
-             patch('os.path.exists', return_value=False):
-            
-            mock_wb = MagicMock()
-            mock_ws = MagicMock()
-            # 设置max_row属性为具体数值
-            mock_ws.max_row = 1
-            mock_ws.title = "Sheet"
-            # 设置cell方法的返回值
-            mock_cell = MagicMock()
-            mock_cell.value = None
-            mock_ws.cell.return_value = mock_cell
-            mock_wb.active = mock_ws
-            mock_workbook.return_value = mock_wb
-            
-            # 执行测试
-            self.processor.save_to_excel(questions_data, "long.xlsx")
-            
-            # 验证长内容也能正确处理
-            mock_wb.save.assert_called_once_with("long.xlsx")
\ No newline at end of file
+        output = tmp_path / "long.xlsx"
+
+        self.processor.save_to_excel(questions_data, str(output))
+
+        ws, rows = _rows(output)
+        assert rows[1][3] == long_content
+        assert ws.column_dimensions["D"].width == MAX_COLUMN_WIDTH
+
+
+def test_streaming_writer_sizes_columns_from_sampled_rows(tmp_path):
+    output = tmp_path / "stream.xlsx"
+    rows = ([i, "x" * (i % 7)] for i in range(5000))
+
+    count = write_rows_to_excel(str(output), ["序号", "内容"], rows, "数据")
+
+    ws, values = _rows(output)
+    assert count == 5000
+    assert len(values) == 5001
+    assert values[-1] == [4999, "x" * (4999 % 7)]
+    assert ws.column_dimensions["B"].width == 8  # 样本中最长 6 个字符 + 2
+
+
+def test_append_creates_file_and_then_appends(tmp_path):
+    output = tmp_path / "append.xlsx"
+
+    assert append_rows_to_excel(str(output), ["a", "b"], [[1, 2]], "数据") == 1
+    assert append_rows_to_excel(str(output), ["a", "b"], [[3, 4], [5, 6]], "数据") == 2
+
+    _, rows = _rows(output)
+    assert rows == [["a", "b"], [1, 2], [3, 4], [5, 6]]
+
+
+def test_append_keeps_template_formatting(tmp_path):
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.worksheet.datavalidation import DataValidation
+
+    output = tmp_path / "template.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "题库数据"
+    ws.append(QuestionProcessor.EXCEL_HEADERS)
+    ws["A1"].font = Font(bold=True, color="FF0000")
+    ws["A1"].fill = PatternFill("solid", fgColor="FFFF00")
+    ws.merge_cells("L1:M1")
+    ws.column_dimensions["D"].width = 60
+    validation = DataValidation(type="list", formula1='"单选,多选"')
+    ws.add_data_validation(validation)
+    validation.add("B2:B100")
+    wb.create_sheet("说明")["A1"] = "填写说明"
+    wb.save(output)
+
+    with patch('question_processor.openai.OpenAI'):
+        processor = QuestionProcessor(api_key="test_key")
+    processor.save_to_excel([{"question_type": "单选", "question_stem": "题目", "options": ["甲", "乙"], "answer": "A"}], str(output))
+
+    result = openpyxl.load_workbook(output)
+    ws = result["题库数据"]
+    assert [c.value for c in ws[2]][:5] == [1, "单选", None, "题目", "甲"]
+    assert ws["A1"].font.bold and ws["A1"].font.color.rgb == "00FF0000"
+    assert ws["A1"].fill.fgColor.rgb == "00FFFF00"
+    assert "L1:M1" in {str(r) for r in ws.merged_cells.ranges}
+    assert ws.column_dimensions["D"].width == 60
+    assert [str(dv.sqref) for dv in ws.data_validations.dataValidation] == ["B2:B100"]
+    assert result["说明"]["A1"].value == "填写说明"
@@ -0,0 +1,246 @@
+"""
+规则快速通道的测试
+"""
+
+from pathlib import Path
+
+from judgment_standardizer import JudgmentStandardizer
+from multiple_choice_standardizer import MultipleChoiceStandardizer
+from single_choice_standardizer import SingleChoiceStandardizer
+from utils.fast_path import apply_fast_path, parse_well_formed_question
+from utils.standardization_utils import split_questions_by_separator
+
+
+def _standardizer(cls):
+    return cls(api_key="test-key", api_base="http://localhost", model="test-model")
+
+
+def test_well_formed_single_choice_matches_parse_question_block():
+    lines = [
+        "1.（较易 2）下列关于职业道德的说法，哪项是错误的？\n",
+        "A. 职业道德是自发形成的，不需要进行系统\n",
+        "学习。\n",
+        "B. 职业道德是社会公德在职业活动中的具体体现。\n",
+        "C. 职业道德对从业人员具有指导和约束作用。\n",
+        "D. 职业道德是衡量职业活动好坏的重要标准。\n",
+        "参考答案： A \n",
+    ]
+
+    block = parse_well_formed_question(lines, "单选题")
+    parsed = _standardizer(SingleChoiceStandardizer).parse_question_block(block)
+
+    assert parsed["question_type"] == "单选B"
+    assert parsed["difficulty"] == "较易2"
+    assert parsed["question_stem"] == "下列关于职业道德的说法，哪项是错误的？"
+    assert parsed["option_A"] == "职业道德是自发形成的，不需要进行系统\n学习。"
+    assert parsed["answer"] == "A"
+
+
+def test_multiple_choice_answers_are_normalized_to_letters():
+    lines = [
+        "以下哪些是计算机硬件的组成部分？ (难度: 2)\n",
+        "A、中央处理器 (CPU)\n",
+        "B、操作系统\n",
+        "C、内存 (RAM)\n",
+        "D、应用软件\n",
+        "参考答案: A, C\n",
+    ]
+
+    parsed = _standardizer(MultipleChoiceStandardizer).parse_question_block(parse_well_formed_question(lines, "多选题"))
+
+    assert parsed["difficulty"] == "较易2"
+    assert parsed["option_A"] == "中央处理器 (CPU)"
+    assert parsed["answer"] == "AC"
+
+
+def test_judgment_inline_and_answer_line_formats():
+    inline = parse_well_formed_question(["3.（中 3）（×）职业道德只规范从业人员的个人行为。\n"], "判断题")
+    answered = parse_well_formed_question(["身份认证的目的是验证用户的真实身份。(难度: 2)\n", "【参考答案】：正确\n"], "判断题")
+    parser = _standardizer(JudgmentStandardizer)
+
+    assert parser.parse_question_block(inline)["question_stem"] == "职业道德只规范从业人员的个人行为。"
+    assert parser.parse_question_block(inline)["answer"] == "×"
+    assert parser.parse_question_block(answered)["difficulty"] == "较易2"
+    assert parser.parse_question_block(answered)["answer"] == "正确"
+
+
+def test_ambiguous_questions_are_left_for_llm():
+    # 选项不全、难度标识被截断、单选多答案、判断题行内标注与参考答案冲突
+    assert parse_well_formed_question(["1. 题干？\n", "A. 甲\n", "B. 乙\n", "参考答案：A\n"], "单选题") is None
+    assert parse_well_formed_question(
+        ["1. 题干？ (难度:\n", "A. 甲\n", "B. 乙\n", "C. 丙\n", "D. 丁\n", "参考答案：A\n"], "单选题"
+    ) is None
+    assert parse_well_formed_question(
+        ["1. 题干？\n", "A. 甲\n", "B. 乙\n", "C. 丙\n", "D. 丁\n", "参考答案：AB\n"], "单选题"
+    ) is None
+    assert parse_well_formed_question(["1.（中 3）（×）陈述。\n", "参考答案: 正确\n"], "判断题") is None
+
+
+def test_chunk_sends_only_residual_questions_to_llm(tmp_path: Path):
+    body = (
+        "四、判断题：（3 题）\n"
+        "1.（较易 2）（√）职业道德是维护社会秩序的重要保障。\n"
+        "2. 这道题的答案缺失，需要模型判断\n"
+        "3.（中 3）（×）遵守职业道德是获得经济成功的唯一途径。\n"
+    )
+    input_file = tmp_path / "judgment.md"
+    input_file.write_text(f"# 判断题 (3题)\n\n## 原始文本\n\n```\n{body}```\n", encoding="utf-8")
+
+    result = apply_fast_path("判断题", input_file.read_text(encoding="utf-8").splitlines(True)[6:-1])
+    assert len(result.blocks) == 2
+    assert [line.strip() for line in result.residual_lines] == ["2. 这道题的答案缺失，需要模型判断"]
+
+    standardizer = _standardizer(JudgmentStandardizer)
+    prompts = []
+
+    def fake_call(prompt):
+        prompts.append(prompt)
+        return "### 试题 1\n\n#### 题型\n判断I\n\n#### 难度\n未提供\n\n#### 题干\n这道题的答案缺失，需要模型判断\n\n#### 选项\n正确/错误\n\n#### 答案\n√\n=== 题目分隔符 ===\n"
+
+    standardizer.call_ai_standardization = fake_call
+    out_dir = tmp_path / "out"
+    stats = standardizer.standardize_file(str(input_file), str(out_dir))
+
+    assert stats["total_questions"] == 3
+    assert len(prompts) == 1
+    assert "1.（较易 2）" not in prompts[0]
+    stems = [q["question_stem"] for q in standardizer.extract_questions_from_standardized_files(str(out_dir))]
+    assert stems == [
+        "职业道德是维护社会秩序的重要保障。",
+        "这道题的答案缺失，需要模型判断",
+        "遵守职业道德是获得经济成功的唯一途径。",
+    ]
+
+
+def _judgment_reply(*stems):
+    return "".join(
+        f"### 试题 {i}\n\n#### 题型\n判断I\n\n#### 难度\n未提供\n\n#### 题干\n{stem}\n\n#### 选项\n正确/错误\n\n#### 答案\n√\n=== 题目分隔符 ===\n"
+        for i, stem in enumerate(stems, 1)
+    )
+
+
+def _stems(blocks, parser):
+    return [parser.parse_question_block(block)["question_stem"] for block in blocks]
+
+
+def test_scattered_residuals_are_merged_back_in_source_order():
+    lines = [
+        "1.（较易 2）（√）第一题是完整的。\n",
+        "2. 第二题缺少答案需要模型判断\n",
+        "3.（较易 2）（√）第三题是完整的。\n",
+        "4. 第四题同样缺少答案需要模型判断\n",
+        "5.（较易 2）（×）第五题是完整的。\n",
+    ]
+    parser = _standardizer(JudgmentStandardizer)
+
+    result = apply_fast_path("判断题", lines)
+    assert result.block_slots == [0, 2, 4]
+    assert result.residual_slots == [1, 3]
+
+    # 模型输出的顺序与原文不一致时，也按题干对应回原来的位置
+    merged = result.merge(
+        split_questions_by_separator(_judgment_reply("第四题同样缺少答案需要模型判断", "第二题缺少答案需要模型判断")),
+        parser.parse_question_block,
+    )
+
+    assert _stems(merged, parser) == [
+        "第一题是完整的。",
+        "第二题缺少答案需要模型判断",
+        "第三题是完整的。",
+        "第四题同样缺少答案需要模型判断",
+        "第五题是完整的。",
+    ]
+    assert [block.split("\n", 1)[0] for block in merged] == [f"### 试题 {i}" for i in range(1, 6)]
+
+
+def test_wrapped_stem_tails_from_pdf_are_not_accepted_as_questions():
+    # 样例题库中被空行打断的题干（判断题 蜜罐 / 民法典，单选题 个人信息保护法）
+    judgment = [
+        "数字签名可以保证数据的完整性。(难度: 2)\n",
+        "参考答案: 正确\n",
+        "\n",
+        "蜜罐（Honeypot）技术主要用于诱捕攻击者，并分析其攻击行\n",
+        "\n",
+        "为。(难度: 4)\n",
+        "参考答案: 正确\n",
+        "\n",
+        "《中华人民共和国民法典》对数据和网络虚拟财产的保护有明确规\n",
+        "\n",
+        "定。(难度: 3)\n",
+        "参考答案: 正确\n",
+    ]
+    single = [
+        "参考答案: B\n",
+        "\n",
+        "《中华人民共和国个人信息保护法》的适用范围，以下哪个说法是\n",
+        "\n",
+        "错误的？ (难度: 3)\n",
+        "A. 适用于在中华人民共和国境内处理自然人个人信息的活动\n",
+        "B. 不适用于自然人因个人或者家庭事务处理个人信息\n",
+        "C. 仅适用于中华人民共和国境内的组织\n",
+        "D. 适用于境外向境内自然人提供产品的个人信息处理活动\n",
+        "参考答案: C\n",
+    ]
+
+    stems = _stems(apply_fast_path("判断题", judgment).blocks, _standardizer(JudgmentStandardizer))
+    assert stems == [
+        "数字签名可以保证数据的完整性。",
+        "蜜罐（Honeypot）技术主要用于诱捕攻击者，并分析其攻击行\n为。",
+        "《中华人民共和国民法典》对数据和网络虚拟财产的保护有明确规\n定。",
+    ]
+    result = apply_fast_path("单选题", single)
+    assert not any("#### 题干\n错误的？" in block for block in result.blocks)
+
+
+def test_questions_starting_mid_sentence_go_to_llm_with_previous_question():
+    # 题干折行超过回溯上限时，切出的题目从句子中间开始：连同上一题交给LLM
+    lines = [
+        "身份认证的目的是验证用户的真实身份。(难度: 2)\n",
+        "参考答案: 正确\n",
+        "访问控制策略应当遵循最小权限原则，\n",
+        "只授予用户完成工作所必需的\n",
+        "权限，并且定期对已授予的权限进行\n",
+        "复核和清理，及时回收不再需要的\n",
+        "权限。(难度: 3)\n",
+        "参考答案: 正确\n",
+    ]
+
+    result = apply_fast_path("判断题", lines)
+
+    assert result.blocks == []
+    assert "".join(result.residual_lines) == "".join(lines)
+    assert result.residual_slots == [0]
+
+
+def test_number_with_difficulty_mark_and_colon_is_stripped_from_stem():
+    # 样例题库的 ``N（难度x）：题干`` 版式
+    lines = [
+        "35（难度2）：以下关于MD5 算法的描述正确的是： \n",
+        "    A、输出为128 位 \n",
+        "    B、输出为256 位 \n",
+        "    C、属于对称加密算法 \n",
+        "    D、可逆计算 \n",
+        "【参考答案】：A \n",
+        " \n",
+        "36（难度3）：3DES 属于哪类加密算法？ \n",
+        "    A、对称加密 \n",
+        "    B、非对称加密 \n",
+        "    C、哈希算法 \n",
+        "    D、数字签名 \n",
+        "【参考答案】：A \n",
+    ]
+    parser = _standardizer(SingleChoiceStandardizer)
+
+    result = apply_fast_path("单选题", lines)
+
+    assert not result.needs_llm
+    parsed = [parser.parse_question_block(block) for block in result.blocks]
+    assert [q["question_stem"] for q in parsed] == ["以下关于MD5 算法的描述正确的是：", "3DES 属于哪类加密算法？"]
+    assert [q["difficulty"] for q in parsed] == ["较易2", "中3"]
+
+
+def test_stem_left_starting_with_a_number_is_rejected():
+    # 难度标识错位时题号无法识别，清理后的题干仍以 ``1：`` 开头
+    lines = ["（难度2）\n", "1：以下关于文件访问权限描述正确的是：\n", "A. 甲\n", "B. 乙\n", "C. 丙\n", "D. 丁\n", "参考答案：A\n"]
+
+    assert parse_well_formed_question(lines, "单选题") is None
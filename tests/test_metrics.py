@@ -0,0 +1,129 @@
+"""
+运行指标（metric 事件、LLM 调用统计、run_metrics.json）的测试
+"""
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import fastjsonschema
+
+from sidecar import runner
+from sidecar.events import SidecarEvent
+from utils.metrics import RUN_METRICS_FILE, LLMStats, RunMetrics, get_llm_stats, percentile
+from utils.rate_limiter import RateLimiter
+from utils.standardization_utils import call_openai_with_retries
+
+
+class FlakyClient:
+    """第一次返回 500，之后返回带用量的响应"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            error = Exception("status 500")
+            error.status_code = 500
+            raise error
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+            usage=SimpleNamespace(prompt_tokens=12, completion_tokens=30, total_tokens=42),
+        )
+
+
+def test_percentile_uses_nearest_rank():
+    values = [0.5, 0.1, 0.4, 0.2, 0.3]
+
+    assert percentile(values, 50) == 0.3
+    assert percentile(values, 90) == 0.5
+    assert percentile(values, 0) == 0.1
+    assert percentile([], 50) is None
+
+
+def test_llm_stats_snapshot_counts_calls_tokens_and_retries():
+    stats = LLMStats()
+    for latency in (1.0, 2.0, 3.0, 4.0):
+        stats.record_call(latency, 100, 50)
+    stats.record_retry()
+    stats.record_cache_hit()
+
+    snapshot = stats.snapshot()
+
+    assert snapshot["llm_calls"] == 4
+    assert snapshot["tokens_in"] == 400 and snapshot["tokens_out"] == 200
+    assert snapshot["llm_retries"] == 1 and snapshot["llm_cache_hits"] == 1
+    assert snapshot["llm_latency_p50_s"] == 2.0
+    assert snapshot["llm_latency_p99_s"] == 4.0
+
+
+def test_openai_calls_record_latency_usage_and_retries():
+    stats = get_llm_stats()
+    stats.reset()
+    client = FlakyClient()
+
+    with patch("utils.standardization_utils.time.sleep"):
+        assert call_openai_with_retries(client, "m", "题目", max_retries=3, rate_limiter=RateLimiter()) == "ok"
+
+    snapshot = stats.snapshot()
+    stats.reset()
+    assert snapshot["llm_calls"] == 1
+    assert snapshot["llm_retries"] == 1
+    assert (snapshot["tokens_in"], snapshot["tokens_out"]) == (12, 30)
+    assert snapshot["llm_latency_p50_s"] is not None
+
+
+def test_run_metrics_derives_throughput():
+    metrics = RunMetrics()
+    metrics.record("split", wall_s=2.0, pages=100)
+    metrics.increment("split", "retries")
+
+    assert metrics.stage_summary("split") == {"wall_s": 2.0, "pages": 100, "pages_per_s": 50.0, "retries": 1}
+
+
+def test_runner_emits_batched_metric_events_and_writes_summary(tmp_path: Path):
+    pdf = tmp_path / "m.pdf"
+    pdf.write_text("%PDF-1.4\n")
+
+    def fake_process_questions(self, pdf_path, output_path, step):
+        questions_dir = tmp_path / "question_processing_m" / "question_types" / "单选题_questions"
+        questions_dir.mkdir(parents=True, exist_ok=True)
+        if step == "split-questions":
+            for i in range(1, 4):
+                (questions_dir / f"question_{i:04d}.md").write_text("题目")
+
+    events = []
+    with patch("question_processor.QuestionProcessor.process_questions", new=fake_process_questions):
+        workdir = runner.process_input(pdf, tmp_path, events.append, "fid-m")
+
+    schema = json.loads((Path(runner.__file__).parent / "event_schema.json").read_text())
+    validate = fastjsonschema.compile(schema)
+    metric_events = [json.loads(e.to_json()) for e in events if e.type == "metric"]
+    for payload in metric_events:
+        validate(payload)
+
+    by_stage = {e["stage"]: e["data"] for e in metric_events}
+    assert set(by_stage) == {"split", "split-questions", "done"}
+    assert by_stage["split-questions"]["questions"] == 3
+    assert "questions_per_s" in by_stage["split-questions"]
+    assert by_stage["done"]["wall_s"] >= 0
+
+    report = json.loads((Path(workdir) / RUN_METRICS_FILE).read_text(encoding="utf-8"))
+    assert report["stages"]["split-questions"]["questions"] == 3
+    assert "rss_peak_mb" in report["summary"]
+
+
+def test_metric_event_schema_rejects_nested_data():
+    validate = fastjsonschema.compile(json.loads((Path(runner.__file__).parent / "event_schema.json").read_text()))
+    payload = json.loads(SidecarEvent(type="metric", stage="split", fileId="f", data={"wall_s": 1.5}).to_json())
+    validate(payload)
+
+    payload["data"] = {"nested": {"a": 1}}
+    try:
+        validate(payload)
+        assert False, "schema 应当拒绝嵌套的指标值"
+    except fastjsonschema.JsonSchemaException:
+        pass
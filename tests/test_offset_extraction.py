@@ -0,0 +1,116 @@
+"""
+偏移量抽取模式的测试
+"""
+
+import json
+from pathlib import Path
+
+from judgment_standardizer import JudgmentStandardizer
+from single_choice_standardizer import SingleChoiceStandardizer
+from utils.offset_extraction import clean_stem, create_offset_prompt, cut_range, render_offset_questions
+
+
+SINGLE_LINES = [
+    "1. 数据分类分级的首要步骤是？ (难度: 3)\n",
+    "A、资产梳理\n",
+    "B、定级\n",
+    "C、备案\n",
+    "D、审计\n",
+    "参考答案：A\n",
+    "2. 以下哪项属于个人敏感信息？\n",
+    "A. 姓名\n",
+    "B. 生物识别\n",
+    "信息\n",
+    "C. 职业\n",
+    "D. 爱好\n",
+    "参考答案：B\n",
+]
+
+SINGLE_RESPONSE = json.dumps({
+    "questions": [
+        {"stem": [1, 1], "options": {"A": [2, 2], "B": [3, 3], "C": [4, 4], "D": [5, 5]}, "difficulty": 3, "answer": "A"},
+        {"stem": [7, 7], "options": {"A": [8, 8], "B": [9, 10], "C": [11, 11], "D": [12, 12]}, "difficulty": None, "answer": "b"},
+    ]
+}, ensure_ascii=False)
+
+
+def test_prompt_numbers_lines_and_requests_structure_only():
+    prompt = create_offset_prompt("单选题", SINGLE_LINES)
+
+    assert "   1| 1. 数据分类分级的首要步骤是？ (难度: 3)" in prompt
+    assert "  13| 参考答案：B" in prompt
+    assert '"options": {"A": [起始行, 结束行]' in prompt
+
+
+def test_cut_range_supports_line_and_column_spans():
+    assert cut_range(SINGLE_LINES, [9, 10]) == "B. 生物识别\n信息"
+    assert cut_range(SINGLE_LINES, [6, 5, 6, 6]) == "A"
+    assert cut_range(SINGLE_LINES, [0, 2]) is None
+    assert cut_range(SINGLE_LINES, [3, 99]) is None
+    assert cut_range(SINGLE_LINES, "1-2") is None
+
+
+def test_render_cuts_verbatim_text_and_matches_parse_question_block():
+    blocks = render_offset_questions("单选题", SINGLE_LINES, f"```json\n{SINGLE_RESPONSE}\n```")
+    standardizer = SingleChoiceStandardizer(api_key="test-key", api_base="http://localhost", model="test-model")
+
+    first = standardizer.parse_question_block(blocks[0])
+    second = standardizer.parse_question_block(blocks[1])
+
+    assert first["question_stem"] == "数据分类分级的首要步骤是？"
+    assert first["difficulty"] == "中3"
+    assert [first[f"option_{k}"] for k in "ABCD"] == ["资产梳理", "定级", "备案", "审计"]
+    assert first["answer"] == "A"
+    assert second["difficulty"] == "无"
+    assert second["option_B"] == "生物识别\n信息"
+    assert second["answer"] == "B"
+
+
+def test_render_skips_invalid_spans():
+    response = json.dumps({"questions": [{"stem": [50, 51], "answer": "A"}, {"stem": [7, 7], "answer": "B"}]})
+
+    blocks = render_offset_questions("单选题", SINGLE_LINES, response)
+
+    assert len(blocks) == 1
+    assert blocks[0].startswith("### 试题 1")
+    assert render_offset_questions("单选题", SINGLE_LINES, "not json") == []
+
+
+def test_offsets_mode_end_to_end_for_judgment(tmp_path: Path):
+    body = "1.（难 5）（×）职业道德是所有社会成员都必须遵守的行为规范。\n2.（较易 2）（√）职业道德是维护社会秩序的重要保障。\n"
+    input_file = tmp_path / "judgment.md"
+    input_file.write_text(f"# 判断题 (2题)\n\n## 原始文本\n\n```\n{body}```\n", encoding="utf-8")
+
+    standardizer = JudgmentStandardizer(api_key="test-key", api_base="http://localhost", model="test-model")
+    standardizer.config["extraction_mode"] = "offsets"
+    standardizer.config["fast_path"] = False
+    prompts = []
+
+    def fake_call(prompt):
+        prompts.append(prompt)
+        return json.dumps({"questions": [
+            {"stem": [1, 1], "difficulty": 5, "answer": "（×）"},
+            {"stem": [2, 2], "difficulty": 2, "answer": "√"},
+        ]}, ensure_ascii=False)
+
+    standardizer.call_ai_standardization = fake_call
+    out_dir = tmp_path / "out"
+    stats = standardizer.standardize_file(str(input_file), str(out_dir))
+
+    assert stats["total_questions"] == 2
+    assert "[next_slice]" not in prompts[0]
+    questions = standardizer.extract_questions_from_standardized_files(str(out_dir))
+    assert [q["question_stem"] for q in questions] == [
+        "职业道德是所有社会成员都必须遵守的行为规范。",
+        "职业道德是维护社会秩序的重要保障。",
+    ]
+    assert [q["difficulty"] for q in questions] == ["难5", "较易2"]
+    assert [q["answer"] for q in questions] == ["×", "√"]
+
+
+def test_clean_stem_keeps_leading_digits_that_belong_to_the_stem():
+    assert clean_stem("5G网络切片的主要安全风险是？") == "5G网络切片的主要安全风险是？"
+    assert clean_stem("3DES 属于哪类加密算法？") == "3DES 属于哪类加密算法？"
+    assert clean_stem("3.564 TB 的数据需要多少块硬盘？") == "3.564 TB 的数据需要多少块硬盘？"
+    assert clean_stem("12. 5G网络切片的主要安全风险是？") == "5G网络切片的主要安全风险是？"
+    assert clean_stem("33（难度4）：3DES 属于哪类加密算法？") == "3DES 属于哪类加密算法？"
@@ -0,0 +1,141 @@
+"""
+按页文本缓存与内容哈希识别的测试
+"""
+
+import json
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+from sidecar import runner
+from utils.page_cache import (
+    PageCache,
+    file_sha256,
+    iter_cached_pdf_pages,
+    read_source_record,
+)
+from utils.pdf_extraction import extract_pdf_text
+
+
+def _make_pdf(path: Path, pages: int, prefix: str = "Question page") -> None:
+    import fitz
+
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"{prefix} {i + 1}")
+    doc.save(str(path))
+    doc.close()
+
+
+def test_rerun_reads_every_page_from_cache(tmp_path):
+    pdf = tmp_path / "bank.pdf"
+    _make_pdf(pdf, 5)
+    cache = PageCache(str(tmp_path / "work" / "page_cache.sqlite3"))
+
+    first = "".join(iter_cached_pdf_pages(str(pdf), cache))
+    assert (cache.hits, cache.misses) == (0, 5)
+
+    # 改名的同一份文件按内容哈希命中，不再打开PDF
+    renamed = tmp_path / "copy.pdf"
+    shutil.copy(pdf, renamed)
+    with patch("utils.page_cache.fitz.open", side_effect=AssertionError("不应重新提取")), \
+         patch("utils.pdf_extraction.fitz.open", side_effect=AssertionError("不应重新提取")):
+        second = "".join(iter_cached_pdf_pages(str(renamed), cache))
+
+    assert second == first == extract_pdf_text(str(pdf))
+    assert (cache.hits, cache.misses) == (5, 5)
+    cache.close()
+
+
+def test_interrupted_run_only_extracts_remaining_pages(tmp_path):
+    pdf = tmp_path / "bank.pdf"
+    _make_pdf(pdf, 6)
+    cache_path = str(tmp_path / "page_cache.sqlite3")
+    cache = PageCache(cache_path)
+    pages = iter_cached_pdf_pages(str(pdf), cache)
+    [next(pages) for _ in range(2)]
+    pages.close()
+    cache.close()
+
+    cache = PageCache(cache_path)
+    text = "".join(iter_cached_pdf_pages(str(pdf), cache))
+
+    assert text == extract_pdf_text(str(pdf))
+    assert (cache.hits, cache.misses) == (2, 4)
+    cache.close()
+
+
+def test_changed_content_does_not_hit_old_pages(tmp_path):
+    pdf = tmp_path / "bank.pdf"
+    _make_pdf(pdf, 2)
+    cache = PageCache(str(tmp_path / "page_cache.sqlite3"))
+    "".join(iter_cached_pdf_pages(str(pdf), cache))
+
+    _make_pdf(pdf, 2, prefix="Reissued page")
+    text = "".join(iter_cached_pdf_pages(str(pdf), cache))
+
+    assert "Reissued page 2" in text
+    assert cache.hits == 0
+    cache.close()
+
+
+def _run(pdf: Path, parent: Path):
+    calls, events = [], []
+
+    def fake_process_questions(self, pdf_path, output_path, step):
+        calls.append(step)
+        work_dir = parent / f"question_processing_{Path(pdf_path).stem}"
+        (work_dir / "question_types").mkdir(parents=True, exist_ok=True)
+        if step == "split-questions":
+            (work_dir / "split_summary.md").write_text("ok")
+
+    with patch("question_processor.QuestionProcessor.process_questions", new=fake_process_questions):
+        workdir = runner.run_split_and_split_questions(
+            pdf_path=pdf, work_dir_parent=parent, emit=lambda e: events.append(json.loads(e.to_json())), file_id="fid"
+        )
+    return Path(workdir), calls, events
+
+
+def test_sidecar_reextracts_when_same_name_has_new_content(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"%PDF-1.4 v1\n")
+    workdir, calls, _ = _run(pdf, tmp_path)
+    assert calls == ["split", "split-questions"]
+    assert read_source_record(str(workdir))["sha256"] == file_sha256(str(pdf))
+
+    _, calls, _ = _run(pdf, tmp_path)
+    assert calls == []
+
+    pdf.write_bytes(b"%PDF-1.4 v2\n")
+    _, calls, events = _run(pdf, tmp_path)
+    assert calls == ["split", "split-questions"]
+    assert any(e["type"] == "warning" and "source changed" in e["message"] for e in events)
+
+
+def test_sidecar_reuses_work_dir_of_identical_upload(tmp_path):
+    original = tmp_path / "a.pdf"
+    original.write_bytes(b"%PDF-1.4 same\n")
+    _run(original, tmp_path)
+
+    renamed = tmp_path / "b.pdf"
+    renamed.write_bytes(original.read_bytes())
+    workdir, calls, events = _run(renamed, tmp_path)
+
+    assert calls == []
+    assert workdir.name == "question_processing_b"
+    assert (workdir / "split_summary.md").exists()
+    assert any("reuse question_processing_a" in (e["message"] or "") for e in events)
+
+
+def test_sidecar_reextracts_legacy_work_dir_without_source_record(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"%PDF-1.4 new\n")
+    legacy = tmp_path / "question_processing_a"
+    (legacy / "question_types").mkdir(parents=True)
+    (legacy / "split_summary.md").write_text("from another pdf")
+
+    workdir, calls, events = _run(pdf, tmp_path)
+
+    assert calls == ["split", "split-questions"]
+    assert any(e["type"] == "warning" and "no source record" in e["message"] for e in events)
+    assert read_source_record(str(workdir))["sha256"] == file_sha256(str(pdf))
@@ -95,4 +95,50 @@ class TestPDFTextExtraction:
             
             # 执行测试并验证异常
             with pytest.raises(Exception, match="PDF处理错误"):
-                self.processor.extract_text_from_pdf("error.pdf")
\ No newline at end of file
+                self.processor.extract_text_from_pdf("error.pdf")
+
+
+def _make_pdf(path, pages):
+    import fitz
+
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Question page {i + 1}")
+    doc.save(str(path))
+    doc.close()
+
+
+def test_page_ranges_cover_pages_in_order():
+    from utils.pdf_extraction import page_ranges
+
+    ranges = page_ranges(10, workers=2, shards_per_worker=2)
+
+    assert ranges == [(0, 3), (3, 6), (6, 8), (8, 10)]
+    assert page_ranges(3, workers=4) == [(0, 1), (1, 2), (2, 3)]
+    assert page_ranges(0, workers=4) == []
+
+
+def test_parallel_extraction_matches_serial_page_order(tmp_path):
+    from utils.pdf_extraction import extract_pdf_text
+
+    pdf = tmp_path / "bank.pdf"
+    _make_pdf(pdf, 12)
+
+    serial = extract_pdf_text(str(pdf))
+    parallel = extract_pdf_text(str(pdf), workers=3, min_parallel_pages=1)
+
+    assert parallel == serial
+    assert serial.index("page 2\n") < serial.index("page 12\n")
+
+
+def test_processor_uses_configured_pdf_workers(tmp_path, monkeypatch):
+    pdf = tmp_path / "bank.pdf"
+    _make_pdf(pdf, 2)
+    monkeypatch.setenv("PDF_WORKERS", "3")
+
+    processor = QuestionProcessor()
+    with patch("question_processor.extract_pdf_text", return_value="text") as mock_extract:
+        assert processor.extract_text_from_pdf(str(pdf)) == "text"
+
+    assert processor.pdf_workers == 3
+    mock_extract.assert_called_once_with(str(pdf), workers=3)
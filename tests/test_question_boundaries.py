@@ -0,0 +1,165 @@
+"""
+按题目边界切分chunk的测试
+"""
+
+from pathlib import Path
+
+from utils.question_boundaries import find_question_starts, pack_questions_into_chunks
+from utils.standardization_utils import _read_markdown_content_lines, chunk_token_budget, chunk_type_file
+from utils.token_estimator import estimate_tokens
+
+
+SAMPLE_LINES = [
+    "二、单选题：（共3题）\n",
+    "1. 数据分类分级的首要步骤是？\n",
+    "A. 资产梳理\n",
+    "B. 定级\n",
+    "参考答案：A\n",
+    "2. 以下哪项属于个人敏感信息？\n",
+    "A. 姓名\n",
+    "B. 生物识别信息\n",
+    "参考答案：B\n",
+    "企业数据出境前应当开展哪项工作？ (难度: 3)\n",
+    "A. 安全评估\n",
+    "B. 备案\n",
+    "参考答案：A\n",
+]
+
+
+def test_find_question_starts_uses_numbers_and_difficulty_marks():
+    spans = find_question_starts(SAMPLE_LINES)
+
+    assert [(s.start, s.end, s.number) for s in spans] == [(1, 5, 1), (5, 9, 2), (9, 13, None)]
+
+
+def test_numbered_answer_points_do_not_start_new_question():
+    lines = [
+        "1. 简述数据安全治理的主要内容。\n",
+        "参考答案要点:\n",
+        "1. 建立组织架构\n",
+        "2. 制定制度规范\n",
+        "2. 简述数据脱敏的常用方法。\n",
+        "参考答案要点:\n",
+        "1. 替换\n",
+    ]
+
+    spans = find_question_starts(lines)
+
+    assert [(s.start, s.end) for s in spans] == [(0, 4), (4, 7)]
+
+
+def test_wrapped_stem_before_difficulty_mark_stays_with_its_question():
+    lines = [
+        "1. 简述数据分类的意义。\n",
+        "参考答案: 明确保护重点。\n",
+        "请说明个人敏感信息的定\n",
+        "义及其特殊保护要求。 (难度: 3)\n",
+        "参考答案: 略。\n",
+        "3.564 TB 的数据需要多少块硬盘？\n",
+        "(难度: 2)\n",
+        "参考答案: 4 块。\n",
+    ]
+
+    spans = find_question_starts(lines)
+
+    assert [(s.start, s.end) for s in spans] == [(0, 2), (2, 5), (5, 8)]
+
+
+def test_blank_line_inside_wrapped_stem_does_not_split_question():
+    # 样例题库中 PDF 提取在折行处插入了空行
+    lines = [
+        "用人单位应保证劳动者每周至少休息多少天？ (难度: 2)\n",
+        "参考答案: B\n",
+        "\n",
+        "《中华人民共和国个人信息保护法》的适用范围，以下哪个说法是\n",
+        "\n",
+        "错误的？ (难度: 3)\n",
+        "A、适用于中国境内的个人信息处理活动。\n",
+        "参考答案: C\n",
+        "蜜罐（Honeypot）技术主要用于诱捕攻击者，并分析其攻击行\n",
+        "\n",
+        "为。(难度: 4)\n",
+        "参考答案: 正确\n",
+        "数字签名可以保证数据的完整性。\n",
+        "\n",
+        "(难度: 3)\n",
+        "参考答案: 正确\n",
+    ]
+
+    spans = find_question_starts(lines)
+
+    assert [(s.start, s.end) for s in spans] == [(0, 3), (3, 8), (8, 12), (12, 16)]
+
+
+def test_number_followed_by_difficulty_mark_is_a_numbered_start():
+    # 样例题库中的 ``N（难度x）：题干`` 版式
+    lines = [
+        "33（难度4）：在Windows 系统中，NTFS 文件系统的主要特点\n",
+        "是： \n",
+        "    A、不支持权限控制 \n",
+        "    B、支持精细访问控制 \n",
+        "【参考答案】：B \n",
+        " \n",
+        "34（难度2）：多因素认证（MFA）中，以下哪项属于“拥有型”\n",
+        "\n",
+        "因子？ \n",
+        "    A、密码 \n",
+        "    C、智能卡 \n",
+        "【参考答案】：C \n",
+        "36 (难度2)：加密文件系统EFS 主要应用于： \n",
+        "【参考答案】：A \n",
+    ]
+
+    spans = find_question_starts(lines)
+
+    assert [(s.start, s.end, s.number) for s in spans] == [(0, 6, 33), (6, 12, 34), (12, 14, 36)]
+
+
+def test_pack_keeps_questions_whole_and_preserves_all_lines():
+    chunks = pack_questions_into_chunks(SAMPLE_LINES, max_size=5)
+
+    assert chunks == [SAMPLE_LINES[0:5], SAMPLE_LINES[5:9], SAMPLE_LINES[9:13]]
+    assert [line for chunk in chunks for line in chunk] == SAMPLE_LINES
+
+    # 预算足够时多道题合并到同一个chunk
+    assert pack_questions_into_chunks(SAMPLE_LINES, max_size=9) == [SAMPLE_LINES[0:9], SAMPLE_LINES[9:13]]
+
+
+def test_oversized_question_gets_its_own_chunk():
+    chunks = pack_questions_into_chunks(SAMPLE_LINES, max_size=2)
+
+    assert len(chunks) == 3
+    assert [line for chunk in chunks for line in chunk] == SAMPLE_LINES
+
+
+def test_chunk_type_file_strategies(tmp_path: Path):
+    body = "".join(SAMPLE_LINES)
+    input_file = tmp_path / "single_choice.md"
+    input_file.write_text(f"# 单选题 (3题)\n\n## 原始文本\n\n```\n{body}```\n", encoding="utf-8")
+
+    by_questions = chunk_type_file(str(input_file), {"chunk_strategy": "questions", "lines_per_chunk": 5})
+    assert all(chunk2 is None for _, chunk2 in by_questions)
+    assert [chunk1[-1].strip() for chunk1, _ in by_questions] == ["参考答案：A", "参考答案：B", "参考答案：A"]
+
+    by_lines = chunk_type_file(str(input_file), {"chunk_strategy": "lines", "lines_per_chunk": 5})
+    assert by_lines[0][1] == by_lines[1][0]
+
+
+def test_token_budget_packs_by_estimated_tokens(tmp_path: Path):
+    body = "".join(SAMPLE_LINES)
+    input_file = tmp_path / "single_choice.md"
+    input_file.write_text(f"# 单选题 (3题)\n\n## 原始文本\n\n```\n{body}```\n", encoding="utf-8")
+    lines = _read_markdown_content_lines(str(input_file))
+    question_tokens = [sum(estimate_tokens(line) for line in lines[a:b]) for a, b in [(0, 5), (5, 9), (9, 13)]]
+
+    # 预算恰好容纳前两题
+    budget = question_tokens[0] + question_tokens[1]
+    config = {"chunk_strategy": "tokens", "max_input_tokens": budget, "max_output_tokens": 10 ** 6}
+    assert chunk_token_budget(config) == budget
+    chunks = chunk_type_file(str(input_file), config)
+    assert [chunk1 for chunk1, _ in chunks] == [lines[0:9], lines[9:13]]
+
+    # 输出上限更紧时按 max_output_tokens / output_token_ratio 收紧
+    config.update({"max_output_tokens": question_tokens[0] * 2, "output_token_ratio": 2.0})
+    assert chunk_token_budget(config) == question_tokens[0]
+    assert len(chunk_type_file(str(input_file), config)) == 3
@@ -0,0 +1,68 @@
+"""
+相邻chunk重复题目合并的测试
+"""
+
+from utils.standardization_utils import merge_chunk_questions, merge_duplicate_questions
+
+
+def _question(stem, answer="A", difficulty="中3", **options):
+    question = {"question_stem": stem, "difficulty": difficulty, "answer": answer}
+    for letter in "ABCD":
+        question[f"option_{letter}"] = options.get(letter, f"选项{letter}")
+    return question
+
+
+def test_keeps_more_complete_copy_at_first_position():
+    partial = _question("数据分类分级的首要步骤是？", answer="", difficulty="无", D="")
+    full = _question("数据分类分级的首要步骤是？ ", answer="A")
+    other = _question("以下哪项属于个人敏感信息？")
+
+    merged = merge_duplicate_questions([[other, partial], [full]])
+
+    assert merged == [other, full]
+
+
+def test_same_stem_with_different_options_is_not_merged():
+    first = _question("下列说法正确的是？", A="数据应分级保护")
+    second = _question("下列说法正确的是？", A="数据无需备份")
+
+    assert merge_duplicate_questions([[first], [second]]) == [first, second]
+
+
+def test_truncated_option_is_treated_as_same_question():
+    truncated = _question("数据出境前应当开展？", B="安全评")
+    complete = _question("数据出境前应当开展？", B="安全评估")
+
+    assert merge_duplicate_questions([[truncated], [complete]]) == [complete]
+
+
+def test_repeated_source_questions_away_from_chunk_boundary_are_kept():
+    # 题库在不同题号下重复收录同一道题（如样例题库单选第 1、11、21 题）
+    repeated = _question("下列关于职业道德的说法，哪项是错误的？")
+    fillers = [_question(f"第{i}题") for i in range(6)]
+    chunks = [[repeated] + fillers[:3], fillers[3:], [repeated, _question("最后一题")]]
+
+    merged = merge_duplicate_questions(chunks)
+
+    assert merged.count(repeated) == 2
+    assert len(merged) == 9
+
+
+def test_only_the_overlapping_lines_strategy_merges():
+    question = _question("数据出境前应当开展？")
+    chunks = [[question], [dict(question)]]
+
+    assert merge_chunk_questions(chunks, {"chunk_strategy": "tokens"}) == [question, question]
+    assert merge_chunk_questions(chunks, {"chunk_strategy": "questions"}) == [question, question]
+    assert merge_chunk_questions(chunks, {"chunk_strategy": "lines"}) == [question]
+
+
+def test_subjective_questions_without_options_and_large_banks():
+    questions = [{"question_stem": f"论述第{i}题", "answer": "要点"} for i in range(20000)]
+    chunks = [questions[i:i + 10] for i in range(0, 20000, 10)]
+    # 每个chunk开头重复上一chunk的最后一道题
+    overlapped = [chunks[0]] + [[prev[-1]] + chunk for prev, chunk in zip(chunks, chunks[1:])]
+
+    merged = merge_duplicate_questions(overlapped)
+
+    assert merged == questions
@@ -0,0 +1,105 @@
+"""
+题号对账与缺题补跑的测试
+"""
+
+from pathlib import Path
+
+from essay_standardizer import EssayStandardizer
+from utils.question_reconciler import fill_question_gaps, reconcile_questions
+
+STEMS = [
+    "论述数据安全治理的总体框架。",
+    "论述数据分类分级的实施步骤。",
+    "论述个人信息保护的基本原则。",
+    "论述数据出境安全评估的流程。",
+    "论述重要数据识别的方法。",
+    "论述数据安全事件的应急处置。",
+]
+
+
+def _block(number: int, stem: str) -> str:
+    return f"### 试题 {number}\n\n#### 题型\n论述I\n\n#### 难度\n未提供\n\n#### 题干\n{stem}\n\n#### 选择项\n无\n\n#### 答案\n要点"
+
+
+def _response(stems) -> str:
+    return "\n\n=== 题目分隔符 ===\n\n".join(_block(i, stem) for i, stem in enumerate(stems, 1))
+
+
+def _write_source(path: Path, numbers) -> None:
+    body = "".join(f"{n}. {STEMS[n - 1]}\n参考答案：要点{n}\n" for n in numbers)
+    path.write_text(f"# 论述题\n\n## 原始文本\n\n```\n{body}```\n", encoding="utf-8")
+
+
+def _make_standardizer() -> EssayStandardizer:
+    standardizer = EssayStandardizer(api_key="test-key", api_base="http://localhost", model="test-model")
+    standardizer.config["chunk_strategy"] = "questions"
+    standardizer.config["lines_per_chunk"] = 4
+    standardizer.config["repair_missing"] = False
+    return standardizer
+
+
+def _standardize_with_gap(tmp_path: Path):
+    input_file = tmp_path / "essay.md"
+    _write_source(input_file, range(1, 7))
+    standardizer = _make_standardizer()
+    # chunk 1 多输出了第 3 题（重叠），chunk 2 漏掉了第 4 题
+    responses = [_response(STEMS[0:3]), _response(STEMS[2:3]), _response(STEMS[4:6])]
+    standardizer.call_ai_standardization = lambda prompt, on_question=None: responses.pop(0)
+    out_dir = tmp_path / "out"
+    standardizer.standardize_file(str(input_file), str(out_dir))
+    return standardizer, input_file, out_dir
+
+
+def test_reconcile_reports_gaps_and_duplicates_by_source_number(tmp_path: Path):
+    standardizer, input_file, out_dir = _standardize_with_gap(tmp_path)
+
+    report = reconcile_questions(standardizer, str(input_file), str(out_dir))
+
+    assert report.source_count == 6
+    assert report.standardized_count == 6
+    assert report.missing == ["4"]
+    assert report.duplicates == {"3": 2}
+    assert report.chunk_gaps == {2: [2]}
+    assert report.numbering_gaps == []
+
+
+def test_fill_reruns_only_the_gap_lines(tmp_path: Path):
+    standardizer, input_file, out_dir = _standardize_with_gap(tmp_path)
+    prompts = []
+
+    def fake_call(prompt, on_question=None):
+        prompts.append(prompt)
+        return _response(STEMS[3:4])
+
+    standardizer.call_ai_standardization = fake_call
+    report = fill_question_gaps(standardizer, str(input_file), str(out_dir))
+
+    assert len(prompts) == 1
+    current = prompts[0].split("[current_slice]", 1)[1]
+    assert "4. 论述数据出境安全评估的流程。" in current
+    assert "3. 论述个人信息保护" not in current
+    assert report.missing == []
+    assert report.recovered == 1
+
+    chunk2 = standardizer.extract_questions_from_standardized_files(str(out_dir))
+    assert [q["question_stem"] for q in chunk2][3:5] == [STEMS[2], STEMS[3]]
+
+
+def test_complete_bank_needs_no_calls_and_reports_source_numbering_gaps(tmp_path: Path):
+    input_file = tmp_path / "essay.md"
+    _write_source(input_file, [1, 2, 5])
+    standardizer = _make_standardizer()
+    standardizer.call_ai_standardization = lambda prompt, on_question=None: _response(
+        [line.split(". ", 1)[1] for line in prompt.split("[current_slice]", 1)[1].splitlines() if ". " in line and "论述" in line]
+    )
+    out_dir = tmp_path / "out"
+    standardizer.standardize_file(str(input_file), str(out_dir))
+
+    def must_not_call(prompt, on_question=None):
+        raise AssertionError("没有缺失题目时不应请求")
+
+    standardizer.call_ai_standardization = must_not_call
+    report = fill_question_gaps(standardizer, str(input_file), str(out_dir))
+
+    assert report.complete
+    assert report.numbering_gaps == [3, 4]
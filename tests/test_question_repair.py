@@ -0,0 +1,102 @@
+"""
+缺题/残题定向补问的测试
+"""
+
+from pathlib import Path
+
+from essay_standardizer import EssayStandardizer
+from utils.question_repair import plan_repair
+
+LINES = [
+    "1. 论述数据安全治理的总体框架。\n",
+    "参考答案：框架要点\n",
+    "2. 论述数据分类分级的实施步骤。\n",
+    "参考答案：步骤要点\n",
+    "3. 论述个人信息保护的基本原则。\n",
+    "参考答案：原则要点\n",
+    "4. 论述数据出境安全评估的流程。\n",
+    "参考答案：流程要点\n",
+]
+
+
+def _block(number: int, stem: str, answer: str = "要点") -> str:
+    return f"### 试题 {number}\n\n#### 题型\n论述I\n\n#### 难度\n未提供\n\n#### 题干\n{stem}\n\n#### 选择项\n无\n\n#### 答案\n{answer}"
+
+
+def _response(*blocks: str) -> str:
+    return "\n\n=== 题目分隔符 ===\n\n".join(blocks)
+
+
+def _make_standardizer() -> EssayStandardizer:
+    standardizer = EssayStandardizer(api_key="test-key", api_base="http://localhost", model="test-model")
+    standardizer.config["chunk_strategy"] = "questions"
+    return standardizer
+
+
+def test_plan_finds_missing_and_malformed_questions():
+    standardizer = _make_standardizer()
+    blocks = [
+        _block(1, "论述数据安全治理的总体框架。"),
+        _block(2, "论述个人信息保护的基本原则。", answer=""),
+        _block(3, "论述数据出境安全评估的流程。"),
+    ]
+
+    plan = plan_repair(LINES, blocks, standardizer.parse_question_block)
+
+    assert plan.malformed == 1
+    assert plan.missing_numbers() == [2, 3]
+    assert plan.missing_lines(LINES) == LINES[2:6]
+
+
+def test_complete_chunk_is_not_repaired():
+    standardizer = _make_standardizer()
+    blocks = [_block(i, LINES[2 * i - 2][3:].strip()) for i in range(1, 5)]
+
+    assert not plan_repair(LINES, blocks, standardizer.parse_question_block).needs_repair
+
+
+def test_only_missing_questions_are_reasked_and_merged_in_order(tmp_path: Path):
+    input_file = tmp_path / "essay.md"
+    input_file.write_text(f"# 论述题 (4题)\n\n## 原始文本\n\n```\n{''.join(LINES)}```\n", encoding="utf-8")
+    standardizer = _make_standardizer()
+    prompts = []
+
+    def fake_call(prompt, on_question=None):
+        prompts.append(prompt)
+        if len(prompts) == 1:
+            return _response(
+                _block(1, "论述数据安全治理的总体框架。"),
+                _block(2, "论述个人信息保护的基本原则。", answer=""),
+                _block(3, "论述数据出境安全评估的流程。"),
+            )
+        return _response(_block(1, "论述数据分类分级的实施步骤。"), _block(2, "论述个人信息保护的基本原则。"))
+
+    standardizer.call_ai_standardization = fake_call
+    out_dir = tmp_path / "out"
+    stats = standardizer.standardize_file(str(input_file), str(out_dir))
+
+    assert len(prompts) == 2
+    repair_slice = prompts[1].split("[current_slice]", 1)[1]
+    assert "2. 论述数据分类分级的实施步骤。" in repair_slice
+    assert "3. 论述个人信息保护的基本原则。" in repair_slice
+    assert "1. 论述数据安全治理" not in repair_slice
+    assert "4. 论述数据出境" not in repair_slice
+
+    assert stats["total_questions"] == 4
+    questions = standardizer.extract_questions_from_standardized_files(str(out_dir))
+    assert [q["question_stem"] for q in questions] == [line[3:].strip() for line in LINES[::2]]
+    text = (out_dir / "standardized_chunk_001.md").read_text(encoding="utf-8")
+    assert [line for line in text.splitlines() if line.startswith("### 试题")] == [f"### 试题 {i}" for i in range(1, 5)]
+
+
+def test_failed_repair_keeps_original_questions(tmp_path: Path):
+    input_file = tmp_path / "essay.md"
+    input_file.write_text(f"# 论述题 (4题)\n\n## 原始文本\n\n```\n{''.join(LINES)}```\n", encoding="utf-8")
+    standardizer = _make_standardizer()
+    responses = [_response(_block(1, "论述数据安全治理的总体框架。")), None]
+    standardizer.call_ai_standardization = lambda prompt, on_question=None: responses.pop(0)
+
+    stats = standardizer.standardize_file(str(input_file), str(tmp_path / "out"))
+
+    assert stats["total_questions"] == 1
+    assert stats["failed_chunks"] == []
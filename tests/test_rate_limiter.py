@@ -0,0 +1,140 @@
+"""
+OpenAI 调用限流与重试的测试
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from utils.rate_limiter import RateLimiter, TokenBucket, get_retry_after, is_retryable
+from utils.standardization_utils import call_openai_with_retries
+from utils.token_estimator import estimate_tokens
+
+
+class FakeClock:
+    """可手动推进的时钟，sleep 即推进时间"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class FakeClient:
+    """按预设序列返回结果或抛出异常的 chat.completions 客户端"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=outcome))],
+            usage=SimpleNamespace(total_tokens=10),
+        )
+
+
+def test_estimate_tokens_counts_cjk_per_char_and_ascii_per_four():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("数据安全") == 4
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("数据 ab") == 3
+
+
+def test_token_bucket_blocks_until_refilled():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)  # 1 个/秒
+
+    for _ in range(60):
+        assert bucket.acquire(1) == 0.0
+    waited = bucket.acquire(1)
+
+    assert abs(waited - 1.0) < 1e-9
+    assert abs(clock.now - 1.0) < 1e-9
+
+
+def test_rate_limiter_meters_tokens_and_reconciles_actual_usage():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire(600)
+    # 实际只用了 300 token，退还 300 后可立即再发一次 300 的请求
+    limiter.reconcile(600, 300)
+    limiter.acquire(300)
+    assert clock.sleeps == []
+
+    # 额度耗尽：需等待 60 token 的补充时间（10 token/秒 -> 6 秒）
+    limiter.acquire(60)
+    assert abs(sum(clock.sleeps) - 6.0) < 1e-9
+
+
+def test_pause_for_blocks_all_callers():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    limiter.pause_for(5)
+    limiter.acquire(0)
+    assert abs(clock.now - 5.0) < 1e-9
+
+
+def test_retry_after_header_is_parsed():
+    assert get_retry_after(FakeAPIError(429, {"retry-after": "3"})) == 3.0
+    assert get_retry_after(FakeAPIError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert get_retry_after(FakeAPIError(429)) is None
+    assert is_retryable(FakeAPIError(429))
+    assert is_retryable(FakeAPIError(503))
+    assert not is_retryable(FakeAPIError(401))
+    assert is_retryable(ConnectionError("reset"))
+
+
+def test_call_honors_retry_after_then_succeeds():
+    client = FakeClient([FakeAPIError(429, {"retry-after": "2"}), "ok"])
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+
+    with patch("utils.standardization_utils.time.sleep") as fake_sleep, \
+         patch("utils.standardization_utils.random.uniform", return_value=0.0):
+        result = call_openai_with_retries(client, "m", "题目", max_retries=3, rate_limiter=limiter)
+
+    assert result == "ok"
+    assert client.calls == 2
+    fake_sleep.assert_called_once_with(2.0)
+
+
+def test_call_uses_exponential_backoff_without_retry_after():
+    client = FakeClient([FakeAPIError(500), FakeAPIError(502), "ok"])
+    limiter = RateLimiter()
+
+    with patch("utils.standardization_utils.time.sleep") as fake_sleep, \
+         patch("utils.rate_limiter.random.uniform", side_effect=lambda lo, hi: hi):
+        result = call_openai_with_retries(client, "m", "题目", max_retries=3, rate_limiter=limiter)
+
+    assert result == "ok"
+    assert [c.args[0] for c in fake_sleep.call_args_list] == [1.0, 2.0]
+
+
+def test_call_does_not_retry_non_retryable_errors():
+    client = FakeClient([FakeAPIError(401), "never"])
+
+    with patch("utils.standardization_utils.time.sleep") as fake_sleep:
+        result = call_openai_with_retries(client, "m", "题目", max_retries=3, rate_limiter=RateLimiter())
+
+    assert result is None
+    assert client.calls == 1
+    fake_sleep.assert_not_called()
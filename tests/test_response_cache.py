@@ -0,0 +1,94 @@
+"""
+LLM 响应缓存的测试
+"""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from utils.rate_limiter import RateLimiter
+from utils.response_cache import ResponseCache, configure_response_cache, get_response_cache
+from utils.standardization_utils import call_openai_with_retries
+
+
+class CountingClient:
+    def __init__(self, content="标准化结果"):
+        self.calls = 0
+        self.content = content
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"{self.content}-{self.calls}"))],
+            usage=None,
+        )
+
+
+def test_key_depends_on_model_temperature_and_prompt():
+    base = ResponseCache.make_key("gpt-4o", 0.1, "prompt")
+    assert base == ResponseCache.make_key("gpt-4o", 0.1, "prompt")
+    assert base != ResponseCache.make_key("gpt-4o-mini", 0.1, "prompt")
+    assert base != ResponseCache.make_key("gpt-4o", 0.2, "prompt")
+    assert base != ResponseCache.make_key("gpt-4o", 0.1, "prompt ")
+
+
+def test_unchanged_prompt_is_served_from_cache(tmp_path: Path):
+    cache = ResponseCache(str(tmp_path), max_bytes=1024 * 1024)
+    client = CountingClient()
+
+    first = call_openai_with_retries(client, "m", "同一个prompt", 3, rate_limiter=RateLimiter(), cache=cache)
+    second = call_openai_with_retries(client, "m", "同一个prompt", 3, rate_limiter=RateLimiter(), cache=cache)
+    third = call_openai_with_retries(client, "m", "修改后的prompt", 3, rate_limiter=RateLimiter(), cache=cache)
+
+    assert first == second == "标准化结果-1"
+    assert third == "标准化结果-2"
+    assert client.calls == 2
+
+
+def test_cache_persists_across_instances_and_refresh_bypasses_reads(tmp_path: Path):
+    ResponseCache(str(tmp_path), max_bytes=1024).put("m", 0.1, "p", "旧响应")
+
+    assert ResponseCache(str(tmp_path), max_bytes=1024).get("m", 0.1, "p") == "旧响应"
+
+    refreshing = ResponseCache(str(tmp_path), max_bytes=1024, refresh=True)
+    assert refreshing.get("m", 0.1, "p") is None
+    refreshing.put("m", 0.1, "p", "新响应")
+    assert ResponseCache(str(tmp_path), max_bytes=1024).get("m", 0.1, "p") == "新响应"
+
+
+def test_lru_eviction_keeps_total_size_bounded(tmp_path: Path):
+    cache = ResponseCache(str(tmp_path), max_bytes=25)
+    cache.put("m", 0.1, "a", "x" * 10)
+    cache.put("m", 0.1, "b", "y" * 10)
+    # 访问 a，使 b 成为最久未使用
+    assert cache.get("m", 0.1, "a") == "x" * 10
+    cache.put("m", 0.1, "c", "z" * 10)
+
+    assert cache.total_bytes <= 25
+    assert len(cache) == 2
+    assert cache.get("m", 0.1, "b") is None
+    assert cache.get("m", 0.1, "a") == "x" * 10
+    assert cache.get("m", 0.1, "c") == "z" * 10
+
+
+def test_no_cache_switch_disables_shared_cache(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+    configure_response_cache(enabled=False)
+    assert get_response_cache() is None
+
+    configure_response_cache(enabled=True, refresh=True)
+    cache = get_response_cache()
+    assert cache is not None and cache.refresh
+    assert Path(cache.path).parent == tmp_path
+
+
+def test_env_setting_applies_when_cli_does_not_override(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_CACHE", "0")
+    configure_response_cache(enabled=None)
+    assert get_response_cache() is None
+    assert not list(tmp_path.iterdir())
+
+    monkeypatch.setenv("LLM_CACHE", "1")
+    configure_response_cache(enabled=None)
+    assert get_response_cache() is not None
@@ -0,0 +1,88 @@
+"""
+题型标题识别（单个预编译交替式）的测试
+"""
+
+import json
+import re
+
+import pytest
+
+from question_processor import QuestionProcessor
+from utils.section_detector import SectionDetector, build_type_mapping
+
+# 样例题库中的真实标题行
+HEADINGS = {
+    "二、单选题：（476 题） ": ("单选题", 476),
+    "三、多选题：（124 题） ": ("多选题", 124),
+    "四、判断题：（318 题） ": ("判断题", 318),
+    "五、简答题（包括计算题）：（45 题） ": ("简答题", 45),
+    "六、论述题题：（23 题） ": ("论述题", 23),
+    "七、案例分析题：（22 题） ": ("案例分析题", 22),
+}
+OTHER_LINES = ["1. 数据安全的首要原则是？(难度: 3)", "A. 保密性", "参考答案：A", "二、单选题说明", ""]
+
+
+def _legacy_detect(line):
+    """原 split_text_by_question_types 的逐题型匹配逻辑"""
+    line = line.strip()
+    for type_name, type_info in QuestionProcessor.QUESTION_TYPE_MAPPING.items():
+        if re.search(type_info["pattern"], line):
+            count_match = re.search(r'[（(](\d+).*题[）)]', line)
+            return type_name, int(count_match.group(1)) if count_match else 0
+    return None
+
+
+def test_default_headings_match_legacy_detection():
+    detector = SectionDetector(QuestionProcessor.QUESTION_TYPE_MAPPING)
+
+    for line, expected in HEADINGS.items():
+        heading = detector.detect(line)
+        assert (heading.type_name, heading.expected_count) == expected == _legacy_detect(line)
+        assert heading.type_info["name"] == QuestionProcessor.QUESTION_TYPE_MAPPING[expected[0]]["name"]
+    for line in OTHER_LINES:
+        assert detector.detect(line) is None and _legacy_detect(line) is None
+
+
+def test_template_grammar_with_labels_and_named_count():
+    mapping = build_type_mapping({
+        "template": r"^第[一二三四五六七八九十]+部分\s*{label}.*?[（(](\d+)\s*题",
+        "sections": {
+            "单选题": {"name": "single_choice", "label": "单项选择题"},
+            "判断题": {"name": "judgment", "pattern": r"^Part\s+\d+\s+判断\s+(?P<count>\d+)"},
+            "简答题": {"name": "short_answer", "pattern": r"^简答题$"},
+        },
+    })
+    detector = SectionDetector(mapping)
+
+    single = detector.detect("第一部分 单项选择题（80 题）")
+    assert (single.type_name, single.expected_count) == ("单选题", 80)
+    judgment = detector.detect("Part 3 判断 40")
+    assert (judgment.type_name, judgment.expected_count) == ("判断题", 40)
+    assert detector.detect("简答题").expected_count == 0
+    assert detector.detect("一、单选题：（476 题）") is None
+
+
+@pytest.mark.parametrize("grammar", [
+    {},
+    {"sections": {"单选题": {"pattern": "x"}}},
+    {"sections": {"单选题": {"name": "single_choice"}}},
+    {"sections": {"单选题": {"name": "single_choice", "pattern": "(unclosed"}}},
+])
+def test_invalid_grammar_is_rejected(grammar):
+    with pytest.raises(ValueError):
+        build_type_mapping(grammar)
+
+
+def test_processor_splits_with_configured_grammar(tmp_path):
+    grammar = tmp_path / "grammar.json"
+    grammar.write_text(json.dumps({
+        "template": r"^Section [A-Z]: {label} \((\d+)\)",
+        "sections": {"单选题": {"name": "single_choice", "label": "Single"}, "判断题": {"name": "judgment", "label": "TrueFalse"}},
+    }), encoding="utf-8")
+    processor = QuestionProcessor(pdf_workers=1, section_grammar=str(grammar))
+    text = "Section A: Single (2)\n1. Q1\n2. Q2\nSection B: TrueFalse (1)\n1. Q3\n"
+
+    sections = processor.split_text_by_question_types(text, str(tmp_path / "out"))
+
+    assert {name: info["expected_count"] for name, info in sections.items()} == {"单选题": 2, "判断题": 1}
+    assert sections["判断题"]["text"] == "Section B: TrueFalse (1)\n1. Q3\n"
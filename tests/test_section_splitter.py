@@ -0,0 +1,66 @@
+"""
+按行流式拆分题型的测试
+"""
+
+from pathlib import Path
+from unittest.mock import patch
+
+from question_processor import QuestionProcessor
+from utils.section_splitter import iter_lines
+
+TEXT = (
+    "数据安全管理员题库\n目录\n二、单选题：共（2道题）\n四、判断题：共（1道题）\n"
+    "前言\n二、单选题：共（2道题）\n1. 第一题？\nA. 甲\n答案：A\n2. 第二题？\nA. 乙\n答案：A\n"
+    "四、判断题：共（1道题）\n1. 判断题（ ）\n答案：正确\n"
+)
+
+
+def _body(path: str) -> str:
+    content = Path(path).read_text(encoding="utf-8")
+    return content.split("## 原始文本\n\n", 1)[1]
+
+
+def test_iter_lines_matches_split_for_any_chunking():
+    text = "a\nbc\n\nd\n"
+    for chunks in (["a\nbc\n\nd\n"], ["a", "\nb", "c\n\n", "d\n"], list(text), []):
+        assert list(iter_lines(chunks)) == "".join(chunks).split("\n")
+
+
+def test_split_text_writes_sections_like_before(tmp_path):
+    processor = QuestionProcessor(pdf_workers=1)
+
+    sections = processor.split_text_by_question_types(TEXT, str(tmp_path))
+
+    assert list(sections) == ["单选题", "判断题"]
+    single = sections["单选题"]
+    assert single["expected_count"] == 2
+    # 目录中的同名标题被正文中的最后一次出现覆盖
+    assert single["text"] == "二、单选题：共（2道题）\n1. 第一题？\nA. 甲\n答案：A\n2. 第二题？\nA. 乙\n答案：A"
+    assert _body(single["file_path"]) == f"```\n{single['text']}\n```\n"
+    judgment = sections["判断题"]
+    assert _body(judgment["file_path"]) == "```\n四、判断题：共（1道题）\n1. 判断题（ ）\n答案：正确\n\n```\n"
+    assert Path(single["file_path"]).read_text(encoding="utf-8").startswith("# 单选题 (2题)\n\n## 提取时间\n")
+
+
+def test_pdf_pages_stream_through_the_splitter(tmp_path):
+    processor = QuestionProcessor(pdf_workers=1)
+    pdf = tmp_path / "bank.pdf"
+    pdf.write_text("%PDF-1.4\n")
+    out_dir = tmp_path / "question_types"
+    split_at = TEXT.index("1. 判断题")
+
+    def fake_pages(path, workers=1):
+        yield TEXT[:split_at - 5]
+        yield TEXT[split_at - 5:split_at + 3]
+        # 单选题在判断题开始后即已写完关闭，无需等到文档结束
+        assert (out_dir / "single_choice.md").read_text(encoding="utf-8").endswith("答案：A\n```\n")
+        yield TEXT[split_at + 3:]
+
+    with patch("question_processor.iter_pdf_pages", new=fake_pages):
+        sections = processor.split_pdf_by_question_types(str(pdf), str(out_dir))
+
+    assert {name: info["expected_count"] for name, info in sections.items()} == {"单选题": 2, "判断题": 1}
+    assert "text" not in sections["单选题"]
+    expected = QuestionProcessor(pdf_workers=1).split_text_by_question_types(TEXT, str(tmp_path / "text"))
+    for name, info in sections.items():
+        assert _body(info["file_path"]) == _body(expected[name]["file_path"])
@@ -3,6 +3,7 @@ from pathlib import Path
 from unittest.mock import patch
 
 from sidecar import runner
+from utils.page_cache import file_sha256, write_source_record
 
 
 def test_runner_skips_split_when_question_types_exists(tmp_path: Path):
@@ -12,6 +13,8 @@ def test_runner_skips_split_when_question_types_exists(tmp_path: Path):
     # 预创建缓存：question_types 已存在，视为 split 完成
     workdir = tmp_path / "question_processing_a"
     (workdir / "question_types").mkdir(parents=True, exist_ok=True)
+    # 缓存须记录来源PDF的哈希，否则视为过期
+    write_source_record(str(workdir), file_sha256(str(pdf)), pdf.name)
 
     calls = []
 
@@ -46,6 +49,7 @@ def test_runner_skips_all_when_summary_exists(tmp_path: Path):
     workdir = tmp_path / "question_processing_b"
     workdir.mkdir(parents=True, exist_ok=True)
     (workdir / "split_summary.md").write_text("summary")
+    write_source_record(str(workdir), file_sha256(str(pdf)), pdf.name)
 
     calls = []
 
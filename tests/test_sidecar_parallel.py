@@ -0,0 +1,62 @@
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from sidecar import runner
+
+
+def _make_pdf(path: Path):
+    import fitz
+
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "二、单选题：（2题）\n1. 题一 A.x B.y\n2. 题二 A.x B.y", fontname="china-s")
+    doc.save(str(path))
+    doc.close()
+
+
+def test_runner_uses_explicit_work_root_without_chdir(tmp_path: Path, monkeypatch):
+    pdf = tmp_path / "in" / "a.pdf"
+    pdf.parent.mkdir()
+    pdf.write_text("%PDF-1.4\n")
+    parent = tmp_path / "work"
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+
+    seen = []
+
+    def fake_process_questions(self, pdf_path, output_path, step):
+        seen.append((os.getcwd(), self.work_root, step))
+        (Path(self.work_root) / "question_processing_a" / "question_types").mkdir(parents=True, exist_ok=True)
+
+    with patch("question_processor.QuestionProcessor.process_questions", new=fake_process_questions):
+        workdir = runner.run_split_and_split_questions(pdf, parent, lambda e: None, "fid-1")
+
+    assert workdir == parent.resolve() / "question_processing_a"
+    assert [step for _, _, step in seen] == ["split", "split-questions"]
+    assert all(cwd == str(elsewhere) and root == str(parent.resolve()) for cwd, root, _ in seen)
+    assert not (elsewhere / "question_processing_a").exists()
+
+
+def test_parallel_inputs_interleave_whole_event_lines(tmp_path: Path):
+    inputs = []
+    for name in ("a", "b", "c"):
+        pdf = tmp_path / f"{name}.pdf"
+        _make_pdf(pdf)
+        inputs.append((pdf, f"fid-{name}"))
+    bad = tmp_path / "bad.pdf"
+    bad.write_text("not a pdf")
+    inputs.append((bad, "fid-bad"))
+    lines = []
+
+    with patch("time.sleep", lambda *_: None):
+        results = runner.run_inputs_parallel(inputs, tmp_path / "work", lines.append, jobs=2)
+
+    events = [json.loads(line) for line in lines]
+    completed = sorted(e["fileId"] for e in events if e["type"] == "completed")
+    assert completed == ["fid-a", "fid-b", "fid-c"]
+    assert results["fid-a"] is None and results["fid-bad"]
+    assert any(e["type"] == "error" and e["stage"] == "runtime" and e["fileId"] == "fid-bad" for e in events)
+    for name in ("a", "b", "c"):
+        assert (tmp_path / "work" / f"question_processing_{name}" / "split_summary.md").exists()
@@ -0,0 +1,93 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from sidecar.server import parse_request, serve
+
+
+def _capture():
+    events = []
+    return events, lambda e: events.append(json.loads(e.to_json()))
+
+
+def test_parse_request_reads_run_params():
+    request = parse_request(json.dumps({
+        "id": "r1",
+        "method": "run",
+        "params": {"input": "a.pdf", "fileId": "abc", "formats": ["csv", "csv", "jsonl"], "mock": True},
+    }))
+
+    assert request.method == "run"
+    assert request.file_id == "abc"
+    assert request.input == Path("a.pdf")
+    assert request.formats == ("csv", "jsonl")
+    assert request.mock is True
+
+
+@pytest.mark.parametrize("line", [
+    "not json",
+    "[1, 2]",
+    '{"method": "explode"}',
+    '{"method": "run", "params": {}}',
+    '{"method": "run", "params": {"input": "a.pdf", "formats": ["xls"]}}',
+])
+def test_parse_request_rejects_malformed_lines(line):
+    with pytest.raises(ValueError):
+        parse_request(line)
+
+
+def test_serve_keeps_running_after_bad_requests_and_stops_on_shutdown(tmp_path: Path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_text("%PDF-1.4\n")
+    lines = [
+        "garbage\n",
+        json.dumps({"id": "p1", "method": "ping"}),
+        json.dumps({"id": "r1", "method": "run", "params": {"input": str(tmp_path / "missing.pdf"), "fileId": "f0"}}),
+        json.dumps({"id": "r2", "method": "run", "params": {"input": str(pdf), "fileId": "f1"}}),
+        json.dumps({"id": "r3", "method": "run", "params": {"input": str(pdf), "fileId": "f2"}}),
+        json.dumps({"id": "s", "method": "shutdown"}),
+        json.dumps({"id": "r4", "method": "run", "params": {"input": str(pdf), "fileId": "f3"}}),
+    ]
+    events, emit = _capture()
+    jobs = []
+
+    def run_job(request):
+        jobs.append(request.file_id)
+        if request.file_id == "f1":
+            raise RuntimeError("boom")
+
+    assert serve(lines, emit, run_job, warm=False) == 0
+
+    assert jobs == ["f1", "f2"]
+    errors = [(e["stage"], e["fileId"]) for e in events if e["type"] == "error"]
+    assert errors == [("validate", "serve"), ("validate", "f0"), ("runtime", "f1")]
+    messages = [e["message"] for e in events if e["stage"] == "serve"]
+    assert messages == ["ready", "pong", "shutdown"]
+
+
+def test_serve_subprocess_streams_events_per_file_id(tmp_path: Path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_text("%PDF-1.4\n")
+    requests = "".join(
+        json.dumps({"id": fid, "method": "run", "params": {"input": str(pdf), "fileId": fid, "mock": True}}) + "\n"
+        for fid in ("job-1", "job-2")
+    )
+    repo_root = Path(__file__).resolve().parents[1]
+
+    proc = subprocess.run(
+        [sys.executable, "-m", "sidecar.main", "--serve"],
+        input=requests,
+        capture_output=True,
+        text=True,
+        cwd=repo_root,
+        timeout=120,
+    )
+
+    assert proc.returncode == 0
+    events = [json.loads(line) for line in proc.stdout.splitlines() if line.strip()]
+    completed = [e["fileId"] for e in events if e["type"] == "completed"]
+    assert completed == ["job-1", "job-2"]
+    assert events[-1]["message"] == "shutdown"
@@ -0,0 +1,112 @@
+"""
+流式响应与逐题回调的测试
+"""
+
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from essay_standardizer import EssayStandardizer
+from utils.metrics import get_llm_stats
+from utils.rate_limiter import RateLimiter
+from utils.standardization_utils import QuestionStreamSplitter, call_openai_with_retries
+
+RESPONSE = (
+    "### 试题 1\n\n#### 题型\n论述I\n\n#### 难度\n中3\n\n#### 题干\n论述数据安全的意义。\n\n"
+    "#### 选择项\n无\n\n#### 答案\n要点一\n\n=== 题目分隔符 ===\n\n"
+    "### 试题 2\n\n#### 题型\n论述I\n\n#### 难度\n未提供\n\n#### 题干\n论述数据分级的方法。\n\n"
+    "#### 选择项\n无\n\n#### 答案\n要点二\n"
+)
+
+
+def _events(text, size=7, fail_after=None):
+    for i, start in enumerate(range(0, len(text), size)):
+        if fail_after is not None and i == fail_after:
+            raise ConnectionError("stream reset")
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[start:start + size]))], usage=None)
+    yield SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=12, completion_tokens=30, total_tokens=42))
+
+
+class StreamingClient:
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self.kwargs = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.kwargs.append(kwargs)
+        return self.streams.pop(0)
+
+
+def test_splitter_emits_each_question_as_soon_as_separator_arrives():
+    received = []
+    splitter = QuestionStreamSplitter(received.append)
+
+    first_separator_end = RESPONSE.index("=== 题目分隔符 ===") + len("=== 题目分隔符 ===")
+    for ch in RESPONSE[:first_separator_end]:
+        splitter.feed(ch)
+    assert len(received) == 1
+    assert received[0].startswith("### 试题 1")
+
+    splitter.feed(RESPONSE[first_separator_end:])
+    assert len(received) == 1
+    splitter.flush()
+    assert received[1].startswith("### 试题 2")
+
+
+def test_streaming_call_returns_full_text_and_calls_back_per_question():
+    client = StreamingClient([_events(RESPONSE)])
+    received = []
+
+    result = call_openai_with_retries(
+        client, "m", "题目", max_retries=1, rate_limiter=RateLimiter(), stream=True, on_question=received.append
+    )
+
+    assert result == RESPONSE
+    assert client.kwargs[0]["stream"] is True
+    assert [q.split("\n", 1)[0] for q in received] == ["### 试题 1", "### 试题 2"]
+
+
+def test_streaming_call_requests_usage_and_reads_it_from_final_chunk():
+    stats = get_llm_stats()
+    stats.reset()
+    client = StreamingClient([_events(RESPONSE)])
+    limiter = RateLimiter()
+
+    with patch.object(limiter, "reconcile", wraps=limiter.reconcile) as reconcile:
+        call_openai_with_retries(client, "m", "题目", max_retries=1, rate_limiter=limiter, stream=True)
+
+    snapshot = stats.snapshot()
+    stats.reset()
+    assert client.kwargs[0]["stream_options"] == {"include_usage": True}
+    assert reconcile.call_args.args[1] == 42
+    assert (snapshot["tokens_in"], snapshot["tokens_out"]) == (12, 30)
+
+
+def test_retry_after_mid_stream_failure_does_not_repeat_questions():
+    client = StreamingClient([_events(RESPONSE, fail_after=20), _events(RESPONSE)])
+    received = []
+
+    with patch("utils.standardization_utils.time.sleep"):
+        result = call_openai_with_retries(
+            client, "m", "题目", max_retries=2, rate_limiter=RateLimiter(), stream=True, on_question=received.append
+        )
+
+    assert result == RESPONSE
+    assert [q.split("\n", 1)[0] for q in received] == ["### 试题 1", "### 试题 2"]
+
+
+def test_runner_hands_streamed_questions_to_listener(tmp_path: Path):
+    input_file = tmp_path / "essay.md"
+    input_file.write_text("# 论述题 (2题)\n\n## 原始文本\n\n```\n1. 论述数据安全的意义。\n2. 论述数据分级的方法。\n```\n", encoding="utf-8")
+
+    standardizer = EssayStandardizer(api_key="test-key", api_base="http://localhost", model="test-model")
+    standardizer.config["stream"] = True
+    standardizer.client = StreamingClient([_events(RESPONSE)])
+    seen = []
+    standardizer.question_listener = lambda chunk_index, block, parsed: seen.append((chunk_index, parsed["question_stem"]))
+
+    stats = standardizer.standardize_file(str(input_file), str(tmp_path / "out"))
+
+    assert stats["total_questions"] == 2
+    assert seen == [(1, "论述数据安全的意义。"), (1, "论述数据分级的方法。")]
@@ -0,0 +1,107 @@
+"""
+CSV / JSONL / Parquet 导出的测试
+"""
+
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+from essay_standardizer import EssayStandardizer
+from sidecar import runner
+from utils import tabular_export
+from utils.standardization_utils import save_markdown_chunk_result
+from utils.tabular_export import export_questions, write_questions_csv, write_questions_jsonl
+from utils.workbook_export import QUESTION_HEADERS
+
+QUESTIONS = [
+    {"question_type": "论述I", "difficulty": "中3", "question_stem": f"论述第{i}题，含逗号,与\"引号\"", "answer": "要点"}
+    for i in range(1, 4)
+]
+BLOCK = "### 试题 1\n\n#### 题型\n论述I\n\n#### 难度\n未提供\n\n#### 题干\n{stem}\n\n#### 选择项\n无\n\n#### 答案\n要点"
+
+
+def test_csv_uses_excel_columns(tmp_path):
+    output = tmp_path / "bank.csv"
+
+    assert write_questions_csv(iter(QUESTIONS), str(output)) == 3
+
+    with open(output, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == QUESTION_HEADERS
+    assert rows[3][3] == QUESTIONS[2]["question_stem"]
+
+
+def test_jsonl_one_record_per_line(tmp_path):
+    output = tmp_path / "bank.jsonl"
+
+    write_questions_jsonl(QUESTIONS, str(output))
+
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert len(records) == 3
+    assert list(records[0]) == QUESTION_HEADERS
+    assert records[1]["题干"] == QUESTIONS[1]["question_stem"]
+
+
+def test_parquet_round_trip(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    output = tmp_path / "bank.parquet"
+
+    assert tabular_export.write_questions_parquet(QUESTIONS, str(output), batch_rows=2) == 3
+
+    table = pq.read_table(output)
+    assert table.column_names == QUESTION_HEADERS
+    assert table.column("题干").to_pylist() == [q["question_stem"] for q in QUESTIONS]
+
+
+def test_export_skips_parquet_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(tabular_export, "pq", None)
+
+    written = export_questions(QUESTIONS, str(tmp_path / "bank.xlsx"), ["jsonl", "parquet", "csv"])
+
+    assert written == {"jsonl": str(tmp_path / "bank.jsonl"), "csv": str(tmp_path / "bank.csv")}
+    with pytest.raises(ValueError):
+        export_questions(QUESTIONS, str(tmp_path / "bank.xlsx"), ["xml"])
+
+
+def _write_standardized(directory: Path):
+    blocks = [BLOCK.format(stem=f"论述第{i}题") for i in range(1, 3)]
+    save_markdown_chunk_result(1, blocks, str(directory), "论述题")
+
+
+def test_process_standardized_to_excel_writes_extra_formats(tmp_path):
+    standardized_dir = tmp_path / "论述题_standardized"
+    _write_standardized(standardized_dir)
+    standardizer = EssayStandardizer(api_key="test-key", api_base="http://localhost", model="test-model")
+
+    excel_path = standardizer.process_standardized_to_excel(str(standardized_dir), formats=["csv", "jsonl"])
+
+    base = Path(excel_path).with_suffix("")
+    assert base.with_suffix(".csv").exists()
+    assert len(base.with_suffix(".jsonl").read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_sidecar_exports_standardized_types(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    work_dir = tmp_path / "question_processing_a"
+    _write_standardized(work_dir / "question_types" / "论述题_standardized")
+    events = []
+
+    written = runner.export_standardized_questions(work_dir, ["jsonl"], events.append, "fid-1")
+
+    assert written == {"论述题.jsonl": str(work_dir / "exports" / "论述题.jsonl")}
+    assert [e.stage for e in events if e.type != "progress"] == ["export", "export"]
+    assert events[-1].percent == 1.0
+
+
+def test_sidecar_export_does_not_require_api_key(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(runner, "_HANDLERS", None)
+    work_dir = tmp_path / "question_processing_a"
+    _write_standardized(work_dir / "question_types" / "论述题_standardized")
+
+    written = runner.export_standardized_questions(work_dir, ["csv"], lambda e: None, "fid-1")
+
+    assert Path(written["论述题.csv"]).exists()
+    assert all(handler._client is None for handler in runner._HANDLERS)
@@ -0,0 +1,92 @@
+"""
+工作目录打包存储的测试
+"""
+
+from pathlib import Path
+
+from question_processor import QuestionProcessor
+from utils.work_store import WORK_STORE_FILE, WorkStore, export_markdown
+
+SECTION = "\n".join(
+    f"{i}. 第{i}道单选题的题干内容比较长一些？\nA. 甲\nB. 乙\n参考答案：A" for i in range(1, 6)
+)
+
+
+def _write_type_file(work_dir: Path) -> None:
+    types_dir = work_dir / "question_types"
+    types_dir.mkdir(parents=True)
+    (types_dir / "single_choice.md").write_text(
+        f"# 单选题 (5题)\n\n## 提取时间\n-\n\n## 预期题数\n5\n\n## 原始文本\n\n```\n\n{SECTION}\n```\n", encoding="utf-8"
+    )
+
+
+def _strip_time(text: str) -> str:
+    return "\n".join(line for line in text.splitlines() if not line[:4].isdigit())
+
+
+def test_store_random_access_and_chunk_results(tmp_path):
+    with WorkStore(str(tmp_path / WORK_STORE_FILE)) as store:
+        store.put_section("单选题", "single_choice", 3, "原文")
+        assert store.replace_questions("单选题", ["题一", "题二", "题三"]) == 3
+        assert store.replace_questions("判断题", ["判断一"]) == 1
+        store.put_chunk_result("单选题", 2, ["### 试题 1\n```嵌套```", "=== 题目分隔符 ==="])
+
+        assert store.get_question("单选题", 2) == "题二"
+        assert store.get_question_by_id(4) == ("判断题", 1, "判断一")
+        assert list(store.iter_questions("单选题"))[-1] == (3, "题三")
+        assert store.question_count() == 4
+        assert store.get_chunk_result("单选题", 2) == ["### 试题 1\n```嵌套```", "=== 题目分隔符 ==="]
+        assert store.get_chunk_result("单选题", 1) is None
+        assert store.get_section("单选题")["expected_count"] == 3
+
+
+def test_split_questions_writes_one_store_instead_of_per_question_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    work_dir = tmp_path / "question_processing_bank"
+    _write_type_file(work_dir)
+
+    QuestionProcessor(pdf_workers=1, work_format="store").process_questions("bank.pdf", "out.xlsx", step="split-questions")
+
+    assert not list(work_dir.rglob("question_*.md"))
+    assert "work_store.sqlite3" in (work_dir / "split_summary.md").read_text(encoding="utf-8")
+    with WorkStore.for_work_dir(str(work_dir)) as store:
+        assert store.question_count("单选题") == 5
+        assert store.get_question("单选题", 5).startswith("5. 第5道单选题")
+
+
+def test_markdown_export_matches_legacy_layout(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    legacy_dir = tmp_path / "question_processing_legacy"
+    _write_type_file(legacy_dir)
+    QuestionProcessor(pdf_workers=1, work_format="markdown").process_questions("legacy.pdf", "out.xlsx", step="split-questions")
+
+    packed_dir = tmp_path / "question_processing_packed"
+    _write_type_file(packed_dir)
+    QuestionProcessor(pdf_workers=1, work_format="store").process_questions("packed.pdf", "out.xlsx", step="split-questions")
+    standardized = packed_dir / "question_types" / "单选题_standardized"
+    standardized.mkdir()
+    (standardized / "standardized_chunk_001.md").write_text("## 标准化题目\n\n```\n### 试题 1\n```\n", encoding="utf-8")
+    export_dir = tmp_path / "exported"
+    with WorkStore.for_work_dir(str(packed_dir)) as store:
+        store.import_chunk_results("单选题", str(standardized))
+        assert export_markdown(store, str(export_dir)) == {"单选题": 5}
+
+    legacy_files = sorted((legacy_dir / "question_types" / "单选题_questions").glob("question_*.md"))
+    exported_files = sorted((export_dir / "单选题_questions").glob("question_*.md"))
+    assert [p.name for p in exported_files] == [p.name for p in legacy_files]
+    for legacy, exported in zip(legacy_files, exported_files):
+        assert _strip_time(exported.read_text(encoding="utf-8")) == _strip_time(legacy.read_text(encoding="utf-8"))
+    assert "### 试题 1" in (export_dir / "单选题_standardized" / "standardized_chunk_001.md").read_text(encoding="utf-8")
+    assert (export_dir / "single_choice.md").read_text(encoding="utf-8").startswith("# 单选题 (5题)")
+
+
+def test_split_questions_keeps_per_question_files_by_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("WORK_FORMAT", raising=False)
+    work_dir = tmp_path / "question_processing_bank"
+    _write_type_file(work_dir)
+
+    QuestionProcessor(pdf_workers=1).process_questions("bank.pdf", "out.xlsx", step="split-questions")
+
+    assert len(list((work_dir / "question_types" / "单选题_questions").glob("question_*.md"))) == 5
+    assert not (work_dir / "work_store.sqlite3").exists()
@@ -0,0 +1,77 @@
+"""
+汇总工作簿导出的测试
+"""
+
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+from utils.workbook_export import (
+    LAYOUT_COMBINED,
+    QUESTION_HEADERS,
+    export_question_workbook,
+    read_template_headers,
+)
+
+TEMPLATE = Path(__file__).resolve().parent.parent / "2-《数据安全管理员题库》（客观题）-20250805.xlsx"
+
+
+def _question(question_type, stem, answer="A"):
+    return {"question_type": question_type, "difficulty": "中3", "question_stem": stem,
+            "option_A": "甲", "option_B": "乙", "answer": answer}
+
+
+QUESTIONS = {
+    "单选": [_question("单选", "单选一"), _question("单选", "单选二")],
+    "判断": (q for q in [_question("判断", "判断一", answer="正确")]),
+}
+
+
+def test_one_sheet_per_type(tmp_path):
+    output = tmp_path / "bank.xlsx"
+
+    counts = export_question_workbook(dict(QUESTIONS), str(output))
+
+    assert counts == {"单选": 2, "判断": 1}
+    wb = openpyxl.load_workbook(output)
+    assert wb.sheetnames == ["单选", "判断"]
+    rows = [list(r) for r in wb["单选"].iter_rows(values_only=True)]
+    assert rows[0] == QUESTION_HEADERS
+    assert [r[3] for r in rows[1:]] == ["单选一", "单选二"]
+
+
+def test_combined_sheet_uses_template_headers(tmp_path):
+    template = tmp_path / "template.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.title = "题目表"
+    wb.active.append(["代码", "题型", "难度", "题干", "选择项", None, None])
+    wb.active.append(["说明行"])
+    wb.save(template)
+    output = tmp_path / "combined.xlsx"
+
+    counts = export_question_workbook(
+        {"单选": [_question("单选", "单选一")], "判断": [_question("判断", "判断一", "错误")]},
+        str(output), layout=LAYOUT_COMBINED, template_path=str(template),
+    )
+
+    assert counts == {"单选": 1, "判断": 1}
+    result = openpyxl.load_workbook(output)
+    assert result.sheetnames == ["题目表"]
+    rows = [list(r) for r in result["题目表"].iter_rows(values_only=True)]
+    assert rows[0][:5] == ["代码", "题型", "难度", "题干", "选择项"]
+    assert [r[1] for r in rows[1:]] == ["单选", "判断"]
+
+
+@pytest.mark.skipif(not TEMPLATE.exists(), reason="仓库模板文件不存在")
+def test_reads_repository_template_header():
+    headers, title = read_template_headers(str(TEMPLATE))
+
+    assert title == "题目表"
+    assert headers[:5] == ["代码", "题型", "难度", "题干", "选择项"]
+    assert headers[-3:] == ["答案", "分数", "题目一致性"]
+
+
+def test_unknown_layout_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        export_question_workbook({}, str(tmp_path / "x.xlsx"), layout="pivot")
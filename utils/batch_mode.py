@@ -0,0 +1,339 @@
+"""
+离线批量（Batch API）模式
+
+夜间重跑大量题库时不需要交互式延迟，更看重成本与总吞吐。本模式不逐个调用
+``client.chat.completions.create``，而是把所有待处理chunk的prompt写入一个 JSONL 请求文件，
+一次性提交给批量接口，轮询到完成后再把结果写回常规的 ``standardized_chunk_NNN.md`` 布局。
+模型漏掉或输出残缺的题目不做定向补问（补问只能走同步接口），只打印出来。
+
+后端：
+- OpenAIBatchBackend: OpenAI Batch API（files + batches）
+- LocalBatchBackend: 本地文件替身，在目录中模拟提交/轮询/结果文件，
+  由 responder 逐行生成响应，便于离线测试完整往返或对接不支持批量接口的服务
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.chunk_runner import (
+    ChunkJob,
+    ChunkOutcome,
+    ChunkRequest,
+    build_chunk_request,
+    complete_chunk_job,
+    finalize_standardization,
+    is_chunk_done,
+    prepare_chunk_jobs,
+    resumed_outcome,
+)
+from utils.response_cache import get_response_cache
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_REQUESTS_FILE = "batch_requests.jsonl"
+BATCH_STATE_FILE = "batch_state.json"
+# 与各标准化器 call_ai_standardization 使用的 temperature 保持一致（缓存键相同）
+BATCH_TEMPERATURE = 0.1
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+@dataclass
+class BatchStatus:
+    """批量任务的状态与结果"""
+
+    status: str
+    output_text: Optional[str] = None
+    error_text: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+
+class OpenAIBatchBackend:
+    """OpenAI Batch API 后端"""
+
+    def __init__(self, client: Any, completion_window: str = "24h"):
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, requests_path: str) -> str:
+        with open(requests_path, 'rb') as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> BatchStatus:
+        batch = self.client.batches.retrieve(batch_id)
+        status = BatchStatus(status=batch.status)
+        if status.finished:
+            if getattr(batch, 'output_file_id', None):
+                status.output_text = self.client.files.content(batch.output_file_id).text
+            if getattr(batch, 'error_file_id', None):
+                status.error_text = self.client.files.content(batch.error_file_id).text
+        return status
+
+
+class LocalBatchBackend:
+    """
+    本地文件替身
+
+    submit 把请求文件复制到 ``root_dir/{batch_id}/input.jsonl``；第 polls_until_done 次轮询时
+    逐行调用 responder(请求体) 生成响应，写出与 Batch API 相同格式的 output.jsonl。
+    """
+
+    def __init__(self, root_dir: str, responder: Callable[[Dict[str, Any]], str], polls_until_done: int = 1):
+        self.root_dir = root_dir
+        self.responder = responder
+        self.polls_until_done = max(1, polls_until_done)
+        self._polls: Dict[str, int] = {}
+
+    def submit(self, requests_path: str) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        batch_dir = os.path.join(self.root_dir, batch_id)
+        os.makedirs(batch_dir, exist_ok=True)
+        shutil.copyfile(requests_path, os.path.join(batch_dir, "input.jsonl"))
+        return batch_id
+
+    def poll(self, batch_id: str) -> BatchStatus:
+        batch_dir = os.path.join(self.root_dir, batch_id)
+        output_path = os.path.join(batch_dir, "output.jsonl")
+        if not os.path.exists(output_path):
+            self._polls[batch_id] = self._polls.get(batch_id, 0) + 1
+            if self._polls[batch_id] < self.polls_until_done:
+                return BatchStatus(status="in_progress")
+            self._process(os.path.join(batch_dir, "input.jsonl"), output_path)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            return BatchStatus(status="completed", output_text=f.read())
+
+    def _process(self, input_path: str, output_path: str) -> None:
+        results: List[str] = []
+        with open(input_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                result: Dict[str, Any] = {"id": f"local_req_{uuid.uuid4().hex[:8]}", "custom_id": request["custom_id"]}
+                try:
+                    content = self.responder(request["body"])
+                    result["response"] = {
+                        "status_code": 200,
+                        "body": {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]},
+                    }
+                    result["error"] = None
+                except Exception as exc:  # noqa: BLE001 - 单条失败写入错误字段
+                    result["response"] = None
+                    result["error"] = {"message": str(exc)}
+                results.append(json.dumps(result, ensure_ascii=False))
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(results) + ("\n" if results else ""))
+        os.replace(tmp_path, output_path)
+
+
+def make_sync_responder(client: Any, max_retries: int = 3) -> Callable[[Dict[str, Any]], str]:
+    """用同步对话接口逐条应答的 responder（供 LocalBatchBackend 对接不支持批量接口的服务）。"""
+    from utils.standardization_utils import call_openai_with_retries
+
+    def respond(body: Dict[str, Any]) -> str:
+        content = call_openai_with_retries(
+            client=client,
+            model=body["model"],
+            prompt=body["messages"][0]["content"],
+            max_retries=max_retries,
+            temperature=body.get("temperature", BATCH_TEMPERATURE),
+        )
+        if content is None:
+            raise RuntimeError("AI调用失败")
+        return content
+
+    return respond
+
+
+def build_batch_line(custom_id: str, model: str, prompt: str) -> str:
+    """构造一行 Batch API 请求。"""
+    return json.dumps(
+        {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": BATCH_TEMPERATURE,
+            },
+        },
+        ensure_ascii=False,
+    )
+
+
+def parse_batch_output(output_text: Optional[str]) -> Dict[str, Optional[str]]:
+    """解析结果文件：custom_id -> 响应文本（失败的请求为 None）。"""
+    results: Dict[str, Optional[str]] = {}
+    for line in (output_text or "").splitlines():
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        custom_id = item.get("custom_id")
+        if not custom_id:
+            continue
+        response = item.get("response") or {}
+        content = None
+        if response.get("status_code") == 200:
+            choices = (response.get("body") or {}).get("choices") or []
+            if choices:
+                content = (choices[0].get("message") or {}).get("content")
+        results[custom_id] = content
+    return results
+
+
+@dataclass
+class _PendingChunk:
+    custom_id: str
+    type_key: str
+    handler: Any
+    job: ChunkJob
+    request: ChunkRequest
+
+
+def _load_state(state_path: str) -> Dict[str, Any]:
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state_path: str, state: Dict[str, Any]) -> None:
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def run_batch_standardization(
+    type_inputs: Dict[str, Tuple[Any, str]],
+    backend: Any,
+    batch_dir: str,
+    poll_interval: float = 60.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Dict[str, Dict]:
+    """
+    以批量模式标准化多个题型
+
+    已完成（断点）、规则快速通道全部解析、或命中响应缓存的chunk在本地直接完成；
+    其余chunk的prompt写入同一个请求文件提交。提交后的批次ID记录在 batch_state.json，
+    进程中断后重新运行会继续轮询同一批次而不是重复提交。
+
+    Args:
+        type_inputs: {题型键: (标准化器实例, 输入文件)}
+        backend: 批量后端（OpenAIBatchBackend / LocalBatchBackend）
+        batch_dir: 请求文件与批次状态的存放目录
+        poll_interval: 轮询间隔（秒）
+
+    Returns:
+        {题型键: 该题型的 quality_stats}，准备阶段失败的题型为 {"error": ...}
+    """
+    os.makedirs(batch_dir, exist_ok=True)
+    results: Dict[str, Dict] = {}
+    prepared: Dict[str, Tuple[Any, str, List[ChunkJob]]] = {}
+    outcomes: Dict[str, List[ChunkOutcome]] = {}
+    pending: List[_PendingChunk] = []
+    cache = get_response_cache()
+
+    for key, (handler, input_file) in type_inputs.items():
+        try:
+            output_dir, jobs = prepare_chunk_jobs(handler, input_file)
+        except Exception as exc:  # noqa: BLE001 - 单个题型失败不影响其他题型
+            print(f"❌ {key} 准备失败: {exc}")
+            results[key] = {"error": str(exc)}
+            continue
+        prepared[key] = (handler, output_dir, jobs)
+        outcomes[key] = []
+        for job in jobs:
+            if is_chunk_done(job):
+                outcomes[key].append(resumed_outcome(job))
+                continue
+            request = build_chunk_request(handler, job)
+            if request.prompt is None:
+                outcomes[key].append(complete_chunk_job(handler, job, request, None))
+                continue
+            cached = cache.get(handler.model, BATCH_TEMPERATURE, request.prompt) if cache is not None else None
+            if cached is not None:
+                outcomes[key].append(complete_chunk_job(handler, job, request, cached, repair=False))
+                continue
+            pending.append(_PendingChunk(f"{key}:{job.index}", key, handler, job, request))
+
+    if pending:
+        responses = _submit_and_wait(pending, backend, batch_dir, poll_interval, sleep)
+        for item in pending:
+            content = responses.get(item.custom_id)
+            if content is not None and cache is not None:
+                cache.put(item.handler.model, BATCH_TEMPERATURE, item.request.prompt, content)
+            # 补问会绕过批量接口变成同步调用，批量模式只报告缺题
+            outcomes[item.type_key].append(
+                complete_chunk_job(item.handler, item.job, item.request, content, repair=False)
+            )
+
+    for key, (handler, output_dir, jobs) in prepared.items():
+        type_outcomes = sorted(outcomes[key], key=lambda o: o.index)
+        results[key] = finalize_standardization(handler, output_dir, jobs, type_outcomes)
+    return results
+
+
+def _submit_and_wait(
+    pending: List[_PendingChunk],
+    backend: Any,
+    batch_dir: str,
+    poll_interval: float,
+    sleep: Callable[[float], None],
+) -> Dict[str, Optional[str]]:
+    requests_path = os.path.join(batch_dir, BATCH_REQUESTS_FILE)
+    lines = [build_batch_line(item.custom_id, item.handler.model, item.request.prompt) for item in pending]
+    payload = "\n".join(lines) + "\n"
+    requests_hash = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    state_path = os.path.join(batch_dir, BATCH_STATE_FILE)
+    state = _load_state(state_path)
+    if state.get("requests_hash") == requests_hash and state.get("batch_id") and not state.get("ingested"):
+        batch_id = state["batch_id"]
+        print(f"🔁 继续轮询已提交的批次: {batch_id}")
+    else:
+        with open(requests_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        batch_id = backend.submit(requests_path)
+        state = {"batch_id": batch_id, "requests_hash": requests_hash, "requests": len(lines), "ingested": False}
+        _save_state(state_path, state)
+        print(f"📦 已提交批次 {batch_id}：{len(lines)} 个chunk请求")
+
+    status = backend.poll(batch_id)
+    while not status.finished:
+        print(f"⏳ 批次 {batch_id} 状态: {status.status}，{poll_interval:.0f} 秒后再次查询")
+        sleep(poll_interval)
+        status = backend.poll(batch_id)
+
+    responses = parse_batch_output(status.output_text)
+    print(f"📥 批次 {batch_id} {status.status}：收到 {sum(1 for v in responses.values() if v)} / {len(lines)} 个结果")
+    if status.error_text:
+        print(f"⚠️  批次 {batch_id} 存在失败请求，失败的chunk将记为失败，可重新运行续跑")
+
+    state["ingested"] = True
+    state["status"] = status.status
+    _save_state(state_path, state)
+    return responses
@@ -0,0 +1,84 @@
+"""
+分块标准化断点续跑
+
+在 ``{题型}_standardized`` 输出目录中维护 checkpoint.json，记录每个chunk的
+完成状态与其输入内容哈希。重启时仅重新处理缺失、失败或输入已变化的chunk。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_VERSION = 1
+
+
+def hash_chunk_input(chunk1: List[str], chunk2: Optional[List[str]] = None) -> str:
+    """计算chunk输入（当前块 + 前瞻块）的 SHA-256。"""
+    digest = hashlib.sha256()
+    digest.update(''.join(chunk1).encode('utf-8'))
+    digest.update(b'\0')
+    if chunk2:
+        digest.update(''.join(chunk2).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ChunkCheckpoint:
+    """chunk级断点清单（线程安全，每次更新都原子写盘）"""
+
+    def __init__(self, output_dir: str, chunks: Optional[Dict[str, Dict]] = None):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, CHECKPOINT_FILE)
+        self.chunks: Dict[str, Dict] = chunks or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, output_dir: str) -> "ChunkCheckpoint":
+        """读取已有清单；不存在或损坏时返回空清单。"""
+        path = os.path.join(output_dir, CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return cls(output_dir)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as exc:
+            print(f"⚠️  断点文件无法读取，将重新处理全部chunk: {exc}")
+            return cls(output_dir)
+        if data.get("version") != CHECKPOINT_VERSION:
+            return cls(output_dir)
+        return cls(output_dir, data.get("chunks", {}))
+
+    def is_done(self, index: int, input_hash: str) -> bool:
+        """chunk已成功完成、输入未变化且结果文件仍存在时返回 True。"""
+        entry = self.chunks.get(str(index))
+        if not entry or entry.get("status") != "done" or entry.get("input_hash") != input_hash:
+            return False
+        result_file = os.path.join(self.output_dir, f"standardized_chunk_{index:03d}.md")
+        return os.path.exists(result_file)
+
+    def question_count(self, index: int) -> int:
+        return int(self.chunks.get(str(index), {}).get("questions", 0))
+
+    def mark_done(self, index: int, input_hash: str, question_count: int) -> None:
+        self._update(index, {"status": "done", "input_hash": input_hash, "questions": question_count})
+
+    def mark_failed(self, index: int, input_hash: str, error: str = "") -> None:
+        self._update(index, {"status": "failed", "input_hash": input_hash, "error": error})
+
+    def _update(self, index: int, entry: Dict) -> None:
+        entry["updated"] = datetime.now().isoformat()
+        with self._lock:
+            self.chunks[str(index)] = entry
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CHECKPOINT_VERSION, "chunks": self.chunks}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,456 @@
+"""
+分块标准化执行器
+
+将各题型标准化器共用的 standardize_file 流程抽取到此处：
+准备分块 -> （并发）调用AI标准化每个chunk -> 汇总质量统计。
+并发度由标准化器配置中的 ``max_workers`` 控制，1 表示顺序执行。
+
+``run_standardization_for_types`` 则把多个题型的chunk汇入同一个队列，
+在全局并发上限下按题型轮转派发，避免小题型排在大题型之后。
+
+配置 ``resume``（默认开启）时借助输出目录中的 checkpoint.json 断点续跑，
+已完成且输入未变化的chunk不再调用AI，也不会重写其原始分块文件。
+
+配置 ``extraction_mode`` 为 ``offsets`` 时改用偏移量抽取（见 utils/offset_extraction.py）；
+配置 ``fast_path`` 时先用规则解析版式规整的题目（见 utils/fast_path.py），只把其余题目交给AI；
+配置 ``stream`` 时流式读取响应，每道题目到达即解析并通知 ``question_listener``；
+配置 ``repair_missing``（默认开启）时对模型漏掉或输出残缺的题目定向补问（见 utils/question_repair.py）。
+"""
+
+from __future__ import annotations
+
+import filecmp
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import zip_longest
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.checkpoint import ChunkCheckpoint, hash_chunk_input
+from utils.fast_path import FAST_PATH_TYPES, FastPathResult, apply_fast_path
+from utils.offset_extraction import (
+    EXTRACTION_MODE_OFFSETS,
+    EXTRACTION_MODE_VERBATIM,
+    create_offset_prompt,
+    render_offset_questions,
+)
+from utils.question_repair import RepairPlan, merge_repaired, plan_repair
+
+
+# 跨题型调度时的默认全局并发上限
+DEFAULT_GLOBAL_WORKERS = 8
+
+
+@dataclass
+class ChunkJob:
+    """单个chunk的标准化任务"""
+
+    index: int
+    chunk1: List[str]
+    chunk2: Optional[List[str]]
+    output_dir: str
+    input_hash: str = ""
+    checkpoint: Optional[ChunkCheckpoint] = None
+
+
+@dataclass
+class ChunkOutcome:
+    """单个chunk的处理结果"""
+
+    index: int
+    question_count: int = 0
+    success: bool = False
+    resumed: bool = False
+
+
+def resolve_output_dir(handler: Any, input_file: str, output_dir: Optional[str] = None) -> str:
+    """计算标准化输出目录（默认位于输入文件同级的 ``{题型}_standardized``）。"""
+    if output_dir is None:
+        base_dir = os.path.dirname(input_file)
+        output_dir = os.path.join(base_dir, f"{handler.get_question_type_name()}_standardized")
+    return output_dir
+
+
+def prepare_chunk_jobs(handler: Any, input_file: str, output_dir: Optional[str] = None) -> Tuple[str, List[ChunkJob]]:
+    """备份原文件、切分并保存原始分块，返回 (输出目录, 任务列表)。"""
+    output_dir = resolve_output_dir(handler, input_file, output_dir)
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    print(f"🚀 开始标准化 {handler.get_question_type_name()}")
+    print(f"📁 输入文件: {input_file}")
+    print(f"📁 输出目录: {output_dir}")
+
+    # 备份原文件（内容未变化时保留已有备份）
+    if handler.config["preserve_original"]:
+        backup_file = os.path.join(output_dir, "original_backup.md")
+        if not (os.path.exists(backup_file) and filecmp.cmp(input_file, backup_file, shallow=False)):
+            shutil.copyfile(input_file, backup_file)
+            print(f"💾 原文件已备份到: {backup_file}")
+
+    # 切分文件
+    print("🔪 正在切分文件...")
+    chunks = handler.chunk_file(input_file)
+    print(f"📝 文件已切分为 {len(chunks)} 个块")
+
+    if handler.config.get("resume", True):
+        checkpoint = ChunkCheckpoint.load(output_dir)
+    else:
+        checkpoint = ChunkCheckpoint(output_dir)
+
+    jobs = [
+        ChunkJob(
+            index=i,
+            chunk1=chunk1,
+            chunk2=chunk2,
+            output_dir=output_dir,
+            input_hash=hash_chunk_input(chunk1, chunk2),
+            checkpoint=checkpoint,
+        )
+        for i, (chunk1, chunk2) in enumerate(chunks, 1)
+    ]
+
+    done_count = sum(1 for job in jobs if checkpoint.is_done(job.index, job.input_hash))
+    if done_count:
+        print(f"⏩ 断点续跑: {done_count}/{len(jobs)} 个chunk已完成，将跳过")
+
+    # 保存原始分块文件（用于对比；已完成的chunk不重写）
+    if handler.config["preserve_original"]:
+        print("💾 正在保存原始分块文件...")
+        for job in jobs:
+            if checkpoint.is_done(job.index, job.input_hash):
+                continue
+            handler.save_original_chunk(job.index, job.chunk1, job.chunk2, output_dir)
+
+    return output_dir, jobs
+
+
+def run_chunk_job(handler: Any, job: ChunkJob, total_chunks: int) -> ChunkOutcome:
+    """标准化单个chunk并立即写出 standardized_chunk_NNN.md（已完成的chunk直接跳过）。"""
+    if is_chunk_done(job):
+        print(f"⏭️  Chunk {job.index}/{total_chunks} 已完成，跳过")
+        return resumed_outcome(job)
+
+    print(f"\n🔄 处理 Chunk {job.index}/{total_chunks}")
+
+    request = build_chunk_request(handler, job)
+    ai_response = None
+    if request.prompt is not None:
+        if handler.config.get("stream") and not request.use_offsets:
+            ai_response = handler.call_ai_standardization(
+                request.prompt, on_question=_question_callback(handler, job.index)
+            )
+        else:
+            ai_response = handler.call_ai_standardization(request.prompt)
+    return complete_chunk_job(handler, job, request, ai_response)
+
+
+@dataclass
+class ChunkRequest:
+    """一个chunk需要发给AI的内容（prompt 为 None 表示全部题目已在本地解析）"""
+
+    prompt: Optional[str]
+    lines: List[str]
+    use_offsets: bool = False
+    fast: Optional[FastPathResult] = None
+
+
+def is_chunk_done(job: ChunkJob) -> bool:
+    return job.checkpoint is not None and job.checkpoint.is_done(job.index, job.input_hash)
+
+
+def resumed_outcome(job: ChunkJob) -> ChunkOutcome:
+    return ChunkOutcome(
+        index=job.index,
+        question_count=job.checkpoint.question_count(job.index),
+        success=True,
+        resumed=True,
+    )
+
+
+def build_chunk_request(handler: Any, job: ChunkJob) -> ChunkRequest:
+    """先走规则快速通道，再按 extraction_mode 为剩余原文构造prompt。"""
+    fast = None
+    if handler.config.get("fast_path") and handler.get_question_type_name() in FAST_PATH_TYPES:
+        fast = apply_fast_path(handler.get_question_type_name(), job.chunk1)
+        print(f"⚡ Chunk {job.index}: 规则解析 {len(fast.blocks)} 道题目" + ("，其余交给AI" if fast.needs_llm else ""))
+        if not fast.needs_llm:
+            return ChunkRequest(prompt=None, lines=[], fast=fast)
+
+    lines = fast.residual_lines if fast is not None else job.chunk1
+    use_offsets = handler.config.get("extraction_mode", EXTRACTION_MODE_VERBATIM) == EXTRACTION_MODE_OFFSETS
+    if use_offsets:
+        prompt = create_offset_prompt(handler.get_question_type_name(), lines)
+    else:
+        prompt = handler.create_standardization_prompt(lines, job.chunk2)
+    return ChunkRequest(prompt=prompt, lines=lines, use_offsets=use_offsets, fast=fast)
+
+
+def complete_chunk_job(
+    handler: Any,
+    job: ChunkJob,
+    request: ChunkRequest,
+    ai_response: Optional[str],
+    repair: bool = True,
+) -> ChunkOutcome:
+    """
+    解析AI响应、与本地结果合并后写出chunk结果并更新断点（需要AI但响应为空时记为失败）
+
+    repair=False 时（如批量模式，补问会变成同步调用）只报告缺失或残缺的题目，不做定向补问。
+    """
+    checkpoint = job.checkpoint
+    llm_questions: List[str] = []
+    if request.prompt is not None:
+        if ai_response is None:
+            print(f"❌ Chunk {job.index} AI调用失败，跳过")
+            if checkpoint is not None:
+                checkpoint.mark_failed(job.index, job.input_hash, "AI调用失败")
+            return ChunkOutcome(index=job.index)
+        llm_questions = _parse_response(handler, request.lines, ai_response, request.use_offsets)
+        if handler.config.get("repair_missing", True):
+            if repair:
+                llm_questions = repair_missing_questions(handler, job.index, request, llm_questions)
+            else:
+                _report_unrepaired(handler, job.index, request, llm_questions)
+
+    if request.fast is not None:
+        questions = request.fast.merge(llm_questions, getattr(handler, "parse_question_block", None))
+    else:
+        questions = llm_questions
+    handler.save_chunk_results(job.index, questions, job.output_dir)
+    if checkpoint is not None:
+        checkpoint.mark_done(job.index, job.input_hash, len(questions))
+    return ChunkOutcome(index=job.index, question_count=len(questions), success=True)
+
+
+def _parse_response(handler: Any, lines: List[str], ai_response: str, use_offsets: bool) -> List[str]:
+    if use_offsets:
+        return render_offset_questions(handler.get_question_type_name(), lines, ai_response)
+    return handler.parse_standardized_result(ai_response)
+
+
+def _report_unrepaired(handler: Any, chunk_index: int, request: ChunkRequest, questions: List[str]) -> None:
+    parse = getattr(handler, "parse_question_block", None)
+    if parse is None:
+        return
+    plan = plan_repair(request.lines, questions, parse)
+    if plan.needs_repair:
+        numbers = plan.missing_numbers()
+        label = f"（题号 {', '.join(map(str, numbers))}）" if numbers else ""
+        print(f"⚠️  Chunk {chunk_index}: {len(plan.missing)} 道题目缺失或不完整{label}，批量模式下不做补问")
+
+
+def repair_missing_questions(
+    handler: Any,
+    chunk_index: int,
+    request: ChunkRequest,
+    questions: List[str],
+    plan: Optional[RepairPlan] = None,
+) -> List[str]:
+    """
+    找出模型漏掉或输出残缺的源题目，只把这些题目的原文组成小切片补问一次，并按源文顺序并入结果
+
+    plan 可由调用方预先给出（如题号对账只补全局缺失的题目）；补问失败时保留原结果，
+    仍缺失的题号会打印出来。
+    """
+    parse = getattr(handler, "parse_question_block", None)
+    if parse is None:
+        return questions
+    if plan is None:
+        plan = plan_repair(request.lines, questions, parse)
+    if not plan.needs_repair:
+        return questions
+
+    numbers = plan.missing_numbers()
+    label = f"（题号 {', '.join(map(str, numbers))}）" if numbers else ""
+    print(f"🩹 Chunk {chunk_index}: {len(plan.missing)} 道题目缺失或不完整{label}，定向补问")
+    lines = plan.missing_lines(request.lines)
+    if request.use_offsets:
+        prompt = create_offset_prompt(handler.get_question_type_name(), lines)
+    else:
+        prompt = handler.create_standardization_prompt(lines, None)
+    response = handler.call_ai_standardization(prompt)
+    if response is None:
+        print(f"⚠️  Chunk {chunk_index}: 补问失败，保留原结果")
+        return questions
+
+    merged = merge_repaired(plan, request.lines, _parse_response(handler, lines, response, request.use_offsets), parse)
+    recovered = len(merged) - len(plan.matched)
+    still_missing = len(plan.missing) - recovered
+    print(f"🩹 Chunk {chunk_index}: 补回 {recovered} 道题目" + (f"，仍缺 {still_missing} 道" if still_missing else ""))
+    return merged
+
+
+def _question_callback(handler: Any, chunk_index: int) -> Callable[[str], None]:
+    """
+    流式模式下单道题目到达时的处理：立即解析，并交给标准化器的 ``question_listener``
+
+    question_listener(chunk_index, block, parsed) 为可选属性（如 sidecar 推送进度），
+    会在工作线程中被调用。
+    """
+    started = time.monotonic()
+    received = 0
+
+    def on_question(block: str) -> None:
+        nonlocal received
+        received += 1
+        if received == 1:
+            print(f"📨 Chunk {chunk_index}: 首道题目在 {time.monotonic() - started:.1f} 秒后到达")
+        parse = getattr(handler, "parse_question_block", None)
+        parsed = parse(block) if parse is not None else None
+        listener = getattr(handler, "question_listener", None)
+        if listener is not None:
+            listener(chunk_index, block, parsed)
+
+    return on_question
+
+
+def _record_exception(job: ChunkJob, exc: Exception, label: str = "") -> ChunkOutcome:
+    print(f"❌ {label}Chunk {job.index} 处理异常: {exc}")
+    if job.checkpoint is not None:
+        job.checkpoint.mark_failed(job.index, job.input_hash, str(exc))
+    return ChunkOutcome(index=job.index)
+
+
+def run_chunk_jobs(handler: Any, jobs: List[ChunkJob], max_workers: int = 1) -> List[ChunkOutcome]:
+    """
+    执行一组chunk任务
+
+    max_workers > 1 时使用有界线程池保持 N 个请求在途，每个chunk完成即落盘；
+    返回结果始终按chunk序号排序。
+    """
+    total = len(jobs)
+    outcomes: List[ChunkOutcome] = []
+    if max_workers <= 1 or total <= 1:
+        for job in jobs:
+            try:
+                outcomes.append(run_chunk_job(handler, job, total))
+            except Exception as exc:  # noqa: BLE001 - 单个chunk失败不影响其他chunk
+                outcomes.append(_record_exception(job, exc))
+        return outcomes
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, total)) as executor:
+        futures = {executor.submit(run_chunk_job, handler, job, total): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                outcomes.append(future.result())
+            except Exception as exc:  # noqa: BLE001 - 单个chunk失败不影响其他chunk
+                outcomes.append(_record_exception(job, exc))
+
+    outcomes.sort(key=lambda o: o.index)
+    return outcomes
+
+
+def finalize_standardization(handler: Any, output_dir: str, jobs: List[ChunkJob], outcomes: List[ChunkOutcome]) -> Dict:
+    """写出 quality_stats.json 并返回统计信息。"""
+    total_questions = sum(o.question_count for o in outcomes)
+    failed_chunks = [o.index for o in outcomes if not o.success]
+    resumed_chunks = [o.index for o in outcomes if o.resumed]
+
+    quality_stats = {
+        "question_type": handler.get_question_type_name(),
+        "total_chunks": len(jobs),
+        "total_questions": total_questions,
+        "failed_chunks": failed_chunks,
+        "resumed_chunks": resumed_chunks,
+        "processing_time": datetime.now().isoformat(),
+        "config": handler.config,
+    }
+
+    stats_file = os.path.join(output_dir, "quality_stats.json")
+    with open(stats_file, 'w', encoding='utf-8') as f:
+        json.dump(quality_stats, f, ensure_ascii=False, indent=2)
+
+    print(f"\n🎉 {handler.get_question_type_name()} 标准化完成！")
+    print(f"📊 总计处理: {len(jobs)} 个块, {total_questions} 道题目")
+    if failed_chunks:
+        print(f"⚠️  失败的块: {failed_chunks}")
+    print(f"📁 结果保存在: {output_dir}")
+
+    return quality_stats
+
+
+def run_standardization(handler: Any, input_file: str, output_dir: Optional[str] = None) -> Dict:
+    """
+    标准化单个题型文件的通用流程
+
+    Args:
+        handler: 题型标准化器（提供 chunk_file / create_standardization_prompt 等方法）
+        input_file: 输入文件路径
+        output_dir: 输出目录，如果不指定则自动生成
+
+    Returns:
+        处理结果统计
+    """
+    output_dir, jobs = prepare_chunk_jobs(handler, input_file, output_dir)
+    max_workers = int(handler.config.get("max_workers", 1))
+    if max_workers > 1 and len(jobs) > 1:
+        print(f"⚡ 并发标准化: 最多 {max_workers} 个chunk同时请求")
+    outcomes = run_chunk_jobs(handler, jobs, max_workers=max_workers)
+    return finalize_standardization(handler, output_dir, jobs, outcomes)
+
+
+def interleave_jobs(job_lists: Dict[str, List[ChunkJob]]) -> List[Tuple[str, ChunkJob]]:
+    """按题型轮转排列任务：各题型的第1块、第2块……依次交错。"""
+    ordered: List[Tuple[str, ChunkJob]] = []
+    keys = list(job_lists.keys())
+    for round_jobs in zip_longest(*(job_lists[k] for k in keys)):
+        for key, job in zip(keys, round_jobs):
+            if job is not None:
+                ordered.append((key, job))
+    return ordered
+
+
+def run_standardization_for_types(
+    type_inputs: Dict[str, Tuple[Any, str]],
+    max_workers: int = DEFAULT_GLOBAL_WORKERS,
+) -> Dict[str, Dict]:
+    """
+    跨题型全局调度标准化
+
+    Args:
+        type_inputs: {题型键: (标准化器, 输入文件)}
+        max_workers: 全局并发上限（所有题型共享）
+
+    Returns:
+        {题型键: 处理结果统计}，准备阶段失败的题型返回 {"error": 原因}
+    """
+    results: Dict[str, Dict] = {}
+    prepared: Dict[str, Tuple[Any, str, List[ChunkJob]]] = {}
+
+    for key, (handler, input_file) in type_inputs.items():
+        try:
+            output_dir, jobs = prepare_chunk_jobs(handler, input_file)
+            prepared[key] = (handler, output_dir, jobs)
+        except Exception as exc:  # noqa: BLE001 - 单个题型失败不影响其他题型
+            print(f"❌ 准备 {key} 时出错: {exc}")
+            results[key] = {"error": str(exc)}
+
+    queue = interleave_jobs({key: jobs for key, (_, _, jobs) in prepared.items()})
+    totals = {key: len(jobs) for key, (_, _, jobs) in prepared.items()}
+    outcomes: Dict[str, List[ChunkOutcome]] = {key: [] for key in prepared}
+
+    print(f"⚡ 全局调度: {len(prepared)} 个题型, {len(queue)} 个chunk, 并发上限 {max_workers}")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(run_chunk_job, prepared[key][0], job, totals[key]): (key, job)
+            for key, job in queue
+        }
+        for future in as_completed(futures):
+            key, job = futures[future]
+            try:
+                outcomes[key].append(future.result())
+            except Exception as exc:  # noqa: BLE001
+                outcomes[key].append(_record_exception(job, exc, label=f"{key} "))
+
+    for key, (handler, output_dir, jobs) in prepared.items():
+        type_outcomes = sorted(outcomes[key], key=lambda o: o.index)
+        results[key] = finalize_standardization(handler, output_dir, jobs, type_outcomes)
+
+    return results
@@ -0,0 +1,149 @@
+"""
+流式 Excel 写入
+
+基于 openpyxl 的 write-only 模式逐行写出，内存占用不随行数增长。xlsx 的列宽必须写在
+工作表数据之前，因此前 WIDTH_SAMPLE_ROWS 行先暂存、边写边统计列宽，之后的行直接写出；
+列宽上限为 MAX_COLUMN_WIDTH，样本行通常已足够确定列宽。
+
+向已有文件（如模板）追加时仍完整载入工作簿并在活动工作表末尾写入，以保留样式、合并单元格、
+列宽、数据验证与其他工作表；只有新建文件走流式写入。
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any, Iterable, List, Optional
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
+
+MAX_COLUMN_WIDTH = 50
+WIDTH_SAMPLE_ROWS = 1000
+
+
+def _cell_width(value: Any) -> int:
+    if value is None:
+        return 0
+    return len(value) if isinstance(value, str) else len(str(value))
+
+
+class StreamingSheetWriter:
+    """向 write-only 工作簿中的一个工作表逐行写入，并在写入时统计列宽"""
+
+    def __init__(
+        self,
+        workbook: Workbook,
+        title: str,
+        headers: Optional[List[str]] = None,
+        sample_rows: int = WIDTH_SAMPLE_ROWS,
+    ):
+        self.ws = workbook.create_sheet(title)
+        self.sample_rows = max(1, sample_rows)
+        self.rows_written = 0
+        self._widths: List[int] = []
+        self._pending: List[List[Any]] = []
+        self._streaming = False
+        if headers:
+            self._track(headers)
+            self._pending.append([self._header_cell(h) for h in headers])
+
+    def _header_cell(self, value: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(self.ws, value=value)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        return cell
+
+    def _track(self, values: List[Any]) -> None:
+        for i, value in enumerate(values):
+            width = _cell_width(value)
+            if i >= len(self._widths):
+                self._widths.append(width)
+            elif width > self._widths[i]:
+                self._widths[i] = width
+
+    def append(self, row: Iterable[Any]) -> None:
+        values = list(row)
+        self.rows_written += 1
+        if self._streaming:
+            self.ws.append(values)
+            return
+        self._track(values)
+        self._pending.append(values)
+        if len(self._pending) >= self.sample_rows:
+            self._start_streaming()
+
+    def _start_streaming(self) -> None:
+        for i, width in enumerate(self._widths, 1):
+            self.ws.column_dimensions[get_column_letter(i)].width = min(width + 2, MAX_COLUMN_WIDTH)
+        for values in self._pending:
+            self.ws.append(values)
+        self._pending = []
+        self._streaming = True
+
+    def close(self) -> None:
+        if not self._streaming:
+            self._start_streaming()
+
+
+def save_workbook(wb: Workbook, path: str) -> None:
+    """保存 write-only 工作簿；失败时关闭各工作表的临时写入流再抛出。"""
+    try:
+        wb.save(path)
+    except Exception:
+        for ws in wb.worksheets:
+            if not ws.closed:
+                try:
+                    ws.close()
+                except Exception:  # noqa: BLE001 - 仅做清理，保留原始异常
+                    pass
+        raise
+
+
+def write_rows_to_excel(output_path: str, headers: List[str], rows: Iterable[Iterable[Any]], sheet_title: str) -> int:
+    """以 write-only 模式创建Excel并逐行写入，返回写入的数据行数。"""
+    wb = Workbook(write_only=True)
+    writer = StreamingSheetWriter(wb, sheet_title, headers)
+    for row in rows:
+        writer.append(row)
+    writer.close()
+    save_workbook(wb, output_path)
+    return writer.rows_written
+
+
+def append_rows_to_excel(output_path: str, headers: List[str], rows: Iterable[Iterable[Any]], sheet_title: str) -> int:
+    """
+    在Excel活动工作表末尾追加数据行（文件不存在时流式新建），返回追加的数据行数
+
+    已有文件以普通模式载入，原有格式与其他工作表原样保留；活动工作表为空时先写表头，
+    默认名称的工作表改名为 sheet_title。写完后原子替换原文件。
+    """
+    if not os.path.exists(output_path):
+        return write_rows_to_excel(output_path, headers, rows, sheet_title)
+
+    wb = load_workbook(output_path)
+    ws = wb.active
+    if ws.title == "Sheet":
+        ws.title = sheet_title
+    if ws.max_row == 1 and ws.cell(row=1, column=1).value is None:
+        for col, header in enumerate(headers, 1):
+            ws.cell(row=1, column=col, value=header)
+
+    appended = 0
+    start_row = ws.max_row + 1
+    for appended, row in enumerate(rows, 1):
+        for col, value in enumerate(row, 1):
+            ws.cell(row=start_row + appended - 1, column=col, value=value)
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        wb.save(tmp_path)
+        os.replace(tmp_path, output_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return appended
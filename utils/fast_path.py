@@ -0,0 +1,249 @@
+"""
+规则快速通道（fast_path）
+
+单选、多选、判断题大多遵循固定版式（``N. 题干 (难度: x)`` / ``A.`` ... / ``参考答案``）。
+本模块按 utils/question_boundaries 的题目边界（与 QuestionProcessor.split_text_into_questions
+同一套题号线索）逐题做严格的规则解析，只有高置信度识别的题目才在本地直接渲染为标准题目块；
+版式不规整或有歧义的题目原样留给LLM处理。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.offset_extraction import (
+    DIFFICULTY_LABELS,
+    OffsetLayout,
+    clean_option,
+    clean_stem,
+    get_offset_layout,
+    render_question_block,
+    strip_stem_prefix,
+)
+from utils.question_boundaries import (
+    QuestionSpan,
+    find_question_starts,
+    is_answer_line,
+    is_option_line,
+    question_number,
+)
+from utils.question_repair import _match_blocks, normalize_text
+
+FAST_PATH_TYPES = ("单选题", "多选题", "判断题")
+
+# 只用于读取难度等级；题号与难度标识的去除统一由 offset_extraction.clean_stem 完成
+_DIFFICULTY = re.compile(r'[（(]\s*(?:难度\s*[:：]?\s*(?P<a>\d)|(?:较易|较难|易|中|难)\s*(?P<b>\d))\s*[)）]')
+# 清理后仍以 ``N:`` 开头，说明题号未被识别，题干不可信
+_LEFTOVER_NUMBER = re.compile(r'^\d+\s*[:：]')
+_INLINE_MARK = re.compile(r'^[（(]\s*(?P<mark>[A-Fa-f√×✓✗]+)\s*[)）]\s*')
+_OPTION_START = re.compile(r'^\s*(?P<letter>[A-Fa-f])\s*[.．、)）:：]\s*(?P<text>.*)$')
+_ANSWER = re.compile(r'^\s*【?\s*(?:参考答案|答案)\s*】?\s*[:：]\s*(?P<answer>.+?)\s*[:：]?\s*$')
+_LETTERS = re.compile(r'^[A-Fa-f](?:\s*[、,，\s]?\s*[A-Fa-f])*$')
+# 无题号题目的题干至少应有的字符数（规范化后），更短的通常是折行题干的尾巴
+MIN_STEM_CHARS = 6
+_SENTENCE_END = re.compile(r'[。！!？?；;:：）)]\s*$')
+_JUDGMENT_ANSWERS = {"√": "√", "✓": "√", "×": "×", "✗": "×", "正确": "正确", "错误": "错误", "对": "正确", "错": "错误"}
+
+
+@dataclass
+class FastPathResult:
+    """一个chunk经快速通道处理后的结果"""
+
+    blocks: List[str] = field(default_factory=list)       # 本地解析出的标准题目块（按原文顺序）
+    residual_lines: List[str] = field(default_factory=list)  # 需交给LLM的原文行
+    block_slots: List[int] = field(default_factory=list)  # 各本地题目块对应的源题目序号
+    residual_spans: List[QuestionSpan] = field(default_factory=list)  # residual_lines 中各段原文的行区间
+    residual_slots: List[int] = field(default_factory=list)  # 各段原文对应的源题目序号（前导内容为 -1）
+
+    @property
+    def needs_llm(self) -> bool:
+        return any(line.strip() for line in self.residual_lines)
+
+    def add_residual(self, lines: List[str], slot: int, join_previous: bool = False) -> None:
+        """把一段原文交给LLM；join_previous 时与上一段合并为同一段（如折行题干的两半）。"""
+        start = len(self.residual_lines)
+        self.residual_lines.extend(lines)
+        if join_previous and self.residual_spans and self.residual_spans[-1].end == start:
+            self.residual_spans[-1].end = len(self.residual_lines)
+            return
+        self.residual_spans.append(QuestionSpan(start=start, end=len(self.residual_lines)))
+        self.residual_slots.append(slot)
+
+    def merge(self, llm_blocks: List[str], parse_block: Optional[Callable[[str], Optional[Dict]]] = None) -> List[str]:
+        """
+        合并本地与LLM结果：LLM题目块按题干对应回各段原文（同 question_repair），
+        与本地题目块一起按源题目顺序排列，并把 ``### 试题 N`` 重新连续编号
+
+        对应不到任何一段的LLM题目块排在其前一块之后；没有 parse_block 时按顺序逐段对应。
+        """
+        keyed: List[Tuple[float, str]] = [(float(slot), block) for slot, block in zip(self.block_slots, self.blocks)]
+        if self.residual_spans:
+            if parse_block is not None:
+                texts = [normalize_text("".join(self.residual_lines[s.start:s.end])) for s in self.residual_spans]
+                candidates = list(range(len(self.residual_spans)))
+                # 解析不了的题目块也要保留（只是对应不到原文），不能像补问那样丢弃
+                matched, _ = _match_blocks(
+                    llm_blocks, self.residual_spans, texts, candidates, lambda block: parse_block(block) or {}
+                )
+            else:
+                matched = [(i if i < len(self.residual_spans) else None, block) for i, block in enumerate(llm_blocks)]
+            last = self.residual_slots[0] - 0.5
+            for index, block in matched:
+                last = float(self.residual_slots[index]) if index is not None else last + 0.001
+                keyed.append((last, block))
+        keyed.sort(key=lambda item: item[0])
+        return [re.sub(r'### 试题\s*\d+', f'### 试题 {i}', block, count=1) for i, (_, block) in enumerate(keyed, 1)]
+
+
+def _difficulty_level(stem: str) -> Optional[int]:
+    match = _DIFFICULTY.search(stem)
+    return int(match.group('a') or match.group('b')) if match else None
+
+
+def parse_well_formed_question(lines: List[str], question_type_name: str) -> Optional[str]:
+    """
+    严格解析一道版式规整的题目并渲染为标准题目块
+
+    选择题以参考答案行为准；判断题可用行内 （√）/（×） 标注作答案。
+
+    Returns:
+        标准题目块；任何一处不符合预期版式（选项缺失/乱序、答案无法识别、难度标识残缺、
+        判断题行内标注与参考答案冲突等）时返回 None，交由LLM处理
+    """
+    layout = get_offset_layout(question_type_name)
+    content = [line.rstrip("\r\n") for line in lines if line.strip()]
+    if not content:
+        return None
+    numbered = question_number(content[0]) is not None
+
+    stem_lines: List[str] = []
+    options: Dict[str, List[str]] = {}
+    answer: Optional[str] = None
+    current: Optional[List[str]] = stem_lines
+    for line in content:
+        if answer is not None:
+            return None  # 答案之后还有内容
+        answer_match = _ANSWER.match(line)
+        if answer_match:
+            answer = answer_match.group('answer').strip()
+            continue
+        if is_answer_line(line):
+            return None
+        option_match = _OPTION_START.match(line) if is_option_line(line) else None
+        if option_match:
+            letter = option_match.group('letter').upper()
+            if letter in options or not option_match.group('text').strip():
+                return None
+            options[letter] = [line]
+            current = options[letter]
+            continue
+        current.append(line)
+
+    raw_stem = "\n".join(stem_lines)
+    level = _difficulty_level(raw_stem)
+    stem = strip_stem_prefix(raw_stem)
+    if "难度" in stem or not (numbered or level):
+        return None  # 难度标识被截断/格式异常，或既无题号也无难度标识
+    inline_mark: Optional[str] = None
+    inline = _INLINE_MARK.match(stem)
+    if inline and not layout.option_letters:
+        # 判断题行内的 （×）/（√） 是答案标注，从题干中移除；选择题的行内字母按原文保留
+        inline_mark = inline.group('mark')
+        stem = stem[inline.end():].strip()
+    else:
+        stem = clean_stem(raw_stem)
+    if not stem or _LEFTOVER_NUMBER.match(stem):
+        return None
+
+    resolved = _resolve_answer(layout, options, answer, inline_mark)
+    if resolved is None:
+        return None
+    difficulty = DIFFICULTY_LABELS.get(level, layout.missing_difficulty) if level else layout.missing_difficulty
+    option_texts = {letter: clean_option("\n".join(parts)) for letter, parts in options.items()}
+    return render_question_block(1, layout, difficulty, stem, option_texts, resolved)
+
+
+def _resolve_answer(
+    layout: OffsetLayout,
+    options: Dict[str, List[str]],
+    answer: Optional[str],
+    inline_mark: Optional[str],
+) -> Optional[str]:
+    if layout.option_letters:
+        if list(options) != list(layout.option_letters) or answer is None or not _LETTERS.match(answer):
+            return None
+        letters = "".join(dict.fromkeys(re.findall(r'[A-F]', answer.upper())))
+        if layout.type_label.startswith("单选") and len(letters) != 1:
+            return None
+        return letters
+
+    if options:
+        return None
+    candidates = [v for v in (answer, inline_mark) if v is not None]
+    normalized = {_JUDGMENT_ANSWERS.get(v) for v in candidates}
+    if not candidates or None in normalized:
+        return None
+    # 行内 √/× 与参考答案需一致（正确≈√、错误≈×），不一致通常说明题目边界有误
+    polarity = {"√": True, "正确": True, "×": False, "错误": False}
+    if len({polarity[v] for v in normalized}) != 1:
+        return None
+    return _JUDGMENT_ANSWERS[answer] if answer is not None else _JUDGMENT_ANSWERS[inline_mark]
+
+
+def _starts_question(lines: List[str], span: QuestionSpan) -> bool:
+    """
+    无题号题目是否确实从一道题的开头开始
+
+    题干过短（如 ``为。``），或上一非空行既不是答案行也不以句末标点结束（题干从句子中间开始），
+    通常是折行题干被误切出的尾巴。
+    """
+    if span.number is not None:
+        return True
+    stem_lines = []
+    for line in lines[span.start:span.end]:
+        if is_option_line(line.strip()) or is_answer_line(line.strip()):
+            break
+        stem_lines.append(line)
+    stem = strip_stem_prefix("".join(stem_lines))
+    if len(normalize_text(_INLINE_MARK.sub("", stem))) < MIN_STEM_CHARS:
+        return False
+    previous = next((line.strip() for line in reversed(lines[:span.start]) if line.strip()), None)
+    return previous is None or is_answer_line(previous) or _SENTENCE_END.search(previous) is not None
+
+
+def apply_fast_path(question_type_name: str, lines: List[str]) -> FastPathResult:
+    """
+    对一个chunk逐题尝试规则解析
+
+    第一道题之前的前导内容（如章节标题）若不含选项或答案行则直接忽略，否则交给LLM。
+    疑似从句子中间开始的题目（见 _starts_question）连同前一道题一起交给LLM，由模型拼回完整题干。
+    """
+    result = FastPathResult()
+    spans = find_question_starts(lines)
+    if not spans:
+        result.add_residual(list(lines), -1)
+        return result
+
+    preamble = lines[:spans[0].start]
+    if any(is_option_line(line.strip()) or is_answer_line(line.strip()) for line in preamble if line.strip()):
+        result.add_residual(preamble, -1)
+
+    for slot, span in enumerate(spans):
+        span_lines = lines[span.start:span.end]
+        if not _starts_question(lines, span):
+            if result.block_slots and result.block_slots[-1] == slot - 1:
+                # 前一道题已在本地解析：撤回，与本题合并为一段交给LLM
+                result.blocks.pop()
+                result.block_slots.pop()
+                result.add_residual(lines[spans[slot - 1].start:spans[slot - 1].end], slot - 1)
+            result.add_residual(span_lines, slot, join_previous=True)
+            continue
+        block = parse_well_formed_question(span_lines, question_type_name)
+        if block is None:
+            result.add_residual(span_lines, slot)
+        else:
+            result.blocks.append(block)
+            result.block_slots.append(slot)
+    return result
@@ -0,0 +1,163 @@
+"""
+运行指标
+
+LLMStats 是进程级共享的 LLM 调用统计（调用数、延迟分位数、输入/输出token、重试、失败、缓存命中），
+由 call_openai_with_retries 记录；RunMetrics 按阶段累计耗时与计数，只在内存中累加，结束时一次性
+生成汇总（吞吐率、RSS 峰值）并写入 run_metrics.json，记录本身几乎没有开销。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+RUN_METRICS_FILE = "run_metrics.json"
+# 有对应吞吐率（{key}_per_s）的计数
+RATE_KEYS = ("pages", "questions")
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """最近秩法分位数（q 取 0~100），values 为空时返回 None。"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """当前进程的 RSS 峰值（MB）；平台不支持时返回 None。"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 计，macOS 以字节计
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+class LLMStats:
+    """线程安全的 LLM 调用统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latencies: List[float] = []
+            self.tokens_in = 0
+            self.tokens_out = 0
+            self.retries = 0
+            self.failures = 0
+            self.cache_hits = 0
+
+    def record_call(self, latency: float, tokens_in: Optional[int] = None, tokens_out: Optional[int] = None) -> None:
+        """记录一次成功的请求（latency 为秒；用量未知时 token 数按 0 计）。"""
+        with self._lock:
+            self.latencies.append(latency)
+            self.tokens_in += tokens_in if isinstance(tokens_in, int) else 0
+            self.tokens_out += tokens_out if isinstance(tokens_out, int) else 0
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def record_cache_hit(self) -> None:
+        with self._lock:
+            self.cache_hits += 1
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """扁平的统计字典（延迟单位为秒）。"""
+        with self._lock:
+            latencies = list(self.latencies)
+            snapshot = {
+                "llm_calls": len(latencies),
+                "llm_failures": self.failures,
+                "llm_retries": self.retries,
+                "llm_cache_hits": self.cache_hits,
+                "tokens_in": self.tokens_in,
+                "tokens_out": self.tokens_out,
+            }
+        for q in (50, 90, 99):
+            value = percentile(latencies, q)
+            snapshot[f"llm_latency_p{q}_s"] = round(value, 3) if value is not None else None
+        return snapshot
+
+    def has_activity(self) -> bool:
+        with self._lock:
+            return bool(self.latencies or self.failures or self.cache_hits)
+
+
+_shared_stats = LLMStats()
+
+
+def get_llm_stats() -> LLMStats:
+    """获取进程级共享的 LLM 调用统计。"""
+    return _shared_stats
+
+
+class RunMetrics:
+    """按阶段累计的运行指标"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, float]]:
+        """计时一个阶段（同名阶段多次进入时耗时累加），产出该阶段的指标字典。"""
+        values = self.stages.setdefault(name, {})
+        start = time.perf_counter()
+        try:
+            yield values
+        finally:
+            values["wall_s"] = values.get("wall_s", 0.0) + (time.perf_counter() - start)
+
+    def record(self, name: str, **values: float) -> None:
+        self.stages.setdefault(name, {}).update(values)
+
+    def increment(self, name: str, key: str, amount: float = 1) -> None:
+        values = self.stages.setdefault(name, {})
+        values[key] = values.get(key, 0) + amount
+
+    def stage_summary(self, name: str) -> Dict[str, float]:
+        """单个阶段的指标，附带吞吐率（{计数}_per_s）。"""
+        values = dict(self.stages.get(name, {}))
+        wall = values.get("wall_s")
+        for key in RATE_KEYS:
+            if key in values and wall:
+                values[f"{key}_per_s"] = round(values[key] / wall, 2)
+        if wall is not None:
+            values["wall_s"] = round(wall, 3)
+        return values
+
+    def summary(self, llm: Optional[LLMStats] = None) -> Dict[str, Optional[float]]:
+        """整次运行的汇总：总耗时、RSS 峰值与（有调用时的）LLM 统计。"""
+        summary: Dict[str, Optional[float]] = {
+            "wall_s": round(time.perf_counter() - self.started, 3),
+            "rss_peak_mb": peak_rss_mb(),
+        }
+        if llm is not None and llm.has_activity():
+            summary.update(llm.snapshot())
+        return summary
+
+    def write(self, path: str, llm: Optional[LLMStats] = None) -> Dict:
+        """写出 run_metrics.json 并返回其内容。"""
+        report = {
+            "summary": self.summary(llm),
+            "stages": {name: self.stage_summary(name) for name in self.stages},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
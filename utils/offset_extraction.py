@@ -0,0 +1,225 @@
+"""
+偏移量抽取模式（extraction_mode = "offsets"）
+
+verbatim 模式要求模型逐字复述题干与选项，输出token与输入相当。offsets 模式把切片
+逐行编号后交给模型，模型只返回结构：每道题各字段所在的行号（可选列号）范围、难度代码
+与答案；题干、选项等原文由本地按范围从源文本截取，再渲染为与 verbatim 模式相同的
+标准题目块，原文保真由构造保证，单个chunk的输出token降到原来的几分之一。
+
+该模式依赖按题目边界切分（chunk_strategy 为 tokens / questions），不使用前瞻块。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+EXTRACTION_MODE_VERBATIM = "verbatim"
+EXTRACTION_MODE_OFFSETS = "offsets"
+
+DIFFICULTY_LABELS = {1: "易1", 2: "较易2", 3: "中3", 4: "较难4", 5: "难5"}
+
+
+@dataclass(frozen=True)
+class OffsetLayout:
+    """某一题型的标准题目块结构"""
+
+    type_label: str                                # 题型字段，如 单选B
+    option_letters: Tuple[str, ...] = ()           # 需从原文截取的选项
+    fixed_field: Optional[Tuple[str, str]] = None  # 固定内容的字段，如 ("选项", "正确/错误")
+    letter_answer: bool = False                    # 答案是否只保留大写选项字母
+    missing_difficulty: str = "未提供"
+
+
+OFFSET_LAYOUTS: Dict[str, OffsetLayout] = {
+    "单选题": OffsetLayout("单选B", ("A", "B", "C", "D"), letter_answer=True, missing_difficulty="无"),
+    "多选题": OffsetLayout("多选I", ("A", "B", "C", "D"), letter_answer=True),
+    "判断题": OffsetLayout("判断I", fixed_field=("选项", "正确/错误")),
+    "简答题": OffsetLayout("简答I", fixed_field=("选择项", "无")),
+    "论述题": OffsetLayout("论述I", fixed_field=("选择项", "无")),
+    "案例分析题": OffsetLayout("案例分析I", fixed_field=("选择项", "无")),
+}
+
+# 题号后须跟标点或难度标识，避免误删以数字开头的题干（如 ``5G网络``、``3DES``）
+_NUMBER_PREFIX = re.compile(
+    r'^\s*\d+\s*(?:[.．、](?!\d)|[:：]|(?=[（(]\s*(?:难度|较易|较难|易|中|难)))\s*(?=\S)'
+)
+_DIFFICULTY_MARK = re.compile(
+    r'\s*[（(]\s*(?:难度\s*[:：]?\s*\d[^)）]*|(?:较易|较难|易|中|难)\s*\d)\s*[)）]\s*[:：]?|\s*难度为\s*\d'
+)
+_JUDGMENT_MARK = re.compile(r'^\s*[（(]\s*[√×✓✗]\s*[)）]\s*')
+_OPTION_PREFIX = re.compile(r'^\s*[A-Fa-f]\s*[.．、)）:：]\s*')
+_ANSWER_PREFIX = re.compile(r'^\s*【?\s*(?:参考答案要点|参考答案|答案)\s*】?\s*[:：]?\s*')
+
+
+def get_offset_layout(question_type_name: str) -> OffsetLayout:
+    layout = OFFSET_LAYOUTS.get(question_type_name)
+    if layout is None:
+        raise ValueError(f"题型 {question_type_name} 不支持偏移量抽取模式")
+    return layout
+
+
+def number_slice(lines: List[str]) -> str:
+    """为切片逐行加 1 起始的行号（``   1| 内容``）。"""
+    return "\n".join(f"{i:>4}| {line.rstrip(chr(10)).rstrip(chr(13))}" for i, line in enumerate(lines, 1))
+
+
+def create_offset_prompt(question_type_name: str, lines: List[str]) -> str:
+    """构造偏移量抽取prompt：模型只返回各字段的行号范围、难度与答案。"""
+    layout = get_offset_layout(question_type_name)
+    if layout.option_letters:
+        options_spec = ', "options": {' + ", ".join(f'"{k}": [起始行, 结束行]' for k in layout.option_letters) + '}'
+        options_rule = "* `options`: 各选项所在的行范围（可包含 `A.`/`A、` 等前缀，本地会去除）。\n"
+    else:
+        options_spec = ""
+        options_rule = ""
+    if layout.letter_answer:
+        answer_spec = '"answer": "大写选项字母"'
+        answer_rule = "* `answer`: 仅输出参考答案的大写选项字母（多选按原文顺序连写，如 `ABD`）。\n"
+    else:
+        answer_spec = '"answer": [起始行, 结束行]'
+        answer_rule = (
+            "* `answer`: 参考答案内容所在的行范围（可包含 `参考答案:` 前缀，本地会去除）；"
+            "若答案与题干写在同一行（如判断题的 `（×）`），直接输出答案原文字符串。\n"
+        )
+
+    return f"""**角色**: 你是试题结构标注器。下面的{question_type_name}切片已按题目边界切好，每行前带有行号（`行号| 原文`）。
+
+**任务**: 找出切片中的每一道完整试题，只标注结构，**不要复述任何原文**。
+
+**输出**: 只输出一个 JSON 对象，不要输出其他内容：
+{{"questions": [{{"stem": [起始行, 结束行]{options_spec}, "difficulty": 难度数字或null, {answer_spec}}}]}}
+
+**规则**:
+* 行号为切片中的行号，范围为闭区间；若某字段只占一行的一部分，可写作 `[起始行, 起始列, 结束行, 结束列]`（列从 0 开始，结束列不含）。
+* `stem`: 题干所在的行范围（可包含题号与难度标识，本地会去除）。
+{options_rule}* `difficulty`: 难度标识中的数字 1-5（如 `(难度: 4)`、`（较难 4）` 输出 4），没有难度标识时输出 null。
+{answer_rule}* 按试题在切片中出现的顺序输出，不要遗漏，也不要输出切片中不存在的试题。
+
+**切片**:
+```
+{number_slice(lines)}
+```"""
+
+
+def parse_offset_response(ai_response: str) -> List[Dict[str, Any]]:
+    """从模型响应中取出 questions 列表（兼容 ```json 代码块包裹），无法解析时返回空列表。"""
+    if not ai_response:
+        return []
+    start = ai_response.find("{")
+    end = ai_response.rfind("}")
+    if start < 0 or end <= start:
+        return []
+    try:
+        data = json.loads(ai_response[start:end + 1])
+    except ValueError:
+        return []
+    questions = data.get("questions") if isinstance(data, dict) else None
+    return [q for q in questions if isinstance(q, dict)] if isinstance(questions, list) else []
+
+
+def cut_range(lines: List[str], span: Any) -> Optional[str]:
+    """
+    按行号范围从源文本截取原文
+
+    span 为 ``[起始行, 结束行]``（闭区间，1 起始）或 ``[起始行, 起始列, 结束行, 结束列]``；
+    范围非法时返回 None。
+    """
+    if not isinstance(span, (list, tuple)) or not all(isinstance(v, int) and not isinstance(v, bool) for v in span):
+        return None
+    if len(span) == 2:
+        start_line, end_line = span
+        start_col, end_col = 0, None
+    elif len(span) == 4:
+        start_line, start_col, end_line, end_col = span
+    else:
+        return None
+    if not 1 <= start_line <= end_line <= len(lines) or start_col < 0:
+        return None
+
+    selected = [line.rstrip("\r\n") for line in lines[start_line - 1:end_line]]
+    if end_col is not None:
+        selected[-1] = selected[-1][:end_col]
+    selected[0] = selected[0][start_col:]
+    return "\n".join(selected)
+
+
+def strip_stem_prefix(text: str) -> str:
+    """去除题干的题号与难度标识（保留判断题行内答案标记）。"""
+    text = _NUMBER_PREFIX.sub("", text, count=1)
+    return _DIFFICULTY_MARK.sub("", text).strip()
+
+
+def clean_stem(text: str) -> str:
+    """去除题干的题号、难度标识与判断题行内答案标记。"""
+    return _JUDGMENT_MARK.sub("", strip_stem_prefix(text), count=1).strip()
+
+
+def clean_option(text: str) -> str:
+    return _OPTION_PREFIX.sub("", text, count=1).strip()
+
+
+def clean_answer(text: str) -> str:
+    return _ANSWER_PREFIX.sub("", text, count=1).strip()
+
+
+def _difficulty_label(value: Any, layout: OffsetLayout) -> str:
+    try:
+        return DIFFICULTY_LABELS.get(int(value), layout.missing_difficulty)
+    except (TypeError, ValueError):
+        return layout.missing_difficulty
+
+
+def _resolve_answer(lines: List[str], value: Any, layout: OffsetLayout) -> str:
+    if isinstance(value, str):
+        text = value.strip()
+    else:
+        text = clean_answer(cut_range(lines, value) or "")
+    if layout.letter_answer:
+        letters = re.findall(r'[A-F]', text.upper())
+        return "".join(dict.fromkeys(letters))
+    if _JUDGMENT_MARK.fullmatch(text):
+        # 判断题行内答案 （×） 只保留符号
+        text = text.strip("（）() ")
+    return text
+
+
+def render_question_block(
+    number: int,
+    layout: OffsetLayout,
+    difficulty: str,
+    stem: str,
+    options: Dict[str, str],
+    answer: str,
+) -> str:
+    """按 verbatim 模式的输出格式渲染一道标准题目块。"""
+    parts = [f"### 试题 {number}", f"#### 题型\n{layout.type_label}", f"#### 难度\n{difficulty}", f"#### 题干\n{stem}"]
+    for letter in layout.option_letters:
+        parts.append(f"#### 选项{letter}\n{options.get(letter, '')}")
+    if layout.fixed_field is not None:
+        parts.append(f"#### {layout.fixed_field[0]}\n{layout.fixed_field[1]}")
+    parts.append(f"#### 答案\n{answer}")
+    return "\n\n".join(parts)
+
+
+def render_offset_questions(question_type_name: str, lines: List[str], ai_response: str) -> List[str]:
+    """
+    把模型返回的结构标注还原为标准题目块
+
+    范围越界、题干或答案为空的题目会被丢弃并打印警告。
+    """
+    layout = get_offset_layout(question_type_name)
+    blocks: List[str] = []
+    for position, item in enumerate(parse_offset_response(ai_response), 1):
+        stem = clean_stem(cut_range(lines, item.get("stem")) or "")
+        raw_options = item.get("options") if isinstance(item.get("options"), dict) else {}
+        options = {letter: clean_option(cut_range(lines, raw_options.get(letter)) or "") for letter in layout.option_letters}
+        answer = _resolve_answer(lines, item.get("answer"), layout)
+        if not stem or not answer:
+            print(f"⚠️  偏移量标注无效，跳过第 {position} 题: {json.dumps(item, ensure_ascii=False)[:120]}")
+            continue
+        difficulty = _difficulty_label(item.get("difficulty"), layout)
+        blocks.append(render_question_block(len(blocks) + 1, layout, difficulty, stem, options, answer))
+    return blocks
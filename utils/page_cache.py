@@ -0,0 +1,195 @@
+"""
+按页的 PDF 文本缓存
+
+以 PDF 文件内容的 SHA-256 与页码为键，把每页提取出的文本（zlib 压缩）存入工作目录中的
+SQLite 文件。重跑同一份 PDF 时已提取的页直接读取；文件重新导出后内容哈希变化，旧缓存
+自然失效；改名的同一份文件仍命中同一哈希。
+
+工作目录中的 source.json 记录生成该目录的 PDF 内容哈希，用于判断已有产物是否过期，
+以及在同级工作目录中找出内容相同的上传。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import Dict, Iterator, Optional, Set
+
+import fitz  # PyMuPDF
+
+from utils.pdf_extraction import PARALLEL_MIN_PAGES, iter_pdf_pages
+
+PAGE_CACHE_FILE = "page_cache.sqlite3"
+SOURCE_RECORD_FILE = "source.json"
+WORK_DIR_PREFIX = "question_processing_"
+_HASH_BLOCK = 1024 * 1024
+# 每写入多少页提交一次
+_COMMIT_EVERY = 200
+
+
+def file_sha256(path: str) -> str:
+    """分块计算文件内容的 SHA-256。"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PageCache:
+    """基于 SQLite 的按页文本缓存"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite 文件路径（通常为 ``{工作目录}/page_cache.sqlite3``）
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " doc_hash TEXT PRIMARY KEY,"
+            " page_count INTEGER NOT NULL,"
+            " source_name TEXT,"
+            " updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " doc_hash TEXT NOT NULL,"
+            " page_index INTEGER NOT NULL,"
+            " text BLOB NOT NULL,"
+            " PRIMARY KEY (doc_hash, page_index))"
+        )
+        self._conn.commit()
+
+    def get(self, doc_hash: str, page_index: int) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT text FROM pages WHERE doc_hash = ? AND page_index = ?", (doc_hash, page_index)
+        ).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+
+    def put(self, doc_hash: str, page_index: int, text: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages (doc_hash, page_index, text) VALUES (?, ?, ?)",
+            (doc_hash, page_index, zlib.compress(text.encode('utf-8'))),
+        )
+        self._pending += 1
+        if self._pending >= _COMMIT_EVERY:
+            self.flush()
+
+    def cached_pages(self, doc_hash: str) -> Set[int]:
+        rows = self._conn.execute("SELECT page_index FROM pages WHERE doc_hash = ?", (doc_hash,))
+        return {row[0] for row in rows}
+
+    def page_count(self, doc_hash: str) -> Optional[int]:
+        """文档已完整缓存时返回页数，否则返回 None。"""
+        row = self._conn.execute("SELECT page_count FROM documents WHERE doc_hash = ?", (doc_hash,)).fetchone()
+        return row[0] if row else None
+
+    def mark_complete(self, doc_hash: str, page_count: int, source_name: Optional[str] = None) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents (doc_hash, page_count, source_name, updated) VALUES (?, ?, ?, ?)",
+            (doc_hash, page_count, source_name, time.time()),
+        )
+        self.flush()
+
+    def flush(self) -> None:
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+def iter_cached_pdf_pages(
+    pdf_path: str,
+    cache: PageCache,
+    workers: int = 1,
+    min_parallel_pages: int = PARALLEL_MIN_PAGES,
+    doc_hash: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    按页序产出 PDF 文本，优先读取缓存，未命中的页提取后写入缓存
+
+    完全未缓存时沿用 iter_pdf_pages（可并行）；部分缓存时逐页补齐缺失页。
+    """
+    doc_hash = doc_hash or file_sha256(pdf_path)
+    cached = cache.cached_pages(doc_hash)
+    page_count = cache.page_count(doc_hash)
+    if page_count is not None and cached.issuperset(range(page_count)):
+        for index in range(page_count):
+            cache.hits += 1
+            yield cache.get(doc_hash, index)
+        return
+
+    count = 0
+    try:
+        if not cached:
+            for count, text in enumerate(iter_pdf_pages(pdf_path, workers, min_parallel_pages), 1):
+                cache.misses += 1
+                cache.put(doc_hash, count - 1, text)
+                yield text
+        else:
+            doc = fitz.open(pdf_path)
+            try:
+                for count, page in enumerate(doc, 1):
+                    text = cache.get(doc_hash, count - 1) if count - 1 in cached else None
+                    if text is None:
+                        text = page.get_text() + "\n"
+                        cache.misses += 1
+                        cache.put(doc_hash, count - 1, text)
+                    else:
+                        cache.hits += 1
+                    yield text
+            finally:
+                doc.close()
+        cache.mark_complete(doc_hash, count, os.path.basename(pdf_path))
+    finally:
+        # 中途中断时已提取的页仍然落盘，下次只补齐剩余页
+        cache.flush()
+
+
+def read_source_record(work_dir: str) -> Optional[Dict[str, str]]:
+    """读取工作目录的来源记录（不存在或损坏时返回 None）。"""
+    path = os.path.join(work_dir, SOURCE_RECORD_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return record if isinstance(record, dict) and record.get("sha256") else None
+
+
+def write_source_record(work_dir: str, doc_hash: str, source_name: str) -> None:
+    """记录生成该工作目录的 PDF 内容哈希。"""
+    os.makedirs(work_dir, exist_ok=True)
+    with open(os.path.join(work_dir, SOURCE_RECORD_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"sha256": doc_hash, "source": source_name}, f, ensure_ascii=False, indent=2)
+
+
+def find_work_dir_by_hash(parent_dir: str, doc_hash: str, exclude: Optional[str] = None) -> Optional[str]:
+    """在 parent_dir 下的 question_processing_* 工作目录中查找由相同内容生成的目录。"""
+    if not os.path.isdir(parent_dir):
+        return None
+    exclude_path = os.path.abspath(exclude) if exclude else None
+    for name in sorted(os.listdir(parent_dir)):
+        candidate = os.path.join(parent_dir, name)
+        if not name.startswith(WORK_DIR_PREFIX) or not os.path.isdir(candidate):
+            continue
+        if exclude_path and os.path.abspath(candidate) == exclude_path:
+            continue
+        record = read_source_record(candidate)
+        if record and record["sha256"] == doc_hash:
+            return candidate
+    return None
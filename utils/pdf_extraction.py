@@ -0,0 +1,97 @@
+"""
+PDF 文本提取（可按页区间分片并行）
+
+串行模式逐页读取；并行模式把页码切成连续区间，交给进程池，每个进程自行打开一份
+fitz 文档（fitz 文档对象不能跨进程共享），结果按页序收集后一次 join，避免字符串
+反复拼接带来的二次方开销。页数较少时进程启动开销大于收益，自动退回串行。
+
+iter_pdf_pages 逐页产出文本，供按行流式拆分题型使用（见 utils/section_splitter.py）。
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Iterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+# 少于该页数时不启动进程池
+PARALLEL_MIN_PAGES = 64
+# 每个进程分到的区间数（区间更细，各进程负载更均衡）
+SHARDS_PER_WORKER = 4
+
+
+def page_ranges(page_count: int, workers: int, shards_per_worker: int = SHARDS_PER_WORKER) -> List[Tuple[int, int]]:
+    """把 [0, page_count) 切成按序排列的连续区间 [(start, stop), ...]。"""
+    if page_count <= 0:
+        return []
+    shards = max(1, min(page_count, workers * shards_per_worker))
+    size, extra = divmod(page_count, shards)
+    ranges = []
+    start = 0
+    for i in range(shards):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _page_texts(doc, start: int = 0, stop: Optional[int] = None) -> List[str]:
+    if start == 0 and stop is None:
+        return [page.get_text() + "\n" for page in doc]
+    return [doc[i].get_text() + "\n" for i in range(start, stop)]
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    """在当前进程中打开文档并提取 [start, stop) 页的文本（进程池任务）。"""
+    doc = fitz.open(pdf_path)
+    try:
+        return _page_texts(doc, start, stop)
+    finally:
+        doc.close()
+
+
+def iter_pdf_pages(pdf_path: str, workers: int = 1, min_parallel_pages: int = PARALLEL_MIN_PAGES) -> Iterator[str]:
+    """
+    按页序逐页产出文本（每页后追加一个换行）
+
+    并行时同时在途的区间不超过 workers * 2 个，已产出的页不再保留，内存占用与文档大小无关。
+
+    Args:
+        pdf_path: PDF文件路径
+        workers: 进程数（1 为串行）
+        min_parallel_pages: 达到该页数才启用并行
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        page_count = len(doc) if workers > 1 else 0
+        if workers <= 1 or page_count < max(1, min_parallel_pages):
+            for page in doc:
+                yield page.get_text() + "\n"
+            return
+    finally:
+        doc.close()
+
+    ranges = page_ranges(page_count, workers)
+    window = workers * 2
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        pending: Deque = deque()
+        for start, stop in ranges:
+            pending.append(pool.submit(extract_page_range, pdf_path, start, stop))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def extract_pdf_text(pdf_path: str, workers: int = 1, min_parallel_pages: int = PARALLEL_MIN_PAGES) -> str:
+    """
+    提取 PDF 全部文本，每页文本后追加一个换行
+
+    Args:
+        pdf_path: PDF文件路径
+        workers: 进程数（1 为串行）
+        min_parallel_pages: 达到该页数才启用并行
+    """
+    return "".join(iter_pdf_pages(pdf_path, workers, min_parallel_pages))
@@ -0,0 +1,183 @@
+"""
+题目边界识别
+
+按行识别题目起点，供按题目边界切分chunk、本地解析等功能使用。
+起点线索与 QuestionProcessor.split_text_into_questions 保持一致：
+- 以题号开头的行（``1.``、``2．``、``3、``，或题号后直接跟难度标识的 ``4（难度3）：``）
+- 不以题号开头、但带难度标识的完整问句（如 ``...？ (难度: 3)``）
+为避免把答案要点里的 ``1.`` 误判为新题：当前题尚未出现答案行时，只接受题号顺延
+（上一题号 + 1）的起点；已出现答案行时，只接受其后紧跟自己答案行的起点。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+# 与 QuestionProcessor.split_text_into_questions 共用的题号模式（不含前导换行）
+QUESTION_NUMBER_PATTERN = r'\s*(\d+)[.．、]\s*[（(]?'
+
+# 题号后跟标点（``1.``），或直接跟难度标识（``1（难度3）：``）
+_NUMBERED_LINE = re.compile(r'^\s*(\d+)(?:[.．、](?!\d)|\s*(?=[（(]\s*难度))')
+# 难度标识可能被PDF换行截断，如 ``(难度: 2, 计算题`` 或行尾的 ``(难度``
+_DIFFICULTY_MARK = re.compile(r'[（(]\s*难度\s*[:：]?\s*(\d|$)|难度为\s*\d')
+_SENTENCE_END = re.compile(r'[。！!；;:：）)]\s*$')
+# 无题号题目的题干可能折行，起点最多向前回溯的行数
+MAX_STEM_BACKTRACK = 3
+_OPTION_LINE = re.compile(r'^\s*[A-Fa-f]\s*[.．、)）:：]')
+_ANSWER_LINE = re.compile(r'^\s*【?\s*(参考答案|答案)')
+
+
+def is_option_line(line: str) -> bool:
+    """选项行（``A.``、``B、`` 等）。"""
+    return bool(_OPTION_LINE.match(line))
+
+
+def is_answer_line(line: str) -> bool:
+    """答案提示行（``参考答案``、``【参考答案】``、``答案:`` 等）。"""
+    return bool(_ANSWER_LINE.match(line))
+
+
+@dataclass
+class QuestionSpan:
+    """源文本中一道题目所占的行区间 [start, end)"""
+
+    start: int
+    end: int
+    number: Optional[int] = None
+
+
+def question_number(line: str) -> Optional[int]:
+    """行首的题号（``12.``、``12（难度3）`` 等）；不以题号开头时返回 None。"""
+    numbered = _NUMBERED_LINE.match(line)
+    return int(numbered.group(1)) if numbered else None
+
+
+def _is_candidate(line: str) -> bool:
+    if _NUMBERED_LINE.match(line):
+        return True
+    return _DIFFICULTY_MARK.search(line) is not None and not is_option_line(line)
+
+
+def _ends_stem_backtrack(line: str, allow_sentence_end: bool) -> bool:
+    """回溯遇到该行时是否停止（答案行、选项行、另一起点，或以句末标点结束的上一题内容）。"""
+    if is_answer_line(line) or is_option_line(line) or _is_candidate(line):
+        return True
+    return _SENTENCE_END.search(line) is not None and not allow_sentence_end
+
+
+def _stem_start(stripped: List[str], i: int, floor: int) -> int:
+    """
+    无题号题目：从难度标识所在行向前回溯到题干首行（上一行未以句末标点结束即视为折行）
+
+    PDF 提取常在折行的题干中间插入空行：空行之前的非空行若是未结束的题干（不以句末标点结束，
+    也不是答案、选项或另一起点），则跳过空行继续回溯；回溯行数上限只计非空行。
+    """
+    start = i
+    # 难度标识单独成行时，上一行必然是题干（即使以句末标点结束）
+    mark_only = _DIFFICULTY_MARK.match(stripped[i]) is not None
+    taken = 0
+    j = i - 1
+    while j > floor and taken < MAX_STEM_BACKTRACK:
+        if not stripped[j]:
+            k = j - 1
+            while k > floor and not stripped[k]:
+                k -= 1
+            if k <= floor or _ends_stem_backtrack(stripped[k], mark_only and start == i):
+                break
+            j = k
+            continue
+        if _ends_stem_backtrack(stripped[j], mark_only and start == i):
+            break
+        start = j
+        taken += 1
+        j -= 1
+    return start
+
+
+def find_question_starts(lines: List[str]) -> List[QuestionSpan]:
+    """
+    识别每道题目的起止行
+
+    Args:
+        lines: 题型文件的正文行（可带换行符）
+
+    Returns:
+        按出现顺序排列的题目行区间；第一道题之前的内容（如章节标题）不属于任何题目
+    """
+    stripped = [line.strip() for line in lines]
+    candidates = [i for i, text in enumerate(stripped) if text and _is_candidate(text)]
+
+    # 候选起点到下一个候选起点之间是否出现了答案行
+    answered_before_next: Dict[int, bool] = {}
+    for pos, start in enumerate(candidates):
+        stop = candidates[pos + 1] if pos + 1 < len(candidates) else len(lines)
+        answered_before_next[start] = any(is_answer_line(stripped[j]) for j in range(start + 1, stop))
+
+    spans: List[QuestionSpan] = []
+    last_number: Optional[int] = None
+    seen_answer = False
+    candidate_set = set(candidates)
+
+    for i, text in enumerate(stripped):
+        if i in candidate_set:
+            number = question_number(text)
+            if not spans:
+                accept = True
+            elif seen_answer:
+                # 当前题答案已出现：后面的编号行可能是答案要点，需其后紧跟自己的答案才算新题
+                accept = answered_before_next[i]
+            else:
+                accept = number is not None and last_number is not None and number == last_number + 1
+            if accept:
+                start = i if number is not None or not spans else _stem_start(stripped, i, spans[-1].start)
+                if spans:
+                    spans[-1].end = start
+                spans.append(QuestionSpan(start=start, end=len(lines), number=number))
+                if number is not None:
+                    last_number = number
+                seen_answer = False
+                continue
+
+        if spans and text and is_answer_line(text):
+            seen_answer = True
+
+    return spans
+
+
+def pack_questions_into_chunks(
+    lines: List[str],
+    max_size: int,
+    measure: Optional[Callable[[str], int]] = None,
+) -> List[List[str]]:
+    """
+    按题目边界打包chunk
+
+    依次把完整题目放入当前chunk，放不下时另起一个；单题超过 max_size 时独占一个chunk。
+    第一道题之前的前导内容并入第一个chunk。
+
+    Args:
+        lines: 题型文件的正文行
+        max_size: 每个chunk的容量
+        measure: 单行的占用量（如估算token数）；默认每行计 1，即按行数打包
+    """
+    if not lines:
+        return []
+    weigh = measure or (lambda line: 1)
+    spans = find_question_starts(lines)
+    if spans:
+        units = [(0, spans[0].end)] + [(span.start, span.end) for span in spans[1:]]
+    else:
+        units = [(i, i + 1) for i in range(len(lines))]
+
+    chunks: List[List[str]] = []
+    chunk_start, chunk_size = 0, 0
+    for start, end in units:
+        unit_size = sum(weigh(line) for line in lines[start:end])
+        if start > chunk_start and chunk_size + unit_size > max_size:
+            chunks.append(lines[chunk_start:start])
+            chunk_start, chunk_size = start, 0
+        chunk_size += unit_size
+    chunks.append(lines[chunk_start:])
+    return chunks
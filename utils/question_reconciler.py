@@ -0,0 +1,204 @@
+"""
+题号对账（reconcile）
+
+源文本的题号（``1.``、``2．`` ...）给出了应有题目的精确清单。本模块把已标准化的题目逐一
+对应回源题目，找出缺失（gap）与重复（chunk 重叠或前瞻块导致同一道题被输出两次）的题目，
+并只针对缺失题目所在的源文本行区间补跑，不必整题型重跑。
+
+对应规则与 utils/question_repair 一致：源题目边界来自 utils/question_boundaries，
+标准化题目以题干定位片段在源题目原文中查找。
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from utils.checkpoint import ChunkCheckpoint, hash_chunk_input
+from utils.chunk_runner import ChunkRequest, repair_missing_questions, resolve_output_dir
+from utils.offset_extraction import EXTRACTION_MODE_OFFSETS, EXTRACTION_MODE_VERBATIM
+from utils.question_boundaries import QuestionSpan, find_question_starts
+from utils.question_repair import normalize_text, plan_repair, stem_probe
+from utils.standardization_utils import extract_codeblocks_from_markdown
+
+
+@dataclass
+class ReconcileReport:
+    """一个题型的题号对账结果"""
+
+    source_count: int = 0                                   # 源文本中识别到的题目数
+    standardized_count: int = 0                             # 有效的标准化题目数
+    missing: List[str] = field(default_factory=list)        # 缺失题目的题号（无题号时为 ``#序号``）
+    duplicates: Dict[str, int] = field(default_factory=dict)  # 被输出多次的题目 -> 次数
+    unmatched: int = 0                                      # 对应不到源题目的标准化题目数
+    numbering_gaps: List[int] = field(default_factory=list)  # 源文本题号序列中跳过的题号
+    chunk_gaps: Dict[int, List[int]] = field(default_factory=dict)  # chunk序号 -> 缺失题目在该chunk内的起始行
+    recovered: int = 0                                      # 补跑补回的题目数
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing and not self.duplicates
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source_count": self.source_count,
+            "standardized_count": self.standardized_count,
+            "missing": self.missing,
+            "duplicates": self.duplicates,
+            "unmatched": self.unmatched,
+            "numbering_gaps": self.numbering_gaps,
+            "recovered": self.recovered,
+        }
+
+
+@dataclass
+class _SourceChunk:
+    index: int
+    lines: List[str]
+    chunk2: Optional[List[str]]
+    offset: int  # 该chunk首行在整体源文本中的行号
+
+
+def _span_label(span: QuestionSpan, position: int) -> str:
+    return str(span.number) if span.number is not None else f"#{position + 1}"
+
+
+def _numbering_gaps(spans: List[QuestionSpan]) -> List[int]:
+    """源文本题号序列中的跳号（题号回到 1 视为新一节重新编号）。"""
+    gaps: List[int] = []
+    previous: Optional[int] = None
+    for span in spans:
+        if span.number is None:
+            continue
+        if previous is not None and span.number > previous + 1:
+            gaps.extend(range(previous + 1, span.number))
+        previous = span.number
+    return gaps
+
+
+def _load_chunk_blocks(output_dir: str, index: int) -> List[str]:
+    path = os.path.join(output_dir, f"standardized_chunk_{index:03d}.md")
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return extract_codeblocks_from_markdown(f.read())
+
+
+def _source_chunks(handler: Any, input_file: str) -> List[_SourceChunk]:
+    chunks: List[_SourceChunk] = []
+    offset = 0
+    for index, (chunk1, chunk2) in enumerate(handler.chunk_file(input_file), 1):
+        chunks.append(_SourceChunk(index, chunk1, chunk2, offset))
+        offset += len(chunk1)
+    return chunks
+
+
+def _locate(probe: str, span_texts: List[str], counts: List[int], cursor: int) -> Optional[int]:
+    """在源题目中定位题干：优先从上次位置向后找未对应的题目，其次任意未对应的题目，最后允许重复。"""
+    if not probe:
+        return None
+    order = list(range(cursor, len(span_texts))) + list(range(cursor))
+    for allow_duplicate in (False, True):
+        for position in order:
+            if (allow_duplicate or counts[position] == 0) and probe in span_texts[position]:
+                return position
+    return None
+
+
+def reconcile_questions(handler: Any, input_file: str, output_dir: Optional[str] = None) -> ReconcileReport:
+    """
+    按源题号对账某题型的标准化结果
+
+    Args:
+        handler: 题型标准化器
+        input_file: 题型源文件
+        output_dir: 标准化输出目录，默认与 standardize_file 相同
+
+    Returns:
+        ReconcileReport
+    """
+    output_dir = resolve_output_dir(handler, input_file, output_dir)
+    chunks = _source_chunks(handler, input_file)
+    lines = [line for chunk in chunks for line in chunk.lines]
+    spans = find_question_starts(lines)
+    span_texts = [normalize_text("".join(lines[s.start:s.end])) for s in spans]
+    counts = [0] * len(spans)
+
+    report = ReconcileReport(source_count=len(spans), numbering_gaps=_numbering_gaps(spans))
+    cursor = 0
+    for chunk in chunks:
+        for block in _load_chunk_blocks(output_dir, chunk.index):
+            parsed = handler.parse_question_block(block)
+            if parsed is None:
+                continue
+            report.standardized_count += 1
+            position = _locate(stem_probe(parsed.get('question_stem', '')), span_texts, counts, cursor)
+            if position is None:
+                report.unmatched += 1
+                continue
+            counts[position] += 1
+            cursor = position + 1
+
+    for position, (span, count) in enumerate(zip(spans, counts)):
+        label = _span_label(span, position)
+        if count == 0:
+            report.missing.append(label)
+            chunk = _chunk_of(chunks, span.start)
+            report.chunk_gaps.setdefault(chunk.index, []).append(span.start - chunk.offset)
+        elif count > 1:
+            report.duplicates[label] = count
+    return report
+
+
+def _chunk_of(chunks: List[_SourceChunk], line_index: int) -> _SourceChunk:
+    for chunk in reversed(chunks):
+        if chunk.offset <= line_index:
+            return chunk
+    return chunks[0]
+
+
+def fill_question_gaps(handler: Any, input_file: str, output_dir: Optional[str] = None) -> ReconcileReport:
+    """
+    对账并只补跑缺失题目所在的源文本行区间
+
+    每个含缺失题目的chunk只把缺失题目的原文组成小切片请求一次，补回的题目按源文顺序
+    并入该chunk的 standardized_chunk_NNN.md，并更新断点中的题目数；最后重新对账。
+    """
+    output_dir = resolve_output_dir(handler, input_file, output_dir)
+    report = reconcile_questions(handler, input_file, output_dir)
+    print(
+        f"🧮 {handler.get_question_type_name()} 题号对账: 源题目 {report.source_count} 道，"
+        f"已标准化 {report.standardized_count} 道，缺失 {len(report.missing)} 道，重复 {len(report.duplicates)} 道"
+    )
+    if report.numbering_gaps:
+        print(f"⚠️  源文本题号不连续，未识别到的题号: {report.numbering_gaps}")
+    if not report.chunk_gaps:
+        return report
+
+    use_offsets = handler.config.get("extraction_mode", EXTRACTION_MODE_VERBATIM) == EXTRACTION_MODE_OFFSETS
+    checkpoint = ChunkCheckpoint.load(output_dir)
+    parse = handler.parse_question_block
+    before = report.standardized_count
+    for chunk in _source_chunks(handler, input_file):
+        gap_starts = report.chunk_gaps.get(chunk.index)
+        if not gap_starts:
+            continue
+        blocks = _load_chunk_blocks(output_dir, chunk.index)
+        plan = plan_repair(chunk.lines, blocks, parse)
+        # 只补全局缺失的题目：在其他chunk中已有输出的题目（重叠）不重复请求
+        plan.missing = [i for i in plan.missing if plan.spans[i].start in gap_starts]
+        if not plan.needs_repair:
+            continue
+        request = ChunkRequest(prompt=None, lines=chunk.lines, use_offsets=use_offsets)
+        questions = repair_missing_questions(handler, chunk.index, request, blocks, plan=plan)
+        if questions is blocks:
+            continue  # 补问失败，保留原结果
+        handler.save_chunk_results(chunk.index, questions, output_dir)
+        checkpoint.mark_done(chunk.index, hash_chunk_input(chunk.lines, chunk.chunk2), len(questions))
+
+    updated = reconcile_questions(handler, input_file, output_dir)
+    updated.recovered = updated.standardized_count - before
+    print(f"🧮 补跑完成: 补回 {updated.recovered} 道，仍缺失 {len(updated.missing)} 道")
+    return updated
+
@@ -0,0 +1,131 @@
+"""
+缺题/残题定向补问（repair）
+
+模型偶尔会漏掉切片中的个别题目，或输出题干/答案为空的残缺题目块（parse_question_block
+返回 None，最终导出时被静默丢弃）。本模块按 utils/question_boundaries 的题目边界把
+模型输出的题目逐一对应回源题目，找出没有对应有效题目块的源题目，只把这些题目的原文
+重新组成一个小切片补问，再把补回的题目按源文顺序合并进该chunk的结果。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.question_boundaries import QuestionSpan, find_question_starts
+
+# 用题干规范化后的前若干个字符在源题目中定位
+STEM_PROBE_CHARS = 12
+
+_NON_TEXT = re.compile(r'[\W_]+')
+_DIFFICULTY_WORDS = re.compile(r'难度\s*[:：]?\s*\d|(?:较易|较难|易|中|难)\s*\d')
+_QUESTION_HEADER = re.compile(r'### 试题\s*\d+')
+
+
+def normalize_text(text: str) -> str:
+    """去除空白与标点，便于比较模型输出与源文本。"""
+    return _NON_TEXT.sub("", text).lower()
+
+
+def stem_probe(stem: str) -> str:
+    """题干定位片段：规范化后去掉题号与难度标识，取前 STEM_PROBE_CHARS 个字符。"""
+    probe = normalize_text(_DIFFICULTY_WORDS.sub("", stem))
+    probe = re.sub(r'^\d+', "", probe)
+    return probe[:STEM_PROBE_CHARS]
+
+
+@dataclass
+class RepairPlan:
+    """一个chunk的题目对应结果"""
+
+    spans: List[QuestionSpan]
+    matched: List[Tuple[Optional[int], str]] = field(default_factory=list)  # (源题目序号, 有效题目块)
+    malformed: int = 0                                                       # 残缺题目块数
+    missing: List[int] = field(default_factory=list)                         # 未对应到有效题目的源题目序号
+
+    @property
+    def needs_repair(self) -> bool:
+        return bool(self.missing)
+
+    def missing_lines(self, lines: List[str]) -> List[str]:
+        """缺失题目的原文行（按源文顺序拼接）。"""
+        selected: List[str] = []
+        for index in self.missing:
+            span = self.spans[index]
+            selected.extend(lines[span.start:span.end])
+        return selected
+
+    def missing_numbers(self) -> List[int]:
+        return [self.spans[i].number for i in self.missing if self.spans[i].number is not None]
+
+
+def _match_blocks(
+    blocks: List[str],
+    spans: List[QuestionSpan],
+    span_texts: List[str],
+    candidates: List[int],
+    parse_block: Callable[[str], Optional[Dict]],
+) -> Tuple[List[Tuple[Optional[int], str]], int]:
+    """把题目块对应到 candidates 中的源题目（按顺序优先匹配），返回 (对应结果, 残缺块数)。"""
+    matched: List[Tuple[Optional[int], str]] = []
+    malformed = 0
+    remaining = list(candidates)
+    for block in blocks:
+        parsed = parse_block(block)
+        if parsed is None:
+            malformed += 1
+            continue
+        probe = stem_probe(parsed.get('question_stem', ''))
+        hit = next((i for i in remaining if probe and probe in span_texts[i]), None)
+        if hit is not None:
+            remaining.remove(hit)
+        matched.append((hit, block))
+    return matched, malformed
+
+
+def plan_repair(lines: List[str], blocks: List[str], parse_block: Callable[[str], Optional[Dict]]) -> RepairPlan:
+    """
+    找出切片中缺失或残缺的题目
+
+    Args:
+        lines: 发给模型的切片原文
+        blocks: 模型输出的题目块
+        parse_block: 标准化器的 parse_question_block（返回 None 表示题目残缺）
+
+    Returns:
+        RepairPlan；切片中识别不到题目边界时不做补问（missing 为空）
+    """
+    spans = find_question_starts(lines)
+    plan = RepairPlan(spans=spans)
+    span_texts = [normalize_text("".join(lines[s.start:s.end])) for s in spans]
+    plan.matched, plan.malformed = _match_blocks(blocks, spans, span_texts, list(range(len(spans))), parse_block)
+    if spans:
+        covered = {index for index, _ in plan.matched if index is not None}
+        plan.missing = [i for i in range(len(spans)) if i not in covered]
+    return plan
+
+
+def merge_repaired(
+    plan: RepairPlan,
+    lines: List[str],
+    repaired_blocks: List[str],
+    parse_block: Callable[[str], Optional[Dict]],
+) -> List[str]:
+    """
+    把补问得到的题目并入原结果，按源题目顺序排列并重新连续编号
+
+    补问结果同样经过对应与校验，仍然残缺或对应不到缺失题目的块会被丢弃；
+    原结果中对应不到源题目的有效块保留在其前一道题之后。
+    """
+    span_texts = [normalize_text("".join(lines[s.start:s.end])) for s in plan.spans]
+    repaired, _ = _match_blocks(repaired_blocks, plan.spans, span_texts, plan.missing, parse_block)
+
+    keyed: List[Tuple[float, str]] = []
+    last = -1.0
+    for index, block in plan.matched:
+        last = float(index) if index is not None else last + 0.001
+        keyed.append((last, block))
+    keyed.extend((float(index), block) for index, block in repaired if index is not None)
+    keyed.sort(key=lambda item: item[0])
+    return [_QUESTION_HEADER.sub(f"### 试题 {i}", block, count=1) for i, (_, block) in enumerate(keyed, 1)]
@@ -0,0 +1,172 @@
+"""
+OpenAI 调用限流
+
+进程级共享的令牌桶限流器，同时按请求数（RPM）与估算token数（TPM）计量，
+并提供带抖动的指数退避与 Retry-After 解析，供 call_openai_with_retries 使用。
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from config import Config
+
+
+class TokenBucket:
+    """线程安全的令牌桶：容量为每分钟额度，按秒匀速补充。"""
+
+    def __init__(
+        self,
+        per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.capacity = float(per_minute)
+        self.refill_per_sec = float(per_minute) / 60.0
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_sec)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """
+        取出 amount 个令牌，不足时阻塞等待
+
+        超过桶容量的请求按容量计（桶满即放行），避免单个大请求永远等待。
+
+        Returns:
+            实际等待的秒数
+        """
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.refill_per_sec
+            self._sleep(delay)
+            waited += delay
+
+    def adjust(self, delta: float) -> None:
+        """修正桶内令牌（正数为退还，负数为补扣，可透支为负）。"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + delta)
+
+
+class RateLimiter:
+    """同时约束 RPM 与 TPM 的限流器；额度为 0 或 None 时不限制对应维度。"""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._clock = clock
+        self._sleep = sleep
+        self.request_bucket = TokenBucket(requests_per_minute, clock, sleep) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute, clock, sleep) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause_for(self, seconds: float) -> None:
+        """全局暂停（收到 429 / Retry-After 时让所有线程一起退避）。"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + max(0.0, seconds))
+
+    def _wait_if_paused(self) -> None:
+        while True:
+            with self._lock:
+                remaining = self._paused_until - self._clock()
+            if remaining <= 0:
+                return
+            self._sleep(remaining)
+
+    def acquire(self, estimated_tokens: int = 0) -> None:
+        """在发起请求前调用：等待暂停结束并扣除请求数与预估token。"""
+        self._wait_if_paused()
+        if self.request_bucket is not None:
+            self.request_bucket.acquire(1)
+        if self.token_bucket is not None and estimated_tokens > 0:
+            self.token_bucket.acquire(estimated_tokens)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """请求完成后用实际用量修正预估（多退少补）。"""
+        if self.token_bucket is None or actual_tokens is None:
+            return
+        self.token_bucket.adjust(estimated_tokens - actual_tokens)
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程级共享限流器（首次调用时按 OPENAI_RPM / OPENAI_TPM 配置创建）。"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            limits = Config.get_rate_limit_config()
+            _shared_limiter = RateLimiter(limits['rpm'], limits['tpm'])
+        return _shared_limiter
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]) -> None:
+    """替换进程级共享限流器（传入 None 则下次按配置重建）。"""
+    global _shared_limiter
+    with _shared_lock:
+        _shared_limiter = limiter
+
+
+def compute_backoff(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """带完全抖动的指数退避：在 [0, min(cap, base * 2^attempt)] 内均匀取值。"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def get_status_code(exc: BaseException) -> Optional[int]:
+    """从 openai 异常中读取 HTTP 状态码（连接错误等无状态码时返回 None）。"""
+    status = getattr(exc, 'status_code', None)
+    if status is None:
+        response = getattr(exc, 'response', None)
+        status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def get_retry_after(exc: BaseException) -> Optional[float]:
+    """解析异常响应头中的 retry-after-ms / retry-after（秒），无则返回 None。"""
+    response = getattr(exc, 'response', None)
+    headers: Any = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        retry_ms = headers.get('retry-after-ms')
+        if retry_ms is not None:
+            return max(0.0, float(retry_ms) / 1000.0)
+        retry_after = headers.get('retry-after')
+        if retry_after is not None:
+            return max(0.0, float(retry_after))
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """判断异常是否值得重试：限流、超时、冲突、服务端错误与无状态码的网络错误。"""
+    status = get_status_code(exc)
+    if status is None:
+        return True
+    return status in (408, 409, 429) or status >= 500
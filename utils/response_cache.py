@@ -0,0 +1,147 @@
+"""
+LLM 响应缓存
+
+以 (模型, temperature, 完整prompt) 的哈希为键，将成功的AI响应持久化到本地 SQLite，
+重跑时未变化的chunk直接命中缓存、不再调用API。总大小超过上限时按最近访问时间（LRU）淘汰。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from config import Config
+
+
+class ResponseCache:
+    """基于 SQLite 的内容寻址响应缓存（线程安全）"""
+
+    def __init__(self, cache_dir: str, max_bytes: int, refresh: bool = False):
+        """
+        Args:
+            cache_dir: 缓存目录（内含 responses.sqlite3）
+            max_bytes: 缓存总大小上限（字节），超出后按 LRU 淘汰
+            refresh: 为 True 时忽略已有缓存（仍写入新响应），用于强制刷新
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "responses.sqlite3")
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, temperature: float, prompt: str) -> str:
+        """计算缓存键：模型、temperature 与完整prompt 的 SHA-256。"""
+        payload = json.dumps([model, float(temperature), prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, model: str, temperature: float, prompt: str) -> Optional[str]:
+        """读取缓存（refresh 模式下总是未命中），命中时刷新访问时间。"""
+        if self.refresh:
+            return None
+        key = self.make_key(model, temperature, prompt)
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return row[0]
+
+    def put(self, model: str, temperature: float, prompt: str, response: str) -> None:
+        """写入缓存并在超出大小上限时淘汰最久未访问的条目。"""
+        if not response:
+            return
+        key = self.make_key(model, temperature, prompt)
+        size = len(response.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if old is not None:
+                self._total_bytes -= old[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._total_bytes += size
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._total_bytes = 0
+                return
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            self._total_bytes -= row[1]
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_shared_cache: Optional[ResponseCache] = None
+_cache_enabled: Optional[bool] = None
+_cache_refresh = False
+_shared_lock = threading.Lock()
+
+
+def configure_response_cache(enabled: Optional[bool] = None, refresh: bool = False) -> None:
+    """
+    设置进程级缓存开关（对应命令行 --no-cache / --refresh），下次获取时生效
+
+    enabled 为 None 时沿用配置（LLM_CACHE）；只有显式传入时才覆盖配置。
+    """
+    global _shared_cache, _cache_enabled, _cache_refresh
+    with _shared_lock:
+        if _shared_cache is not None:
+            _shared_cache.close()
+        _shared_cache = None
+        _cache_enabled = enabled
+        _cache_refresh = refresh
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """获取进程级共享缓存；禁用时返回 None。"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is not None:
+            return _shared_cache
+        cache_config = Config.get_cache_config()
+        enabled = cache_config['enabled'] if _cache_enabled is None else _cache_enabled
+        if not enabled:
+            return None
+        _shared_cache = ResponseCache(
+            cache_dir=cache_config['cache_dir'],
+            max_bytes=cache_config['max_bytes'],
+            refresh=_cache_refresh,
+        )
+        return _shared_cache
@@ -0,0 +1,175 @@
+"""
+题型标题识别
+
+把 QUESTION_TYPE_MAPPING 中各题型的标题正则合并为一个预编译的交替式（每个题型一个命名组，
+题数也在同一次匹配中取出），每行只做一次 search，耗时与文档行数成线性关系。
+
+标题语法可配置：其他题库的大题编号方式不同时，可用 JSON 文件给出各题型的标题正则，
+或给出一个标题模板加各题型的标签::
+
+    {
+      "template": "^第[一二三四五六七八九十]+部分\\s*{label}.*?[（(](\\d+)\\s*题",
+      "sections": {
+        "单选题": {"name": "single_choice", "label": "单项选择题"},
+        "判断题": {"name": "judgment", "pattern": "^判断题\\s*共(\\d+)题"}
+      }
+    }
+
+标题正则中的第一个捕获组（或命名组 ``count``）视为题数；没有捕获组时按
+``（N题）`` 的通用写法在标题行中查找题数。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# 标题中未给出题数捕获组时使用的通用写法
+DEFAULT_COUNT_PATTERN = re.compile(r'[（(]\s*(\d+).*题[）)]')
+LABEL_PLACEHOLDER = "{label}"
+
+
+@dataclass(frozen=True)
+class SectionHeading:
+    """识别出的题型标题"""
+
+    type_name: str
+    type_info: Dict[str, str]
+    expected_count: int
+    line: str
+
+
+def _rewrite_groups(pattern: str, count_group: str) -> str:
+    """
+    把标题正则改写为可放入交替式的形式
+
+    题数组（命名组 ``count``，没有时取第一个普通捕获组）改名为 count_group，其余捕获组
+    改为非捕获组，避免各题型之间组名冲突。
+    """
+    use_named = "(?P<count>" in pattern
+    out: List[str] = []
+    in_class = False
+    count_done = False
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\':
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            if ch == ']':
+                in_class = False
+            out.append(ch)
+            i += 1
+            continue
+        if ch == '[':
+            in_class = True
+            out.append(ch)
+            i += 1
+            # 字符组开头的 ``^``、``]`` 是字面量
+            if i < len(pattern) and pattern[i] == '^':
+                out.append('^')
+                i += 1
+            if i < len(pattern) and pattern[i] == ']':
+                out.append(']')
+                i += 1
+            continue
+        if ch == '(':
+            if pattern.startswith("(?P<", i):
+                end = pattern.index('>', i)
+                name = pattern[i + 4:end]
+                if name == "count" and not count_done:
+                    out.append(f"(?P<{count_group}>")
+                    count_done = True
+                else:
+                    out.append("(?:")
+                i = end + 1
+                continue
+            if pattern.startswith("(?", i):
+                out.append(ch)
+                i += 1
+                continue
+            if not use_named and not count_done:
+                out.append(f"(?P<{count_group}>")
+                count_done = True
+            else:
+                out.append("(?:")
+            i += 1
+            continue
+        out.append(ch)
+        i += 1
+    return ''.join(out)
+
+
+class SectionDetector:
+    """用一个预编译交替式识别所有题型标题"""
+
+    def __init__(self, type_mapping: Dict[str, Dict[str, str]]):
+        """
+        Args:
+            type_mapping: {题型名: {"name": 文件名, "pattern": 标题正则}}（同 QUESTION_TYPE_MAPPING）
+        """
+        self.type_mapping = type_mapping
+        self._types: Dict[str, tuple] = {}
+        alternatives = []
+        for i, (type_name, type_info) in enumerate(type_mapping.items()):
+            type_group, count_group = f"t{i}", f"c{i}"
+            alternatives.append(f"(?P<{type_group}>{_rewrite_groups(type_info['pattern'], count_group)})")
+            self._types[type_group] = (type_name, type_info, count_group)
+        self.regex = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def detect(self, line: str) -> Optional[SectionHeading]:
+        """识别一行（首尾空白忽略）；同一行匹配多个题型时取最靠前的匹配。"""
+        if self.regex is None:
+            return None
+        stripped = line.strip()
+        match = self.regex.search(stripped)
+        if not match:
+            return None
+        type_name, type_info, count_group = self._types[match.lastgroup]
+        count = match.group(count_group) if count_group in match.re.groupindex else None
+        if count is None:
+            fallback = DEFAULT_COUNT_PATTERN.search(stripped)
+            count = fallback.group(1) if fallback else None
+        return SectionHeading(type_name, type_info, int(count) if count and count.isdigit() else 0, stripped)
+
+
+def build_type_mapping(grammar: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    """
+    由标题语法配置生成题型映射
+
+    Args:
+        grammar: {"template": 含 {label} 的标题正则（可选）,
+                  "sections": {题型名: {"name": 文件名, "pattern": 正则 | "label": 标签}}}
+
+    Raises:
+        ValueError: 配置不完整或正则无法编译
+    """
+    sections = grammar.get("sections")
+    if not isinstance(sections, dict) or not sections:
+        raise ValueError("标题语法缺少 sections")
+    template = grammar.get("template")
+    mapping: Dict[str, Dict[str, str]] = {}
+    for type_name, spec in sections.items():
+        if not isinstance(spec, dict) or not spec.get("name"):
+            raise ValueError(f"题型 {type_name} 缺少 name")
+        pattern = spec.get("pattern")
+        if not pattern:
+            if not template or LABEL_PLACEHOLDER not in template:
+                raise ValueError(f"题型 {type_name} 既没有 pattern，也没有可用的 template")
+            pattern = template.replace(LABEL_PLACEHOLDER, re.escape(spec.get("label") or type_name))
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"题型 {type_name} 的标题正则无效: {e}") from e
+        mapping[type_name] = {"name": spec["name"], "pattern": pattern}
+    return mapping
+
+
+def load_section_grammar(path: str) -> Dict[str, Dict[str, str]]:
+    """从 JSON 文件读取标题语法并生成题型映射。"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return build_type_mapping(json.load(f))
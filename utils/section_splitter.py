@@ -0,0 +1,123 @@
+"""
+按行流式拆分题型
+
+SectionSplitter 是一个按行推进的状态机：尚未遇到题型标题时丢弃前置内容；遇到标题行时
+结束上一段、打开该题型的 markdown 文件；此后的行直接写入当前文件。文件格式与
+QuestionProcessor.split_text_by_question_types 原先一次性生成的内容一致（同一题型
+出现多次时以最后一次为准）。配合 iter_lines 把逐页产出的文本切成行，峰值内存只与单行
+（keep_text 时为单个题型）有关，而不是整份 PDF。
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from utils.section_detector import SectionDetector
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """把逐块到达的文本切成行，结果与 ``"".join(chunks).split('\\n')`` 相同。"""
+    carry = ""
+    for chunk in chunks:
+        parts = (carry + chunk).split('\n')
+        carry = parts.pop()
+        yield from parts
+    yield carry
+
+
+class SectionSplitter:
+    """按行识别题型标题并把各题型文本写入 ``{output_dir}/{name}.md``"""
+
+    def __init__(self, type_mapping: Dict[str, Dict[str, str]], output_dir: str, keep_text: bool = False):
+        """
+        Args:
+            type_mapping: {题型名: {"name": 文件名, "pattern": 标题正则}}（同 QUESTION_TYPE_MAPPING）
+            output_dir: 输出目录
+            keep_text: 是否在结果中保留各题型的完整文本（"text" 字段）
+        """
+        self.type_mapping = type_mapping
+        self.output_dir = output_dir
+        self.keep_text = keep_text
+        self.sections: Dict[str, Dict[str, Any]] = {}
+        self.char_count = 0
+        self.detector = SectionDetector(type_mapping)
+        self._current: Optional[Dict[str, Any]] = None
+        self._file: Optional[TextIO] = None
+        self._lines: List[str] = []
+        self._line_count = 0
+        self._fed = False
+        os.makedirs(output_dir, exist_ok=True)
+
+    def feed(self, line: str) -> None:
+        """推进一行（不含换行符）。"""
+        self.char_count += len(line) + (1 if self._fed else 0)
+        self._fed = True
+        heading = self.detector.detect(line)
+        if heading:
+            self._close_section()
+            self._open_section(heading.type_name, heading.type_info, heading.expected_count)
+        if self._file is None:
+            return
+        if self._line_count:
+            self._file.write('\n')
+        self._file.write(line)
+        self._line_count += 1
+        if self.keep_text:
+            self._lines.append(line)
+
+    def _open_section(self, type_name: str, type_info: Dict[str, str], expected_count: int) -> None:
+        print(f"找到题型: {type_name}，预期题数: {expected_count}")
+
+        file_path = os.path.join(self.output_dir, f"{type_info['name']}.md")
+        self._file = open(file_path, 'w', encoding='utf-8')
+        self._file.write(f"# {type_name} ({expected_count}题)\n\n")
+        self._file.write(f"## 提取时间\n{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        self._file.write(f"## 预期题数\n{expected_count}\n\n")
+        self._file.write("## 原始文本\n\n```\n")
+        self._current = {
+            "type_name": type_name,
+            "file_path": file_path,
+            "expected_count": expected_count,
+            "type_info": type_info,
+        }
+        self._lines = []
+        self._line_count = 0
+
+    def _close_section(self) -> None:
+        if self._file is None:
+            return
+        self._file.write("\n```\n")
+        self._file.close()
+        self._file = None
+
+        section = self._current
+        type_name = section.pop("type_name")
+        section["line_count"] = self._line_count
+        if self.keep_text:
+            section["text"] = '\n'.join(self._lines)
+        self.sections[type_name] = section
+        self._lines = []
+        print(f"✅ 保存 {type_name} 到: {section['file_path']}")
+
+    def close(self) -> Dict[str, Dict[str, Any]]:
+        """结束最后一个题型并返回 {题型名: {"file_path", "expected_count", "type_info", "line_count"[, "text"]}}。"""
+        self._close_section()
+        return self.sections
+
+
+def split_lines_by_question_types(
+    lines: Iterable[str],
+    type_mapping: Dict[str, Dict[str, str]],
+    output_dir: str,
+    keep_text: bool = False,
+) -> SectionSplitter:
+    """把行流逐行交给 SectionSplitter，返回已关闭的拆分器（sections / char_count）。"""
+    splitter = SectionSplitter(type_mapping, output_dir, keep_text=keep_text)
+    try:
+        for line in lines:
+            splitter.feed(line)
+    finally:
+        splitter.close()
+    return splitter
@@ -5,12 +5,25 @@
 from __future__ import annotations
 
 import os
+import random
 import re
-from typing import List, Optional, Tuple, Dict, Any
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
+from utils.rate_limiter import (
+    RateLimiter,
+    compute_backoff,
+    get_rate_limiter,
+    get_retry_after,
+    is_retryable,
+)
+from utils.excel_writer import write_rows_to_excel
+from utils.question_boundaries import pack_questions_into_chunks
+from utils.question_repair import normalize_text
+from utils.metrics import get_llm_stats
+from utils.response_cache import ResponseCache, get_response_cache
+from utils.token_estimator import estimate_prompt_tokens, estimate_tokens
 
 
 def _read_markdown_content_lines(file_path: str) -> List[str]:
@@ -59,24 +72,221 @@ def chunk_file_by_lines(file_path: str, lines_per_chunk: int) -> List[Tuple[List
     return chunks
 
 
-def call_openai_with_retries(client: Any, model: str, prompt: str, max_retries: int, temperature: float = 0.1) -> Optional[str]:
-    """带重试的OpenAI对话调用。"""
+# 按题目边界切分时没有前瞻块，prompt 中 [next_slice] 位置只放这一句说明
+NO_NEXT_SLICE = "（无：[current_slice] 已按题目边界切分，末尾试题完整，无需补全）"
+
+
+def chunk_file_by_questions(file_path: str, max_lines: int) -> List[Tuple[List[str], Optional[List[str]]]]:
+    """按题目边界切分markdown内容：每块只包含完整题目（不超过 max_lines 行），不再附带前瞻块。"""
+    content_lines = _read_markdown_content_lines(file_path)
+    return [(chunk, None) for chunk in pack_questions_into_chunks(content_lines, max_lines)]
+
+
+def chunk_file_by_tokens(file_path: str, max_tokens: int) -> List[Tuple[List[str], Optional[List[str]]]]:
+    """按题目边界切分markdown内容，每块的估算token数不超过 max_tokens（单题超出时独占一块）。"""
+    content_lines = _read_markdown_content_lines(file_path)
+    return [(chunk, None) for chunk in pack_questions_into_chunks(content_lines, max_tokens, estimate_tokens)]
+
+
+def chunk_token_budget(config: Dict[str, Any]) -> int:
+    """
+    计算每个chunk的切片token预算
+
+    同时受输入上限与输出上限约束：标准化结果约为输入的 output_token_ratio 倍，
+    因此切片不能超过 max_output_tokens / output_token_ratio，避免响应被截断。
+    """
+    max_input = int(config.get("max_input_tokens", 4000))
+    max_output = int(config.get("max_output_tokens", 8000))
+    ratio = float(config.get("output_token_ratio", 1.5))
+    return max(1, min(max_input, int(max_output / ratio)))
+
+
+def chunk_type_file(file_path: str, config: Dict[str, Any]) -> List[Tuple[List[str], Optional[List[str]]]]:
+    """
+    按标准化器配置切分题型文件
+
+    chunk_strategy:
+        - "tokens"（默认）: 按题目边界打包，每块不超过 chunk_token_budget(config) 个估算token
+        - "questions": 按题目边界打包，每块不超过 lines_per_chunk 行
+        - "lines": 机械按行切分，并附带下一块作为前瞻补全
+    """
+    strategy = config.get("chunk_strategy", "tokens")
+    if strategy == "tokens":
+        return chunk_file_by_tokens(file_path, chunk_token_budget(config))
+    if strategy == "lines":
+        return chunk_file_by_lines(file_path, config["lines_per_chunk"])
+    if strategy == "questions":
+        return chunk_file_by_questions(file_path, config["lines_per_chunk"])
+    raise ValueError(f"未知的切分策略: {strategy}")
+
+
+QUESTION_SEPARATOR = "=== 题目分隔符 ==="
+
+
+class QuestionStreamSplitter:
+    """流式响应的增量切分：每收到一个完整的题目分隔符，立即把其前面的题目交给回调。"""
+
+    def __init__(self, on_question: Callable[[str], None], separator: str = QUESTION_SEPARATOR, skip: int = 0):
+        """
+        Args:
+            on_question: 每道完整题目的回调
+            separator: 题目分隔符
+            skip: 跳过前 skip 道题目（重试时避免重复交出已交出的题目）
+        """
+        self.on_question = on_question
+        self.separator = separator
+        self.emitted = 0
+        self._skip = skip
+        self._buffer = ""
+
+    def feed(self, delta: str) -> None:
+        self._buffer += delta
+        while True:
+            pos = self._buffer.find(self.separator)
+            if pos < 0:
+                return
+            text = self._buffer[:pos].strip()
+            self._buffer = self._buffer[pos + len(self.separator):]
+            if text:
+                self._emit(text)
+
+    def flush(self) -> None:
+        """响应结束：最后一道题可能缺少结尾分隔符，只要含题目标题也交出。"""
+        text = self._buffer.strip()
+        self._buffer = ""
+        if text and "### 试题" in text:
+            self._emit(text)
+
+    def _emit(self, text: str) -> None:
+        self.emitted += 1
+        if self.emitted > self._skip:
+            self.on_question(text)
+
+
+def _stream_completion(
+    client: Any,
+    model: str,
+    prompt: str,
+    temperature: float,
+    splitter: Optional[QuestionStreamSplitter],
+) -> Tuple[str, Any]:
+    """
+    以流式方式读取对话补全，返回 (完整文本, usage)
+
+    请求带 include_usage，服务端在最后一个（choices 为空的）chunk 中返回整次请求的用量；
+    服务端不支持时 usage 为 None。
+    """
+    parts: List[str] = []
+    usage: Any = None
+    stream = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    for event in stream:
+        # 只有最后一个 chunk 带用量，其余 chunk 的 usage 为 None
+        if getattr(event, 'usage', None) is not None:
+            usage = event.usage
+        choices = getattr(event, 'choices', None)
+        if not choices:
+            continue
+        delta = getattr(choices[0].delta, 'content', None)
+        if delta:
+            parts.append(delta)
+            if splitter is not None:
+                splitter.feed(delta)
+    if splitter is not None:
+        splitter.flush()
+    return "".join(parts), usage
+
+
+def call_openai_with_retries(
+    client: Any,
+    model: str,
+    prompt: str,
+    max_retries: int,
+    temperature: float = 0.1,
+    rate_limiter: Optional[RateLimiter] = None,
+    cache: Optional[ResponseCache] = None,
+    stream: bool = False,
+    on_question: Optional[Callable[[str], None]] = None,
+) -> Optional[str]:
+    """
+    带缓存、限流与重试的OpenAI对话调用。
+
+    相同 (模型, temperature, prompt) 的成功响应直接从本地缓存返回，不发起请求；
+    每次请求前向进程级共享限流器申请 1 个请求额度与预估的输入+输出token；
+    失败时优先遵循 Retry-After，否则按带抖动的指数退避等待，不可恢复的错误（如 400/401）不再重试。
+
+    stream=True 时以流式读取响应，每收到一个题目分隔符就把完整题目交给 on_question，
+    返回值仍为完整响应文本（与非流式一致）；命中缓存时也会逐题回调。
+    """
+    stats = get_llm_stats()
+    if cache is None:
+        cache = get_response_cache()
+    if cache is not None:
+        cached = cache.get(model, temperature, prompt)
+        if cached is not None:
+            print("💾 命中响应缓存，跳过API调用")
+            stats.record_cache_hit()
+            if on_question is not None:
+                for question in split_questions_by_separator(cached):
+                    on_question(question)
+            return cached
+
+    limiter = rate_limiter or get_rate_limiter()
+    prompt_tokens = estimate_prompt_tokens(prompt)
+    # 标准化任务需逐字复制原文，输出规模与输入相当
+    estimated_tokens = prompt_tokens * 2
+    emitted = 0
+
     for attempt in range(max_retries):
+        limiter.acquire(estimated_tokens)
+        splitter = QuestionStreamSplitter(on_question, skip=emitted) if stream and on_question is not None else None
+        started = time.perf_counter()
         try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
+            if stream:
+                content, usage = _stream_completion(client, model, prompt, temperature, splitter)
+            else:
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                )
+                usage = getattr(response, 'usage', None)
+                content = response.choices[0].message.content
+            stats.record_call(
+                time.perf_counter() - started,
+                getattr(usage, 'prompt_tokens', None),
+                getattr(usage, 'completion_tokens', None),
             )
-            return response.choices[0].message.content
+            limiter.reconcile(estimated_tokens, getattr(usage, 'total_tokens', None))
+            if cache is not None and content:
+                cache.put(model, temperature, prompt, content)
+            return content
         except Exception as exc:  # noqa: BLE001 - 打印异常信息
+            if splitter is not None:
+                emitted = max(emitted, splitter.emitted)
             print(f"API调用失败 (尝试 {attempt + 1}/{max_retries}): {exc}")
-            if attempt == max_retries - 1:
+            if attempt == max_retries - 1 or not is_retryable(exc):
+                stats.record_failure()
                 return None
+            stats.record_retry()
+            retry_after = get_retry_after(exc)
+            if retry_after is not None:
+                # 服务端明确要求等待：全局暂停，避免其他线程继续触发 429
+                delay = retry_after + random.uniform(0, 0.5)
+                limiter.pause_for(delay)
+            else:
+                delay = compute_backoff(attempt)
+            print(f"⏳ {delay:.1f} 秒后重试")
+            time.sleep(delay)
     return None
 
 
-def split_questions_by_separator(ai_response: str, separator: str = "=== 题目分隔符 ===") -> List[str]:
+def split_questions_by_separator(ai_response: str, separator: str = QUESTION_SEPARATOR) -> List[str]:
     """将标准化文本按分隔符拆分为题目；若无分隔符，回退按 '### 试题 ' 块拆分。"""
     if not ai_response:
         return []
@@ -153,35 +363,97 @@ def extract_codeblocks_from_markdown(content: str) -> List[str]:
     return re.findall(r"```\n(.*?)\n```", content, re.DOTALL)
 
 
-def write_excel(headers: List[str], rows: List[List[Any]], sheet_title: str, output_path: str) -> None:
-    """创建Excel并写入表头与行数据，自动列宽。"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = sheet_title
-
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-
-    for row_index, row_values in enumerate(rows, 2):
-        for col_index, value in enumerate(row_values, 1):
-            ws.cell(row=row_index, column=col_index, value=value)
-
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except Exception:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    wb.save(output_path)
+# 视为“未填写”的字段值
+_EMPTY_FIELD_VALUES = {"", "无", "未提供"}
+
+
+def _question_completeness(question: Dict[str, Any]) -> Tuple[int, int]:
+    """题目完整度：(已填写字段数, 内容总长度)。"""
+    filled = [str(v).strip() for v in question.values() if str(v).strip() not in _EMPTY_FIELD_VALUES]
+    return len(filled), sum(len(v) for v in filled)
+
+
+def _options_compatible(a: Dict[str, Any], b: Dict[str, Any], option_keys: List[str]) -> bool:
+    """两份同题干题目的选项是否一致（允许一方缺失或被截断）。"""
+    for key in option_keys:
+        x, y = normalize_text(str(a.get(key, ""))), normalize_text(str(b.get(key, "")))
+        if x and y and not (x.startswith(y) or y.startswith(x)):
+            return False
+    return True
+
+
+# 前瞻补全只会让交界处的少数几道题重复输出
+OVERLAP_MERGE_WINDOW = 3
+
+
+def _find_boundary_duplicate(
+    merged: List[Dict[str, Any]],
+    candidates: List[int],
+    taken: set,
+    question: Dict[str, Any],
+) -> Optional[int]:
+    stem = normalize_text(str(question.get('question_stem', '')))
+    if not stem:
+        return None
+    option_keys = sorted(k for k in question if k.startswith('option_'))
+    return next(
+        (
+            p for p in candidates
+            if p not in taken
+            and normalize_text(str(merged[p].get('question_stem', ''))) == stem
+            and _options_compatible(merged[p], question, option_keys)
+        ),
+        None,
+    )
+
+
+def merge_duplicate_questions(
+    chunks: List[List[Dict[str, Any]]],
+    window: int = OVERLAP_MERGE_WINDOW,
+) -> List[Dict[str, Any]]:
+    """
+    合并相邻chunk交界处重复输出的题目
+
+    只比较上一chunk末尾与下一chunk开头各 window 道题：题干规范化后相同且选项一致
+    （允许一方缺失或被截断）的视为同一道，只保留更完整的一份，位置保持在前一份处。
+    题干相同但选项不同、或不在交界处的题目不会合并——题库本身可能在不同题号下重复收录同一道题。
+    """
+    merged: List[Dict[str, Any]] = []
+    previous_tail: List[int] = []
+    removed = 0
+    for chunk in chunks:
+        start = len(merged)
+        taken: set = set()
+        for offset, question in enumerate(chunk):
+            position = _find_boundary_duplicate(merged, previous_tail, taken, question) if offset < window else None
+            if position is None:
+                merged.append(question)
+                continue
+            taken.add(position)
+            removed += 1
+            if _question_completeness(question) > _question_completeness(merged[position]):
+                merged[position] = question
+        previous_tail = list(range(max(start, len(merged) - window), len(merged)))
+
+    if removed:
+        print(f"🧹 合并重复题目 {removed} 道")
+    return merged
+
+
+def merge_chunk_questions(chunks: List[List[Dict[str, Any]]], config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    按chunk顺序汇总题目
+
+    只有 lines 策略（附带下一块作为前瞻补全）会让相邻chunk在交界处重复输出同一道题，
+    此时合并交界处的重复；按题目边界切分的策略没有重叠，题目原样保留。
+    """
+    if config.get("chunk_strategy", "tokens") == "lines":
+        return merge_duplicate_questions(chunks)
+    return [question for chunk in chunks for question in chunk]
+
+
+def write_excel(headers: List[str], rows: Iterable[List[Any]], sheet_title: str, output_path: str) -> None:
+    """以流式（write-only）模式创建Excel并逐行写入表头与行数据，写入时统计列宽。"""
+    count = write_rows_to_excel(output_path, headers, rows, sheet_title)
     print(f"✅ Excel文件已保存: {output_path}")
-    print(f"📊 共写入 {len(rows)} 行")
-
-
+    print(f"📊 共写入 {count} 行")
@@ -0,0 +1,131 @@
+"""
+列式/文本导出格式（CSV、JSONL、Parquet）
+
+下游考试平台批量导入题目时，xlsx 的写出与读回都是最慢的一环。本模块按与
+create_excel_file 相同的列（QUESTION_HEADERS）逐行写出 CSV 与 JSONL；安装了 pyarrow 时
+另可写出 Parquet（按批写入 row group，内存只保留一批）。
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.workbook_export import QUESTION_HEADERS, question_row
+
+try:  # Parquet 为可选能力
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - 取决于运行环境
+    pa = None
+    pq = None
+
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMAT_PARQUET = "parquet"
+EXPORT_FORMATS = (FORMAT_CSV, FORMAT_JSONL, FORMAT_PARQUET)
+PARQUET_BATCH_ROWS = 50000
+
+
+def parquet_available() -> bool:
+    """当前环境是否可以写出 Parquet（需要 pyarrow）。"""
+    return pq is not None
+
+
+def _cell(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def write_questions_csv(questions: Iterable[Dict[str, Any]], output_path: str) -> int:
+    """逐行写出 CSV（UTF-8 带 BOM，Excel 可直接打开），返回数据行数。"""
+    count = 0
+    with open(output_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(QUESTION_HEADERS)
+        for question in questions:
+            writer.writerow(question_row(question))
+            count += 1
+    return count
+
+
+def write_questions_jsonl(questions: Iterable[Dict[str, Any]], output_path: str) -> int:
+    """逐行写出 JSONL，每行一个以表头为键的对象，返回数据行数。"""
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for question in questions:
+            record = dict(zip(QUESTION_HEADERS, question_row(question)))
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def write_questions_parquet(
+    questions: Iterable[Dict[str, Any]],
+    output_path: str,
+    batch_rows: int = PARQUET_BATCH_ROWS,
+) -> int:
+    """
+    按批写出 Parquet（全部列为字符串），返回数据行数
+
+    Raises:
+        RuntimeError: 未安装 pyarrow
+    """
+    if not parquet_available():
+        raise RuntimeError("写出 Parquet 需要安装 pyarrow")
+
+    schema = pa.schema([(header, pa.string()) for header in QUESTION_HEADERS])
+    columns: List[List[Optional[str]]] = [[] for _ in QUESTION_HEADERS]
+    count = 0
+
+    def flush(writer) -> None:
+        if columns[0]:
+            writer.write_table(pa.Table.from_arrays([pa.array(c, type=pa.string()) for c in columns], schema=schema))
+            for column in columns:
+                column.clear()
+
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for question in questions:
+            for column, value in zip(columns, question_row(question)):
+                column.append(_cell(value))
+            count += 1
+            if len(columns[0]) >= max(1, batch_rows):
+                flush(writer)
+        flush(writer)
+        if count == 0:
+            writer.write_table(schema.empty_table())
+    return count
+
+
+WRITERS: Dict[str, Callable[[Iterable[Dict[str, Any]], str], int]] = {
+    FORMAT_CSV: write_questions_csv,
+    FORMAT_JSONL: write_questions_jsonl,
+    FORMAT_PARQUET: write_questions_parquet,
+}
+
+
+def export_questions(questions: List[Dict[str, Any]], base_path: str, formats: Iterable[str]) -> Dict[str, str]:
+    """
+    按给定格式写出同一批题目，文件名为 ``{base_path}.{格式}``
+
+    未安装 pyarrow 时跳过 Parquet 并提示。
+
+    Returns:
+        {格式: 文件路径}
+    """
+    written: Dict[str, str] = {}
+    for fmt in dict.fromkeys(formats):
+        if fmt not in WRITERS:
+            raise ValueError(f"未知的导出格式: {fmt}")
+        if fmt == FORMAT_PARQUET and not parquet_available():
+            print("⚠️  未安装 pyarrow，跳过 Parquet 导出")
+            continue
+        path = f"{os.path.splitext(base_path)[0]}.{fmt}"
+        count = WRITERS[fmt](questions, path)
+        print(f"📄 {fmt.upper()} 已生成: {path}（{count} 道）")
+        written[fmt] = path
+    return written
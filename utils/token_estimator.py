@@ -0,0 +1,35 @@
+"""
+本地token估算
+
+不依赖tokenizer，按字符类别粗略估算中英混排文本的token数：
+- CJK 字符及全角标点：约 1 token/字
+- 其他字符（ASCII字母、数字、空白、半角标点）：约 4 字符/token
+结果只用于限流与分块预算，宁可略偏大。
+"""
+
+from __future__ import annotations
+
+import re
+
+_CJK_PATTERN = re.compile(
+    "[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]"
+)
+
+# 非CJK字符每个token对应的平均字符数
+ASCII_CHARS_PER_TOKEN = 4.0
+# 聊天消息的固定开销（角色、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """估算一段文本的token数。"""
+    if not text:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    other_count = len(text) - cjk_count
+    return cjk_count + int(other_count / ASCII_CHARS_PER_TOKEN + 0.999)
+
+
+def estimate_prompt_tokens(prompt: str) -> int:
+    """估算单条 user 消息请求的输入token数（含消息开销）。"""
+    return estimate_tokens(prompt) + MESSAGE_OVERHEAD_TOKENS
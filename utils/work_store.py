@@ -0,0 +1,230 @@
+"""
+工作目录打包存储
+
+拆分出的题型原文、独立题目与标准化 chunk 结果统一存入工作目录中的一个 SQLite 文件
+（work_store.sqlite3），按 id 或 (题型, 序号) 随机读取。一万道题的题库不再生成一万个
+question_NNNN.md 小文件（在 Windows/NTFS 与网络共享上非常慢），后续步骤也不必从 markdown
+代码块中反复截取原文。仍需要旧目录结构时，可用 export_markdown 一次性导出。
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.standardization_utils import (
+    extract_codeblocks_from_markdown,
+    list_standardized_chunk_files,
+    save_markdown_chunk_result,
+)
+
+WORK_STORE_FILE = "work_store.sqlite3"
+WORK_FORMAT_STORE = "store"
+WORK_FORMAT_MARKDOWN = "markdown"
+
+
+def render_question_markdown(question_index: int, question_text: str) -> str:
+    """单个题目的 markdown（question_NNNN.md 的内容）。"""
+    return f"""# 题目 {question_index}
+
+## 原始文本
+
+```
+{question_text}
+```
+
+## 提取时间
+{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+## 文本长度
+{len(question_text)} 字符
+
+---
+"""
+
+
+def render_section_markdown(type_name: str, expected_count: int, text: str) -> str:
+    """题型原文的 markdown（question_types/{name}.md 的内容）。"""
+    return (
+        f"# {type_name} ({expected_count}题)\n\n"
+        f"## 提取时间\n{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        f"## 预期题数\n{expected_count}\n\n"
+        f"## 原始文本\n\n```\n{text}\n```\n"
+    )
+
+
+class WorkStore:
+    """工作目录的 SQLite 打包存储"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite 文件路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS sections ("
+            " type_name TEXT PRIMARY KEY,"
+            " file_name TEXT NOT NULL,"
+            " expected_count INTEGER NOT NULL,"
+            " text TEXT NOT NULL,"
+            " created TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS questions ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " type_name TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " text TEXT NOT NULL,"
+            " UNIQUE (type_name, seq));"
+            "CREATE TABLE IF NOT EXISTS chunk_results ("
+            " type_name TEXT NOT NULL,"
+            " chunk_index INTEGER NOT NULL,"
+            " questions TEXT NOT NULL,"
+            " question_count INTEGER NOT NULL,"
+            " PRIMARY KEY (type_name, chunk_index));"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def for_work_dir(cls, work_dir: str) -> "WorkStore":
+        """打开工作目录中的 work_store.sqlite3（不存在时创建）。"""
+        return cls(os.path.join(work_dir, WORK_STORE_FILE))
+
+    def __enter__(self) -> "WorkStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # 题型原文 -------------------------------------------------------------
+
+    def put_section(self, type_name: str, file_name: str, expected_count: int, text: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sections (type_name, file_name, expected_count, text, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (type_name, file_name, expected_count, text, datetime.datetime.now().isoformat()),
+            )
+
+    def get_section(self, type_name: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT type_name, file_name, expected_count, text FROM sections WHERE type_name = ?", (type_name,)
+        ).fetchone()
+        if not row:
+            return None
+        return {"type_name": row[0], "file_name": row[1], "expected_count": row[2], "text": row[3]}
+
+    def section_names(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT type_name FROM sections ORDER BY rowid")]
+
+    # 独立题目 -------------------------------------------------------------
+
+    def replace_questions(self, type_name: str, texts: Iterable[str]) -> int:
+        """用新的拆分结果替换该题型的全部题目（单个事务），返回题目数。"""
+        with self._conn:
+            self._conn.execute("DELETE FROM questions WHERE type_name = ?", (type_name,))
+            cursor = self._conn.executemany(
+                "INSERT INTO questions (type_name, seq, text) VALUES (?, ?, ?)",
+                ((type_name, seq, text) for seq, text in enumerate(texts, 1)),
+            )
+        return cursor.rowcount if cursor.rowcount >= 0 else self.question_count(type_name)
+
+    def get_question(self, type_name: str, seq: int) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT text FROM questions WHERE type_name = ? AND seq = ?", (type_name, seq)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_question_by_id(self, question_id: int) -> Optional[Tuple[str, int, str]]:
+        """按全局 id 读取题目，返回 (题型, 序号, 原文)。"""
+        row = self._conn.execute(
+            "SELECT type_name, seq, text FROM questions WHERE id = ?", (question_id,)
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def iter_questions(self, type_name: str) -> Iterator[Tuple[int, str]]:
+        """按序号逐条产出 (序号, 原文)。"""
+        yield from self._conn.execute(
+            "SELECT seq, text FROM questions WHERE type_name = ? ORDER BY seq", (type_name,)
+        )
+
+    def question_count(self, type_name: Optional[str] = None) -> int:
+        if type_name is None:
+            return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        return self._conn.execute("SELECT COUNT(*) FROM questions WHERE type_name = ?", (type_name,)).fetchone()[0]
+
+    # 标准化 chunk 结果 -----------------------------------------------------
+
+    def put_chunk_result(self, type_name: str, chunk_index: int, questions: List[str]) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunk_results (type_name, chunk_index, questions, question_count)"
+                " VALUES (?, ?, ?, ?)",
+                (type_name, chunk_index, json.dumps(questions, ensure_ascii=False), len(questions)),
+            )
+
+    def get_chunk_result(self, type_name: str, chunk_index: int) -> Optional[List[str]]:
+        row = self._conn.execute(
+            "SELECT questions FROM chunk_results WHERE type_name = ? AND chunk_index = ?",
+            (type_name, chunk_index),
+        ).fetchone()
+        if not row:
+            return None
+        return json.loads(row[0])
+
+    def chunk_indexes(self, type_name: str) -> List[int]:
+        return [row[0] for row in self._conn.execute(
+            "SELECT chunk_index FROM chunk_results WHERE type_name = ? ORDER BY chunk_index", (type_name,)
+        )]
+
+    def import_chunk_results(self, type_name: str, standardized_dir: str) -> int:
+        """把 {题型}_standardized 目录中的 standardized_chunk_NNN.md 收入存储，返回chunk数。"""
+        imported = 0
+        for path in list_standardized_chunk_files(standardized_dir):
+            index = int(os.path.basename(path)[len("standardized_chunk_"):-len(".md")])
+            with open(path, 'r', encoding='utf-8') as f:
+                self.put_chunk_result(type_name, index, extract_codeblocks_from_markdown(f.read()))
+            imported += 1
+        return imported
+
+
+def export_markdown(store: WorkStore, output_dir: str) -> Dict[str, int]:
+    """
+    把存储一次性导出为原有的 markdown 目录结构
+
+    - {output_dir}/{file_name}.md：题型原文
+    - {output_dir}/{题型}_questions/question_NNNN.md：独立题目
+    - {output_dir}/{题型}_standardized/standardized_chunk_NNN.md：标准化结果
+
+    Returns:
+        {题型: 导出的题目数}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    exported: Dict[str, int] = {}
+    for type_name in store.section_names():
+        section = store.get_section(type_name)
+        with open(os.path.join(output_dir, f"{section['file_name']}.md"), 'w', encoding='utf-8') as f:
+            f.write(render_section_markdown(type_name, section["expected_count"], section["text"]))
+
+        count = 0
+        questions_dir = os.path.join(output_dir, f"{type_name}_questions")
+        for seq, text in store.iter_questions(type_name):
+            os.makedirs(questions_dir, exist_ok=True)
+            with open(os.path.join(questions_dir, f"question_{seq:04d}.md"), 'w', encoding='utf-8') as f:
+                f.write(render_question_markdown(seq, text))
+            count += 1
+        exported[type_name] = count
+
+        standardized_dir = os.path.join(output_dir, f"{type_name}_standardized")
+        for chunk_index in store.chunk_indexes(type_name):
+            save_markdown_chunk_result(chunk_index, store.get_chunk_result(type_name, chunk_index), standardized_dir, type_name)
+    return exported
@@ -0,0 +1,104 @@
+"""
+题库汇总工作簿导出
+
+各标准化器的 process_standardized_to_excel 每个题型单独生成一个 xlsx；本模块把已解析的
+题目记录一次性流式写入同一个工作簿：每个题型一个工作表（sheets），或按模板版式合并为
+一个工作表（combined）。表头可取自模板文件（只读模式读取首行，不载入整个模板）。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from openpyxl import Workbook, load_workbook
+
+from utils.excel_writer import StreamingSheetWriter, save_workbook
+
+# 与模板 ``2-《数据安全管理员题库》（客观题）-20250805.xlsx`` 一致的列
+QUESTION_HEADERS = [
+    '代码', '题型', '难度', '题干',
+    '选择项A', '选择项B', '选择项C', '选择项D', '选择项E',
+    '答案', '分数', '题目一致性'
+]
+QUESTION_FIELDS = [
+    'code', 'question_type', 'difficulty', 'question_stem',
+    'option_A', 'option_B', 'option_C', 'option_D', 'option_E',
+    'answer', 'score', 'consistency',
+]
+
+LAYOUT_SHEETS = "sheets"
+LAYOUT_COMBINED = "combined"
+DEFAULT_COMBINED_TITLE = "题目表"
+
+
+def question_row(question: Dict[str, Any]) -> List[Any]:
+    """题目记录对应的一行（列顺序同 QUESTION_HEADERS）。"""
+    return [question.get(field, '') for field in QUESTION_FIELDS]
+
+
+def read_template_headers(template_path: str) -> Tuple[List[Any], str]:
+    """
+    读取模板首个工作表的表头行与工作表名
+
+    模板中合并单元格（如跨 E–I 列的 ``选择项``）除首格外为空，原样保留。
+
+    Returns:
+        (表头列表, 工作表名)
+    """
+    wb = load_workbook(template_path, read_only=True)
+    try:
+        ws = wb.worksheets[0]
+        first = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        headers = list(first)
+        while headers and headers[-1] is None:
+            headers.pop()
+        return headers, ws.title
+    finally:
+        wb.close()
+
+
+def export_question_workbook(
+    questions_by_type: Dict[str, Iterable[Dict[str, Any]]],
+    output_path: str,
+    layout: str = LAYOUT_SHEETS,
+    template_path: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    把多个题型的题目记录一次写入同一个工作簿
+
+    Args:
+        questions_by_type: {题型名: 题目记录}，按写入顺序排列（记录格式同 parse_question_block）
+        output_path: 输出 xlsx 路径
+        layout: ``sheets`` 每个题型一个工作表 / ``combined`` 全部题目写入一个工作表
+        template_path: 模板 xlsx，提供表头（及 combined 模式的工作表名）
+
+    Returns:
+        {题型名: 写入的题目数}
+    """
+    if layout not in (LAYOUT_SHEETS, LAYOUT_COMBINED):
+        raise ValueError(f"未知的工作簿版式: {layout}")
+
+    headers: List[Any] = QUESTION_HEADERS
+    combined_title = DEFAULT_COMBINED_TITLE
+    if template_path:
+        template_headers, combined_title = read_template_headers(template_path)
+        headers = template_headers or QUESTION_HEADERS
+
+    wb = Workbook(write_only=True)
+    counts: Dict[str, int] = {}
+    combined = StreamingSheetWriter(wb, combined_title, headers) if layout == LAYOUT_COMBINED else None
+    for type_name, questions in questions_by_type.items():
+        writer = combined or StreamingSheetWriter(wb, type_name, headers)
+        before = writer.rows_written
+        for question in questions:
+            writer.append(question_row(question))
+        counts[type_name] = writer.rows_written - before
+        if combined is None:
+            writer.close()
+    if combined is not None:
+        combined.close()
+
+    save_workbook(wb, output_path)
+    print(f"✅ 汇总工作簿已保存: {output_path}")
+    print(f"📊 " + "，".join(f"{name} {count} 道" for name, count in counts.items()))
+    return counts